@@ -0,0 +1,183 @@
+"""Задержки и число SQL-запросов для каждого URL приложений posts, users
+и about на синтетических данных.
+
+    python benchmarks/bench_views.py --posts 100000 --output after.json
+    python benchmarks/bench_views.py --compare before.json after.json
+
+Данные создаёт команда generate_data во временной тестовой базе. Каждый
+URL запрашивается авторизованным пользователем с наибольшим числом
+подписок; параметры подставляются из самых «тяжёлых» объектов: группы
+и автора с наибольшим числом записей, записи с наибольшим числом
+комментариев.
+"""
+import argparse
+import json
+import subprocess
+import time
+
+from common import (
+    BASE_DIR, percentiles, setup_django, test_database, write_report,
+)
+
+APPS = ('posts', 'users', 'about')
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def heaviest_objects():
+    from django.contrib.auth import get_user_model
+    from django.db.models import Count
+
+    from posts.models import Group, Post
+
+    User = get_user_model()
+    follower = User.objects.annotate(
+        number=Count('follower')
+    ).order_by('-number').first()
+    author = User.objects.annotate(
+        number=Count('posts')
+    ).order_by('-number').first()
+    group = Group.objects.annotate(
+        number=Count('posts')
+    ).order_by('-number').first()
+    post = Post.objects.annotate(
+        number=Count('comments')
+    ).order_by('-number').first()
+    return follower, {
+        'username': author.username,
+        'slug': group.slug,
+        'post_id': post.pk,
+        'chunk': 0,
+    }
+
+
+def app_urls(arguments):
+    """Имена и адреса всех маршрутов приложений из APPS"""
+    from importlib import import_module
+
+    from django.urls import reverse
+
+    for app in APPS:
+        module = import_module(f'{app}.urls')
+        for pattern in module.urlpatterns:
+            kwargs = {
+                name: arguments[name]
+                for name in pattern.pattern.converters
+            }
+            name = f'{module.app_name}:{pattern.name}'
+            yield name, reverse(name, kwargs=kwargs)
+
+
+def measure(client, user, path, requests, cold):
+    from django.core.cache import cache
+    from django.db import connection
+
+    samples = []
+    queries = []
+    status = None
+
+    def count_query(execute, sql, params, many, context):
+        queries[-1] += 1
+        return execute(sql, params, many, context)
+
+    for _ in range(requests):
+        if cold:
+            cache.clear()
+        queries.append(0)
+        with connection.execute_wrapper(count_query):
+            start = time.perf_counter()
+            response = client.get(path)
+            samples.append(time.perf_counter() - start)
+        status = response.status_code
+        # выход из аккаунта и подобные адреса сбрасывают сессию
+        if '_auth_user_id' not in client.session:
+            client.force_login(user)
+    result = percentiles(samples)
+    result.update({
+        'path': path,
+        'status': status,
+        'queries_max': max(queries),
+        'queries_mean': round(sum(queries) / len(queries), 2),
+    })
+    return result
+
+
+def compare(before_path, after_path):
+    with open(before_path, encoding='utf-8') as file:
+        before = json.load(file)
+    with open(after_path, encoding='utf-8') as file:
+        after = json.load(file)
+    report = {}
+    for name, result in after['views'].items():
+        old = before['views'].get(name)
+        if old is None:
+            continue
+        report[name] = {
+            key: round(result[key] - old[key], 3)
+            for key in ('p50_ms', 'p95_ms', 'p99_ms', 'queries_mean')
+        }
+    return {
+        'before': before.get('revision'),
+        'after': after.get('revision'),
+        'delta': report,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--groups', type=int, default=20)
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--comments', type=int, default=20000)
+    parser.add_argument('--follows', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=50,
+                        help='Запросов на каждый URL')
+    parser.add_argument('--cold', action='store_true',
+                        help='Очищать кеш перед каждым запросом')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'))
+    args = parser.parse_args()
+
+    if args.compare:
+        write_report(compare(*args.compare), args.output)
+        return
+
+    setup_django()
+    from django.core.management import call_command
+    from django.test import Client
+
+    with test_database():
+        call_command(
+            'generate_data', users=args.users, groups=args.groups,
+            posts=args.posts, comments=args.comments, follows=args.follows,
+            seed=args.seed, verbosity=0,
+        )
+        user, arguments = heaviest_objects()
+        client = Client()
+        client.force_login(user)
+        views = {
+            name: measure(client, user, path, args.requests, args.cold)
+            for name, path in app_urls(arguments)
+        }
+    write_report({
+        'revision': git_revision(),
+        'data': {
+            'users': args.users, 'groups': args.groups, 'posts': args.posts,
+            'comments': args.comments, 'follows': args.follows,
+        },
+        'requests': args.requests,
+        'cold': args.cold,
+        'views': views,
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
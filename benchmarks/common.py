@@ -0,0 +1,60 @@
+"""Общие функции для запуска замеров вне тестового раннера."""
+import json
+import os
+import statistics
+import sys
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(BASE_DIR, 'yatube')
+
+
+def setup_django(settings_module='yatube.settings'):
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Временная тестовая база, как в manage.py test"""
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment, teardown_test_environment,
+    )
+    setup_test_environment(debug=False)
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def percentiles(samples):
+    """p50/p95/p99 и среднее для списка замеров в секундах, в мс"""
+    ordered = sorted(samples)
+
+    def pick(fraction):
+        index = min(len(ordered) - 1, int(round(fraction * len(ordered))))
+        return round(ordered[index] * 1000, 3)
+
+    return {
+        'p50_ms': pick(0.50),
+        'p95_ms': pick(0.95),
+        'p99_ms': pick(0.99),
+        'mean_ms': round(statistics.mean(ordered) * 1000, 3),
+        'samples': len(ordered),
+    }
+
+
+def write_report(report, output=None):
+    text = json.dumps(report, ensure_ascii=False, indent=2, sort_keys=True)
+    if output:
+        with open(output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
@@ -0,0 +1,116 @@
+"""Сборка страницы ленты подписок запросом с соединением Follow и
+слиянием лент авторов (posts.timelines).
+
+    python benchmarks/follow_feed.py --posts-per-author 20
+
+Создаёт 10 000 авторов и трёх читателей, подписанных на 10, 1 000 и
+10 000 из них. Для каждого читателя и способа сборки замеряется первая
+и пятая страница: список записей вместе с авторами и группами, как в
+шаблоне. Для слияния отдельно замеряется холодный кеш — ленты авторов
+читаются из базы.
+"""
+import argparse
+import time
+
+from common import percentiles, setup_django, test_database, write_report
+
+FOLLOWING = (10, 1000, 10000)
+PAGES = (1, 5)
+
+
+def create_data(posts_per_author):
+    from django.contrib.auth import get_user_model
+
+    from posts.models import Follow, Post
+
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'author{i}') for i in range(max(FOLLOWING))
+    )
+    authors = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    Post.objects.bulk_create(
+        (
+            Post(author_id=author_id, text=f'Запись {i} автора {author_id}')
+            for i in range(posts_per_author)
+            for author_id in authors
+        )
+    )
+    readers = {}
+    for number in FOLLOWING:
+        reader = User.objects.create(username=f'reader{number}')
+        Follow.objects.bulk_create(
+            (
+                Follow(user=reader, author_id=author_id)
+                for author_id in authors[:number]
+            )
+        )
+        readers[number] = reader
+    return readers
+
+
+def render_page(post_list, number):
+    from django.core.paginator import Paginator
+
+    page = Paginator(post_list, 10).get_page(number)
+    return [(post.author.username, post.group_id) for post in page]
+
+
+def measure(make_post_list, number, repeat, before=None):
+    samples = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        render_page(make_post_list(), number)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts-per-author', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.cache import cache
+    from django.test import override_settings
+
+    from posts.models import Post
+    from posts.timelines import TimelineFeed
+
+    # locmem по умолчанию держит 300 ключей, а лент здесь 10 000
+    caches = {
+        'default': {
+            'BACKEND': 'core.cache.InstrumentedLocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 2 * max(FOLLOWING)},
+        }
+    }
+    report = {}
+    with test_database(), override_settings(CACHES=caches):
+        readers = create_data(args.posts_per_author)
+        for following, reader in readers.items():
+            author_ids = list(
+                reader.follower.order_by().values_list('author_id', flat=True)
+            )
+            for number in PAGES:
+                report[f'{following} authors, page {number}'] = {
+                    'join': measure(
+                        lambda: Post.objects.for_follower(reader),
+                        number, args.repeat,
+                    ),
+                    'timelines_cold': measure(
+                        lambda: TimelineFeed(author_ids),
+                        number, args.repeat, before=cache.clear,
+                    ),
+                    'timelines': measure(
+                        lambda: TimelineFeed(author_ids),
+                        number, args.repeat,
+                    ),
+                }
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
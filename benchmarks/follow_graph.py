@@ -0,0 +1,121 @@
+"""Память на подписку и задержка проверки «A подписан на B» в графе
+подписок posts.follow_graph по сравнению с запросом к базе.
+
+    python benchmarks/follow_graph.py --users 2000 --follows 100000
+
+Память считается для массивов всех пользователей с подписками: array('I')
+графа, список и множество int. Проверки выполняются для случайных пар
+пользователей: EXISTS в базе, граф из памяти процесса и граф из общего
+кеша (словарь процесса очищается перед каждой проверкой).
+"""
+import argparse
+import random
+import sys
+import time
+
+from common import percentiles, setup_django, test_database, write_report
+
+
+def deep_size(container):
+    """Размер контейнера вместе с объектами int внутри него"""
+    size = sys.getsizeof(container)
+    if not hasattr(container, 'itemsize'):
+        size += sum(sys.getsizeof(value) for value in container)
+    return size
+
+
+def memory(user_ids):
+    from posts.follow_graph import graph
+
+    edges = 0
+    sizes = {'array': 0, 'list': 0, 'set': 0}
+    for user_id in user_ids:
+        authors = graph.following(user_id)
+        edges += len(authors)
+        sizes['array'] += deep_size(authors)
+        sizes['list'] += deep_size(list(authors))
+        sizes['set'] += deep_size(set(authors))
+    report = {
+        name: {
+            'bytes': size,
+            'bytes_per_edge': round(size / edges, 1),
+        }
+        for name, size in sizes.items()
+    }
+    report['edges'] = edges
+    return report
+
+
+def timed(check, pairs):
+    samples = []
+    for user_id, author_id in pairs:
+        start = time.perf_counter()
+        check(user_id, author_id)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--follows', type=int, default=100000)
+    parser.add_argument('--checks', type=int, default=5000)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.test import override_settings
+
+    from posts.follow_graph import graph
+    from posts.models import Follow
+
+    User = get_user_model()
+    # locmem по умолчанию держит 300 ключей: граф всех пользователей
+    # в него не помещается, и проверки уходили бы в базу
+    caches = {
+        'default': {
+            'BACKEND': 'core.cache.InstrumentedLocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 4 * args.users},
+        }
+    }
+    with test_database(), override_settings(
+        CACHES=caches, FOLLOW_GRAPH_LOCAL_USERS=args.users
+    ):
+        call_command(
+            'generate_data', users=args.users, groups=1, posts=0,
+            comments=0, follows=args.follows, verbosity=0,
+        )
+        user_ids = list(
+            Follow.objects.order_by()
+            .values_list('user_id', flat=True)
+            .distinct()
+        )
+        all_ids = list(User.objects.values_list('pk', flat=True))
+        rng = random.Random(1)
+        pairs = [
+            (rng.choice(user_ids), rng.choice(all_ids))
+            for _ in range(args.checks)
+        ]
+        report = {'memory': memory(user_ids)}
+
+        def database(user_id, author_id):
+            return Follow.objects.filter(
+                user_id=user_id, author_id=author_id
+            ).exists()
+
+        def shared_cache(user_id, author_id):
+            graph.clear()
+            return graph.follows(user_id, author_id)
+
+        report['lookup'] = {
+            'database': timed(database, pairs),
+            'graph': timed(graph.follows, pairs),
+            'graph_shared_cache': timed(shared_cache, pairs),
+        }
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
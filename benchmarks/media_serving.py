@@ -0,0 +1,141 @@
+"""Пропускная способность отдачи картинок при параллельных загрузках:
+django.views.static.serve против core.media.
+
+    python benchmarks/media_serving.py --clients 8 --requests 400
+
+Приложение запускается в многопоточном wsgiref-сервере в этом же
+процессе, картинки (по умолчанию 300 КБ) создаются во временном
+MEDIA_ROOT. Клиенты скачивают их параллельно целиком и диапазонами по
+64 КБ. wsgiref не умеет sendfile, поэтому замер показывает стоимость
+самого представления; под gunicorn core.media отдаёт файл через
+os.sendfile, а с MEDIA_ACCEL — вовсе не читает его.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from common import percentiles, setup_django, write_report
+
+IMAGES = 20
+RANGE_SIZE = 64 * 1024
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def urlpatterns_for(media_root):
+    from django.urls import path
+    from django.views.static import serve
+
+    from core.views import serve_media
+
+    return [
+        path(
+            'static-view/<path:path>', serve,
+            {'document_root': media_root},
+        ),
+        path('media/<path:path>', serve_media),
+    ]
+
+
+# ROOT_URLCONF указывает на этот модуль, список заполняется в main()
+urlpatterns = []
+
+
+def download(url, byte_range=None):
+    request = urllib.request.Request(url)
+    if byte_range:
+        request.add_header('Range', byte_range)
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        size = len(response.read())
+    return time.perf_counter() - start, size
+
+
+def run(base_url, prefix, clients, requests, ranged):
+    jobs = []
+    for number in range(requests):
+        url = f'{base_url}/{prefix}/posts/image{number % IMAGES}.jpg'
+        byte_range = None
+        if ranged:
+            start = (number * RANGE_SIZE) % (RANGE_SIZE * 4)
+            byte_range = f'bytes={start}-{start + RANGE_SIZE - 1}'
+        jobs.append((url, byte_range))
+    started = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        results = list(pool.map(lambda job: download(*job), jobs))
+    elapsed = time.perf_counter() - started
+    total = sum(size for _, size in results)
+    result = percentiles([duration for duration, _ in results])
+    result.update({
+        'requests_per_second': round(requests / elapsed, 1),
+        'megabytes_per_second': round(total / elapsed / 2 ** 20, 1),
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--size', type=int, default=300 * 1024)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.wsgi import get_wsgi_application
+    from django.test import override_settings
+
+    media_root = tempfile.mkdtemp()
+    os.makedirs(os.path.join(media_root, 'posts'))
+    for number in range(IMAGES):
+        name = os.path.join(media_root, 'posts', f'image{number}.jpg')
+        with open(name, 'wb') as file:
+            file.write(os.urandom(args.size))
+    urlpatterns.extend(urlpatterns_for(media_root))
+    overrides = override_settings(
+        ROOT_URLCONF=__name__,
+        MEDIA_ROOT=media_root,
+        MEDIA_ACCEL=None,
+        ALLOWED_HOSTS=['*'],
+        # без панели django-debug-toolbar для 127.0.0.1
+        INTERNAL_IPS=[],
+    )
+    report = {}
+    with overrides:
+        server = make_server(
+            '127.0.0.1', 0, get_wsgi_application(),
+            server_class=ThreadingWSGIServer, handler_class=QuietHandler,
+        )
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+        try:
+            for prefix in ('static-view', 'media'):
+                report[prefix] = run(
+                    base_url, prefix, args.clients, args.requests, False
+                )
+            report['media/range'] = run(
+                base_url, 'media', args.clients, args.requests, True
+            )
+        finally:
+            server.shutdown()
+            shutil.rmtree(media_root, ignore_errors=True)
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Накладные расходы MetricsMiddleware на один запрос.
+
+    python benchmarks/metrics_overhead.py --requests 2000
+
+Прогоняет одни и те же запросы через тестовый клиент со сбором метрик
+и без него и печатает разницу медиан. Разница на целых запросах обычно
+тонет в шуме, поэтому отдельно замеряется сам промежуточный слой вокруг
+пустого представления.
+"""
+import argparse
+import time
+
+from common import percentiles, setup_django, test_database, write_report
+
+
+def run(client, url, requests):
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        client.get(url)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def middleware_only(requests):
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+
+    from core.middleware import MetricsMiddleware
+
+    request = RequestFactory().get('/about/tech/')
+    request.resolver_match = None
+
+    def view(request):
+        return HttpResponse()
+
+    middleware = MetricsMiddleware(view)
+    timings = {}
+    for name, handler in (('bare', view), ('with_metrics', middleware)):
+        start = time.perf_counter()
+        for _ in range(requests):
+            handler(request)
+        timings[name] = (time.perf_counter() - start) / requests
+    return {
+        'overhead_us': round(
+            (timings['with_metrics'] - timings['bare']) * 1e6, 2
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.test import Client, override_settings
+
+    # страница «О технологиях» без базы и кеша: видна чистая стоимость
+    # промежуточного слоя; профиль автора — с запросами к базе
+    from django.contrib.auth import get_user_model
+    from posts.models import Post
+
+    with test_database():
+        author = get_user_model().objects.create_user(username='bench')
+        Post.objects.bulk_create(
+            Post(author=author, text=f'Запись {i}') for i in range(50)
+        )
+        without_metrics = [
+            name for name in settings.MIDDLEWARE
+            if name != 'core.middleware.MetricsMiddleware'
+        ]
+        report = {}
+        for url in ('/about/tech/', '/profile/bench/'):
+            client = Client()
+            client.get(url)
+            with_middleware = run(client, url, args.requests)
+            with override_settings(MIDDLEWARE=without_metrics):
+                client = Client()
+                client.get(url)
+                baseline = run(client, url, args.requests)
+            report[url] = {
+                'with_metrics': with_middleware,
+                'without_metrics': baseline,
+                'overhead_p50_ms': round(
+                    with_middleware['p50_ms'] - baseline['p50_ms'], 3
+                ),
+            }
+        report['middleware_only'] = middleware_only(args.requests * 10)
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
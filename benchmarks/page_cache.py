@@ -0,0 +1,109 @@
+"""Задержки главной под параллельной нагрузкой в момент истечения кеша:
+cache_page и stale-while-revalidate (core.page_cache).
+
+    python benchmarks/page_cache.py --threads 8 --seconds 6 --ttl 1
+
+Потоки непрерывно запрашивают главную как аноним. Запись в кеше живёт
+--ttl секунд, поэтому за замер она истекает несколько раз. Для каждого
+варианта считаются перцентили задержки, самый долгий ответ и число
+пересборок страницы: у cache_page после истечения страницу собирает
+каждый поток, попавший в промах, у stale-while-revalidate — один.
+"""
+import argparse
+import threading
+import time
+
+from common import percentiles, setup_django, test_database, write_report
+
+
+def run(view, threads, seconds, pause):
+    from django.contrib.auth.models import AnonymousUser
+    from django.db import connection
+    from django.test import RequestFactory
+
+    def get():
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        return view(request)
+
+    # холодный старт не входит в замер: нужен только момент истечения
+    get()
+    samples = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client():
+        own = []
+        try:
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                get()
+                own.append(time.perf_counter() - start)
+                time.sleep(pause)
+        finally:
+            connection.close()
+        with lock:
+            samples.extend(own)
+
+    workers = [threading.Thread(target=client) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    report = percentiles(samples)
+    report['max_ms'] = round(max(samples) * 1000, 3)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=6)
+    parser.add_argument('--ttl', type=int, default=1)
+    parser.add_argument(
+        '--pause', type=float, default=0.005,
+        help='пауза потока между запросами, с',
+    )
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.cache import cache
+    from django.core.management import call_command
+    from django.views.decorators.cache import cache_page
+
+    from core.page_cache import swr_cache_page
+    from posts import views
+
+    # главная без декоратора кеша; счётчик — число её сборок
+    builds = {'count': 0}
+    build_lock = threading.Lock()
+
+    def index(request):
+        with build_lock:
+            builds['count'] += 1
+        return views.index.__wrapped__(request)
+
+    variants = {
+        'cache_page': cache_page(args.ttl)(index),
+        'stale_while_revalidate': swr_cache_page(args.ttl, 60)(index),
+    }
+    report = {}
+    with test_database():
+        call_command(
+            'generate_data', users=50, groups=5, posts=args.posts,
+            comments=0, follows=0, verbosity=0,
+        )
+        for name, view in variants.items():
+            cache.clear()
+            builds['count'] = 0
+            report[name] = run(
+                view, args.threads, args.seconds, args.pause
+            )
+            report[name]['builds'] = builds['count']
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Пропускная способность ленты подписок для авторизованного пользователя
+с сессиями в базе и с core.sessions.
+
+    python benchmarks/sessions.py --requests 500
+
+Для каждого SESSION_ENGINE пользователь заново входит через тестовый
+клиент, затем follow_index запрашивается --requests раз. В отчёт
+попадают запросы в секунду, задержки и число SQL-запросов к таблице
+сессий.
+"""
+import argparse
+import time
+
+from common import percentiles, setup_django, test_database, write_report
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'core.sessions': 'core.sessions',
+}
+
+
+def measure(user, requests):
+    from django.db import connection
+    from django.test import Client
+    from django.urls import reverse
+
+    client = Client()
+    client.force_login(user)
+    url = reverse('posts:follow_index')
+    session_queries = 0
+
+    def count_session_queries(execute, sql, params, many, context):
+        nonlocal session_queries
+        if 'django_session' in sql:
+            session_queries += 1
+        return execute(sql, params, many, context)
+
+    samples = []
+    with connection.execute_wrapper(count_session_queries):
+        started = time.perf_counter()
+        for _ in range(requests):
+            start = time.perf_counter()
+            client.get(url)
+            samples.append(time.perf_counter() - start)
+        elapsed = time.perf_counter() - started
+    result = percentiles(samples)
+    result.update({
+        'requests_per_second': round(requests / elapsed, 1),
+        'session_queries': session_queries,
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--posts', type=int, default=1000)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.management import call_command
+    from django.test import override_settings
+
+    from bench_views import heaviest_objects
+
+    with test_database():
+        call_command(
+            'generate_data', users=200, groups=10, posts=args.posts,
+            comments=0, follows=2000, verbosity=0,
+        )
+        user, _ = heaviest_objects()
+        report = {}
+        for name, engine in ENGINES.items():
+            with override_settings(SESSION_ENGINE=engine):
+                report[name] = measure(user, args.requests)
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Время до первого ответа и память воркера для настроек разработки и
+продакшена.
+
+    python benchmarks/startup.py --runs 5
+
+Каждый замер — отдельный процесс Python: импорт yatube.wsgi, первый и
+второй запрос страницы «О технологиях» напрямую через WSGI-приложение
+(без базы данных). Память — RSS процесса после второго запроса и его
+пиковое значение.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from common import PROJECT_DIR, write_report
+
+PROFILES = {
+    'development': 'yatube.settings',
+    'production': 'yatube.settings_production',
+}
+URL = '/about/tech/'
+
+CHILD = '''
+import json, resource, sys, time
+start = time.perf_counter()
+from yatube.wsgi import application
+imported = time.perf_counter()
+
+
+def request():
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': sys.argv[1],
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80',
+        'HTTP_HOST': 'localhost', 'REMOTE_ADDR': '10.0.0.1',
+        'wsgi.url_scheme': 'http', 'wsgi.input': sys.stdin.buffer,
+        'wsgi.errors': sys.stderr,
+    }
+    status = []
+    body = b''.join(application(
+        environ, lambda code, headers: status.append(code)
+    ))
+    assert status[0].startswith('200'), status
+    return len(body)
+
+
+request()
+first = time.perf_counter()
+request()
+second = time.perf_counter()
+with open('/proc/self/status') as file:
+    rss = next(
+        int(line.split()[1]) for line in file if line.startswith('VmRSS')
+    )
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'first_response_ms': (first - start) * 1000,
+    'second_request_ms': (second - first) * 1000,
+    'rss_kb': rss,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'modules': len(sys.modules),
+}))
+'''
+
+
+def run_once(settings_module):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module)
+    output = subprocess.check_output(
+        [sys.executable, '-c', CHILD, URL],
+        cwd=PROJECT_DIR, env=env, stdin=subprocess.DEVNULL,
+    )
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    report = {}
+    for profile, settings_module in PROFILES.items():
+        runs = [run_once(settings_module) for _ in range(args.runs)]
+        report[profile] = {
+            key: round(statistics.median(run[key] for run in runs), 2)
+            for key in runs[0]
+        }
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
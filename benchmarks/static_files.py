@@ -0,0 +1,122 @@
+"""Отдача статики: django.views.static.serve против StaticFilesMiddleware.
+
+    python benchmarks/static_files.py --requests 2000
+
+Во временный каталог пишутся CSS размером с bootstrap.min.css и
+картинка, collectstatic собирает их хранилищем
+core.staticfiles.CompressedManifestStaticFilesStorage. Затем один и тот
+же файл запрашивается через static() из django.conf.urls.static и через
+промежуточный слой, с Accept-Encoding и без него. В отчёте задержки,
+размер тела и доля ответов 304 на повторный запрос с ETag.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from common import percentiles, setup_django, write_report
+
+# ~160 КБ правдоподобного CSS
+CSS = b''.join(
+    b'.col-%d { flex: 0 0 %d%%; max-width: %d%%; padding: 0 15px; }\n'
+    % (i, i % 100, i % 100)
+    for i in range(2500)
+)
+IMAGE = os.urandom(20 * 1024)
+
+
+def collect(source, root):
+    from django.core.management import call_command
+
+    os.makedirs(os.path.join(source, 'css'))
+    os.makedirs(os.path.join(source, 'img'))
+    with open(os.path.join(source, 'css', 'bootstrap.min.css'), 'wb') as f:
+        f.write(CSS)
+    with open(os.path.join(source, 'img', 'logo.png'), 'wb') as f:
+        f.write(IMAGE)
+    call_command('collectstatic', interactive=False, verbosity=0)
+
+
+def run(handler, request, requests):
+    samples = []
+    size = 0
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = handler(request)
+        body = b''.join(response)
+        samples.append(time.perf_counter() - start)
+        size = len(body)
+        response.close()
+    result = percentiles(samples)
+    result['bytes'] = size
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.http import HttpResponse
+    from django.test import RequestFactory, override_settings
+    from django.views.static import serve
+
+    from core.middleware import StaticFilesMiddleware
+
+    source = tempfile.mkdtemp()
+    root = tempfile.mkdtemp()
+    settings = override_settings(
+        STATICFILES_DIRS=[source],
+        STATIC_ROOT=root,
+        STATICFILES_STORAGE=(
+            'core.staticfiles.CompressedManifestStaticFilesStorage'
+        ),
+        STATIC_SERVE_ENABLED=True,
+    )
+    report = {}
+    try:
+        with settings:
+            collect(source, root)
+            middleware = StaticFilesMiddleware(lambda request: HttpResponse())
+            factory = RequestFactory()
+            for name in ('css/bootstrap.min.css', 'img/logo.png'):
+                [url] = [
+                    url for url in middleware.files
+                    if url.startswith('/static/' + name.split('.')[0] + '.')
+                    and url != '/static/' + name
+                ]
+                path = url[len('/static/'):]
+
+                def django_serve(request):
+                    return serve(request, path, document_root=root)
+
+                cases = {}
+                for encoding in ('', 'gzip, deflate, br'):
+                    request = factory.get(
+                        url, HTTP_ACCEPT_ENCODING=encoding
+                    )
+                    label = encoding or 'identity'
+                    cases[f'django_static/{label}'] = run(
+                        django_serve, request, args.requests
+                    )
+                    cases[f'middleware/{label}'] = run(
+                        middleware, request, args.requests
+                    )
+                etag = middleware(factory.get(url))['ETag']
+                cases['middleware/if-none-match'] = run(
+                    middleware,
+                    factory.get(url, HTTP_IF_NONE_MATCH=etag),
+                    args.requests,
+                )
+                report[name] = cases
+    finally:
+        shutil.rmtree(source, ignore_errors=True)
+        shutil.rmtree(root, ignore_errors=True)
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Время до первого байта и объём страницы группы на 50 записей:
+обычный render(), render() со сжатием GZipMiddleware и потоковая
+отдача posts.streaming без сжатия и с gzip.
+
+    python benchmarks/streaming.py --requests 200
+
+Время до первого байта для потокового ответа — момент получения первого
+куска streaming_content, для обычного — получение ответа целиком.
+"""
+import argparse
+import time
+from unittest import mock
+
+from common import percentiles, setup_django, test_database, write_report
+
+PAGE_SIZE = 50
+GZIP_MIDDLEWARE = 'django.middleware.gzip.GZipMiddleware'
+
+
+def measure(client, url, requests, headers):
+    first_byte = []
+    total = []
+    size = 0
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(url, **headers)
+        if response.streaming:
+            chunks = iter(response.streaming_content)
+            body = next(chunks)
+            first_byte.append(time.perf_counter() - start)
+            body += b''.join(chunks)
+        else:
+            body = response.content
+            first_byte.append(time.perf_counter() - start)
+        total.append(time.perf_counter() - start)
+        size = len(body)
+    return {
+        'ttfb': percentiles(first_byte),
+        'total': percentiles(total),
+        'bytes': size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from bench_views import heaviest_objects
+
+    gzip_header = {'HTTP_ACCEPT_ENCODING': 'gzip, deflate'}
+    cases = {
+        'render': ({}, {}),
+        'render_gzip_middleware': (
+            {'MIDDLEWARE': [GZIP_MIDDLEWARE, *settings.MIDDLEWARE]},
+            gzip_header,
+        ),
+        'stream': ({'STREAM_LIST_PAGES': True}, {}),
+        'stream_gzip': ({'STREAM_LIST_PAGES': True}, gzip_header),
+    }
+    with test_database(), mock.patch(
+        'posts.paginator.NUMBER_OF_POSTS_PER_PAGE', PAGE_SIZE
+    ):
+        call_command(
+            'generate_data', users=50, groups=5, posts=2000, comments=0,
+            follows=0, verbosity=0,
+        )
+        _, arguments = heaviest_objects()
+        url = reverse('posts:group_list', kwargs={'slug': arguments['slug']})
+        report = {}
+        for name, (overrides, headers) in cases.items():
+            with override_settings(**overrides):
+                client = Client()
+                client.get(url, **headers)
+                report[name] = measure(client, url, args.requests, headers)
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
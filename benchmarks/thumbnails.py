@@ -0,0 +1,103 @@
+"""Сколько байт картинок экономит страница из 10 записей с адаптивными
+миниатюрами core.thumbnails по сравнению с одной JPEG 960x339.
+
+    python benchmarks/thumbnails.py --photos 10
+
+Картинки — синтетические «фотографии» 2000x1500 (градиенты, фигуры и
+шум). Миниатюры строятся так же, как их строит sorl с crop="center":
+масштабирование с обрезкой по центру, затем кодирование в нужный
+формат с качеством из настроек. Для каждого клиента выбирается вариант,
+который браузер взял бы из srcset: ширина не меньше нужной с учётом
+плотности пикселей экрана.
+"""
+import argparse
+import io
+import random
+
+from common import setup_django, write_report
+
+GEOMETRY = (960, 339)
+CLIENTS = {
+    'desktop': 960,
+    'mobile_dpr1': 360,
+    'mobile_dpr2': 720,
+}
+# качество JPEG в sorl по умолчанию (THUMBNAIL_QUALITY)
+JPEG_QUALITY = 95
+
+
+def synthetic_photo(seed, size=(2000, 1500)):
+    from PIL import Image, ImageDraw, ImageFilter
+
+    rnd = random.Random(seed)
+    photo = Image.merge('RGB', [
+        Image.linear_gradient('L').rotate(rnd.randint(0, 360)).resize(size)
+        for _ in range(3)
+    ])
+    draw = ImageDraw.Draw(photo)
+    for _ in range(30):
+        x, y = rnd.randrange(size[0]), rnd.randrange(size[1])
+        radius = rnd.randint(20, 300)
+        draw.ellipse(
+            (x - radius, y - radius, x + radius, y + radius),
+            fill=tuple(rnd.randrange(256) for _ in range(3)),
+        )
+    photo = photo.filter(ImageFilter.GaussianBlur(3))
+    noise = Image.effect_noise(size, 24).convert('RGB')
+    return Image.blend(photo, noise, 0.15)
+
+
+def encoded_size(photo, width, fmt, quality):
+    from PIL import Image, ImageOps
+
+    height = round(GEOMETRY[1] * width / GEOMETRY[0])
+    thumbnail = ImageOps.fit(photo, (width, height), Image.LANCZOS)
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, fmt, quality=quality)
+    return buffer.tell()
+
+
+def pick_width(widths, needed):
+    return next((width for width in widths if width >= needed), widths[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--photos', type=int, default=10)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    from core.thumbnails import modern_formats, widths_for
+
+    widths = widths_for(GEOMETRY[0])
+    formats = {fmt: settings.THUMBNAIL_FORMAT_QUALITY[fmt]
+               for fmt in modern_formats()}
+    formats['JPEG'] = JPEG_QUALITY
+    sizes = {(fmt, width): 0 for fmt in formats for width in widths}
+    for seed in range(args.photos):
+        photo = synthetic_photo(seed)
+        for fmt, quality in formats.items():
+            for width in widths:
+                sizes[fmt, width] += encoded_size(photo, width, fmt, quality)
+    legacy = sizes['JPEG', GEOMETRY[0]]
+    report = {'legacy_jpeg_960_bytes': legacy, 'clients': {}}
+    for client, needed in CLIENTS.items():
+        width = pick_width(widths, needed)
+        report['clients'][client] = {
+            fmt: {
+                'width': width,
+                'bytes': sizes[fmt, width],
+                'saved_percent': round(
+                    100 * (1 - sizes[fmt, width] / legacy), 1
+                ),
+            }
+            for fmt in formats
+        }
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Чтение записей ленты из общего кеша и из двухуровневого кеша
+(core.cache.TwoTierCache) с кешем процесса перед ним.
+
+    python benchmarks/two_tier_cache.py --reads 2000
+
+Общий кеш здесь — FileBasedCache во временном каталоге: как и у
+memcached, каждое чтение у него — обращение за пределы процесса.
+Замеряется post_cache.get_many для страницы из 10 записей при тёплом
+кеше, а также доля попаданий каждого уровня.
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import time
+
+from common import percentiles, setup_django, test_database, write_report
+
+
+def timed(reads, pages):
+    from django.core.cache import cache
+
+    from posts import post_cache
+
+    samples = []
+    for ids in pages:
+        post_cache.get_many(ids)
+    for _ in range(reads):
+        ids = random.choice(pages)
+        start = time.perf_counter()
+        post_cache.get_many(ids)
+        samples.append(time.perf_counter() - start)
+    report = percentiles(samples)
+    if hasattr(cache, 'stats'):
+        stats = cache.stats()
+        lookups = stats['local_hits'] + stats['shared_hits'] + stats['misses']
+        report['local_hit_ratio'] = round(stats['local_hits'] / lookups, 3)
+        report['shared_hit_ratio'] = round(stats['shared_hits'] / lookups, 3)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=1000)
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--reads', type=int, default=2000)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.cache import cache
+    from django.core.management import call_command
+    from django.test import override_settings
+
+    from posts.models import Post
+
+    directory = tempfile.mkdtemp()
+    shared = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': directory,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
+    variants = {
+        'shared': {'default': shared},
+        'two_tier': {
+            'default': {
+                'BACKEND': 'core.cache.TwoTierCache',
+                'OPTIONS': {'SHARED': 'shared', 'LOCAL_TIMEOUT': 60},
+            },
+            'shared': shared,
+        },
+    }
+    report = {}
+    with test_database():
+        call_command(
+            'generate_data', users=50, groups=5, posts=args.posts,
+            comments=0, follows=0, verbosity=0,
+        )
+        ids = list(Post.objects.values_list('pk', flat=True))
+        random.seed(1)
+        pages = [
+            random.sample(ids, 10) for _ in range(args.pages)
+        ]
+        try:
+            for name, caches in variants.items():
+                with override_settings(CACHES=caches):
+                    cache.clear()
+                    report[name] = timed(args.reads, pages)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
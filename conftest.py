@@ -0,0 +1,2 @@
+# Метка и фикстура query_budget для тестов из tests/ и тестов приложений
+pytest_plugins = ['core.pytest_plugin']
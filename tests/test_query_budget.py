@@ -0,0 +1,59 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from core.query_budget import QueryBudgetExceeded
+from posts import paginator
+
+
+@pytest.fixture(params=[10, 50])
+def page_size(request, monkeypatch):
+    monkeypatch.setattr(paginator, 'NUMBER_OF_POSTS_PER_PAGE', request.param)
+    cache.clear()
+    return request.param
+
+
+@pytest.fixture
+def many_posts(mixer, user, another_user, group):
+    mixer.blend('posts.Follow', user=user, author=another_user)
+    mixer.cycle(60).blend(
+        'posts.Post', author=another_user, group=group, image=''
+    )
+
+
+@pytest.fixture
+def post_without_image(mixer, user):
+    return mixer.blend('posts.Post', author=user, image='')
+
+
+class TestQueryBudget:
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('url_name, kwargs, queries', [
+        ('posts:index', {}, 5),
+        ('posts:group_list', {'slug': 'test-link'}, 6),
+        ('posts:profile', {'username': 'AnotherUser'}, 7),
+        # при пустом кеше лента подписок читает граф подписок
+        ('posts:follow_index', {}, 6),
+    ])
+    def test_list_pages_fit_budget(self, user_client, many_posts, page_size,
+                                   query_budget, url_name, kwargs, queries):
+        url = reverse(url_name, kwargs=kwargs)
+        with query_budget(queries=queries, time=1.0):
+            response = user_client.get(url)
+        assert len(response.context['page_obj']) == page_size
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.query_budget(queries=5, time=1.0)
+    def test_marked_test_fits_budget(self, user_client, post_without_image):
+        user_client.get(reverse(
+            'posts:post_detail', args=(post_without_image.pk,)
+        ))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_exceeded_budget_shows_sql(self, user_client, post_without_image,
+                                       query_budget):
+        url = reverse('posts:post_detail', args=(post_without_image.pk,))
+        with pytest.raises(QueryBudgetExceeded, match='posts_post'):
+            with query_budget(queries=1):
+                user_client.get(url)
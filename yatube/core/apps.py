@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        if settings.METRICS_ENABLED:
+            from .metrics import instrument_templates
+            instrument_templates()
@@ -0,0 +1,325 @@
+"""Бэкенды кеша с учётом попаданий в метриках запроса.
+
+TwoTierCache держит перед общим кешем (memcached, Redis) небольшой
+кеш процесса: LRU, ограниченный суммарным размером значений в байтах,
+с коротким сроком жизни копий. Запись идёт в общий кеш и в кеш
+процесса, удаление — из обоих. Чтобы копии в других процессах не жили до
+истечения срока, изменения данных (posts.signals) вызывают
+broadcast_invalidation: она меняет метку версии в общем кеше, и каждый
+процесс, заметив новую метку, очищает свой кеш. Метка читается не чаще
+раза в STAMP_INTERVAL секунд.
+
+Блокировки и другие короткие ключи согласования процессов копировать
+нельзя: копия снятой блокировки жила бы ещё LOCAL_TIMEOUT секунд. Их
+читают и пишут через shared_cache(), минуя кеш процесса.
+"""
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.functional import cached_property
+
+from .metrics import record_cache, record_local_cache
+
+_MISSING = object()
+STAMP_KEY = 'core:two-tier:stamp'
+
+
+class MetricsCacheMixin:
+    """Считает попадания и промахи кеша в метриках текущего запроса"""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            record_cache(0, 1)
+            return default
+        record_cache(1, 0)
+        return value
+
+    def get_many(self, keys, version=None):
+        # не через BaseCache.get_many: он читает ключи через self.get, и
+        # каждый ключ посчитался бы дважды
+        keys = list(keys)
+        found = {}
+        for key in keys:
+            value = super().get(key, _MISSING, version)
+            if value is not _MISSING:
+                found[key] = value
+        record_cache(len(found), len(keys) - len(found))
+        return found
+
+
+class InstrumentedLocMemCache(MetricsCacheMixin, LocMemCache):
+    pass
+
+
+# кеши процесса по LOCATION, как _caches у LocMemCache: Django создаёт
+# экземпляр бэкенда на каждый поток, а копии должны быть общими
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class LocalTier:
+    """Копии значений и счётчики одного TwoTierCache, общие для всех
+    потоков процесса"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # ключ -> (срок, размер, значение в pickle)
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.stamp = None
+        self.next_stamp_check = 0
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def count(self, local_hits=0, shared_hits=0, misses=0):
+        with self.lock:
+            self.local_hits += local_hits
+            self.shared_hits += shared_hits
+            self.misses += misses
+
+
+class TwoTierCache(BaseCache):
+    """Кеш процесса перед общим кешем.
+
+    OPTIONS: SHARED — псевдоним общего кеша в CACHES, LOCAL_MAX_BYTES —
+    сколько байт значений держит процесс, LOCAL_TIMEOUT — сколько
+    секунд живёт копия, STAMP_INTERVAL — как часто проверяется метка.
+    Ключи, версии и сроки передаются общему кешу как есть. Бэкенды с
+    одинаковым LOCATION делят один кеш процесса.
+    """
+
+    def __init__(self, location, params):
+        options = params.get('OPTIONS', {})
+        super().__init__(params)
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.max_bytes = options.get('LOCAL_MAX_BYTES', 16 * 1024 * 1024)
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.stamp_interval = options.get('STAMP_INTERVAL', 1)
+        with _tiers_lock:
+            self.tier = _tiers.setdefault(location, LocalTier())
+
+    @cached_property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    @cached_property
+    def shared_counts_itself(self):
+        # memcached и Redis попаданий не считают, их считает
+        # TwoTierCache; общий кеш с MetricsCacheMixin считает их сам
+        return isinstance(self.shared, MetricsCacheMixin)
+
+    def record_shared(self, hits, misses):
+        self.tier.count(shared_hits=hits, misses=misses)
+        if not self.shared_counts_itself:
+            record_cache(hits, misses)
+
+    def local_key(self, key, version=None):
+        return self.shared.make_key(key, version=version)
+
+    def check_stamp(self):
+        tier = self.tier
+        now = time.monotonic()
+        if now < tier.next_stamp_check:
+            return
+        tier.next_stamp_check = now + self.stamp_interval
+        stamp = self.shared.get(STAMP_KEY)
+        if stamp != tier.stamp:
+            tier.stamp = stamp
+            self.clear_local()
+
+    def get_local(self, key):
+        tier = self.tier
+        with tier.lock:
+            entry = tier.entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires, size, data = entry
+            if expires <= time.monotonic():
+                del tier.entries[key]
+                tier.bytes -= size
+                return _MISSING
+            tier.entries.move_to_end(key)
+        return pickle.loads(data)
+
+    def local_timeout_for(self, timeout):
+        # копия не должна пережить запись в общем кеше
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.shared.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def set_local(self, key, value, timeout=None):
+        if timeout is None:
+            timeout = self.local_timeout
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        size = len(data) + len(key)
+        if timeout <= 0 or size > self.max_bytes:
+            self.drop_local([key])
+            return
+        tier = self.tier
+        with tier.lock:
+            old = tier.entries.pop(key, None)
+            if old is not None:
+                tier.bytes -= old[1]
+            tier.entries[key] = (time.monotonic() + timeout, size, data)
+            tier.bytes += size
+            while tier.bytes > self.max_bytes:
+                _, (_, evicted, _) = tier.entries.popitem(last=False)
+                tier.bytes -= evicted
+
+    def drop_local(self, keys):
+        tier = self.tier
+        with tier.lock:
+            for key in keys:
+                entry = tier.entries.pop(key, None)
+                if entry is not None:
+                    tier.bytes -= entry[1]
+
+    def clear_local(self):
+        tier = self.tier
+        with tier.lock:
+            tier.entries.clear()
+            tier.bytes = 0
+
+    def bump_stamp(self):
+        """Просит все процессы очистить свои копии"""
+        self.tier.stamp = uuid.uuid4().hex
+        self.shared.set(STAMP_KEY, self.tier.stamp, None)
+        self.clear_local()
+
+    def stats(self):
+        tier = self.tier
+        with tier.lock:
+            return {
+                'local_hits': tier.local_hits,
+                'shared_hits': tier.shared_hits,
+                'misses': tier.misses,
+                'local_bytes': tier.bytes,
+                'local_keys': len(tier.entries),
+            }
+
+    def get(self, key, default=None, version=None):
+        self.check_stamp()
+        local_key = self.local_key(key, version)
+        value = self.get_local(local_key)
+        if value is not _MISSING:
+            self.tier.count(local_hits=1)
+            record_cache(1, 0)
+            record_local_cache(1)
+            return value
+        value = self.shared.get(key, _MISSING, version)
+        if value is _MISSING:
+            self.record_shared(0, 1)
+            return default
+        self.record_shared(1, 0)
+        self.set_local(local_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        self.check_stamp()
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.get_local(self.local_key(key, version))
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        self.tier.count(local_hits=len(found))
+        record_cache(len(found), 0)
+        record_local_cache(len(found))
+        if missing:
+            shared = self.shared.get_many(missing, version)
+            self.record_shared(len(shared), len(missing) - len(shared))
+            for key, value in shared.items():
+                self.set_local(self.local_key(key, version), value)
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version)
+        self.set_local(
+            self.local_key(key, version), value,
+            self.local_timeout_for(timeout),
+        )
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version)
+        local_timeout = self.local_timeout_for(timeout)
+        for key, value in data.items():
+            self.set_local(
+                self.local_key(key, version), value, local_timeout
+            )
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # блокировки и «кто первый» решает только общий кеш
+        added = self.shared.add(key, value, timeout, version)
+        if added:
+            self.drop_local([self.local_key(key, version)])
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self.drop_local([self.local_key(key, version)])
+        return self.shared.delete(key, version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.drop_local([self.local_key(key, version) for key in keys])
+        self.shared.delete_many(keys, version)
+
+    def has_key(self, key, version=None):
+        return self.shared.has_key(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        self.drop_local([self.local_key(key, version)])
+        return self.shared.incr(key, delta, version)
+
+    def decr(self, key, delta=1, version=None):
+        self.drop_local([self.local_key(key, version)])
+        return self.shared.decr(key, delta, version)
+
+    def clear(self):
+        self.clear_local()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+
+def broadcast_invalidation(alias='default'):
+    """Сбрасывает копии кеша во всех процессах, если кеш двухуровневый"""
+    backend = caches[alias]
+    if isinstance(backend, TwoTierCache):
+        backend.bump_stamp()
+
+
+def shared_cache(alias='default'):
+    """Кеш для блокировок и ключей согласования процессов: у
+    двухуровневого кеша — общий, без копий процесса"""
+    backend = caches[alias]
+    if isinstance(backend, TwoTierCache):
+        return backend.shared
+    return backend
+
+
+def is_process_local(alias='default'):
+    """Кеш виден только текущему процессу: записанное в нём не увидят
+    другие процессы сервера"""
+    backend = caches[alias]
+    if isinstance(backend, TwoTierCache):
+        backend = backend.shared
+    return isinstance(backend, (LocMemCache, DummyCache))
@@ -0,0 +1,30 @@
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Удаляет истёкшие сессии из базы порциями'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько сессий удалять одним запросом',
+        )
+
+    def handle(self, *args, **options):
+        # порции по первичному ключу не держат блокировку всей таблицы
+        # так долго, как один большой DELETE
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now)
+        deleted = 0
+        while True:
+            keys = list(expired.values_list('pk', flat=True)[
+                :options['batch_size']
+            ])
+            if not keys:
+                break
+            Session.objects.filter(pk__in=keys).delete()
+            deleted += len(keys)
+        if options['verbosity'] > 0:
+            self.stdout.write(f'Удалено сессий: {deleted}')
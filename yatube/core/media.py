@@ -0,0 +1,146 @@
+"""Отдача загруженных файлов из MEDIA_ROOT в продакшене.
+
+Если перед приложением стоит nginx или Apache, MEDIA_ACCEL передаёт
+им отдачу файла заголовком X-Accel-Redirect или X-Sendfile, и Python
+не читает файл вовсе. Иначе файл отдаётся FileResponse: WSGI-сервер с
+wsgi.file_wrapper (gunicorn) передаёт его через os.sendfile без
+копирования в память процесса, в том числе для запросов Range — для
+них файл заранее сдвигается на начало диапазона и обрезается по длине.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """Файл, читаемый с позиции start не дальше length байт.
+
+    fileno() отдаёт дескриптор исходного файла: gunicorn шлёт его через
+    sendfile от текущей позиции на длину из Content-Length, а серверы
+    без sendfile читают через read() и не выходят за диапазон.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """(start, end) включительно, None для заголовка, который не
+    разбирается (отдаётся весь файл), или ValueError для диапазона за
+    пределами файла"""
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # bytes=-500: последние 500 байт
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def file_etag(stat):
+    return quote_etag(f'{stat.st_size:x}-{stat.st_mtime_ns:x}')
+
+
+def accel_response(path, name):
+    response = HttpResponse()
+    if settings.MEDIA_ACCEL == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_PREFIX + quote(name)
+        )
+    else:
+        response['X-Sendfile'] = path
+    # тип и длину выставит прокси по самому файлу
+    del response['Content-Type']
+    return response
+
+
+def serve(request, name):
+    try:
+        path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404
+    if not os.path.isfile(path):
+        raise Http404
+    etag = file_etag(stat)
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        return response
+    if settings.MEDIA_ACCEL:
+        response = accel_response(path, name)
+    else:
+        response = file_response(request, path, stat.st_size, etag)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = f'public, max-age={settings.MEDIA_MAX_AGE}'
+    return response
+
+
+def file_response(request, path, size, etag):
+    content_type, encoding = mimetypes.guess_type(path)
+    content_type = content_type or 'application/octet-stream'
+    header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    byte_range = None
+    if header and (if_range is None or if_range == etag):
+        try:
+            byte_range = parse_range(header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            RangeFile(file, start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = length
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,310 @@
+"""Метрики запросов по именам URL в текстовом формате Prometheus.
+
+Счётчики текущего запроса лежат в threading.local: их заполняют
+обёртка выполнения SQL, кеш и рендеринг шаблонов, а MetricsMiddleware
+в конце запроса переносит их в общий реестр.
+
+Время шаблонов учитывается и по каждому шаблону отдельно: вызовы
+Template.render (страница и её {% include %}) и ExtendsNode.render
+(родительский шаблон). «Собственное» время шаблона — без вложенных в
+него шаблонов; блоки дочернего шаблона рендерятся внутри родителя и
+попадают в его собственное время.
+
+Реестр живёт в памяти процесса: /metrics отдаёт счётчики того процесса
+сервера, который ответил на запрос. Поэтому у каждой серии есть метка
+pid — с несколькими процессами (gunicorn --workers) Prometheus видит
+отдельные серии каждого процесса, а не одну, скачущую между ними, и
+суммирует их запросом sum without (pid) (...). Процесс, который ни разу
+не ответил на /metrics, в выборку не попадает; для полного охвата нужен
+сбор с каждого процесса или общий для процессов реестр.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from django.db import connections
+from django.template import base, loader_tags
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+UNRESOLVED_VIEW = '<unresolved>'
+UNNAMED_TEMPLATE = '<string>'
+
+_local = threading.local()
+
+
+class RequestStats:
+    __slots__ = (
+        'queries', 'query_time', 'cache_hits', 'cache_misses',
+        'local_cache_hits', 'template_time', 'template_stack', 'templates',
+    )
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.local_cache_hits = 0
+        self.template_time = 0.0
+        # время вложенных шаблонов для каждого рендерящегося сейчас шаблона
+        self.template_stack = []
+        # имя шаблона -> [число рендеров, полное время, собственное время]
+        self.templates = {}
+
+    def add_template(self, name, elapsed, nested):
+        entry = self.templates.get(name)
+        if entry is None:
+            entry = self.templates[name] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] += elapsed - nested
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_time += time.perf_counter() - start
+
+
+def current_stats():
+    """Счётчики текущего запроса или None вне MetricsMiddleware"""
+    return getattr(_local, 'stats', None)
+
+
+def record_cache(hits, misses):
+    stats = current_stats()
+    if stats is not None:
+        stats.cache_hits += hits
+        stats.cache_misses += misses
+
+
+def record_local_cache(hits):
+    # попадания в кеш процесса уже посчитаны в cache_hits
+    stats = current_stats()
+    if stats is not None:
+        stats.local_cache_hits += hits
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class ViewMetrics:
+    __slots__ = (
+        'latency', 'template_time', 'queries', 'query_time',
+        'cache_hits', 'cache_misses', 'local_cache_hits',
+    )
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.template_time = Histogram()
+        self.queries = 0
+        self.query_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.local_cache_hits = 0
+
+
+class TemplateMetrics:
+    __slots__ = ('renders', 'time', 'self_time')
+
+    def __init__(self):
+        self.renders = 0
+        self.time = 0.0
+        self.self_time = 0.0
+
+
+COUNTERS = (
+    ('yatube_db_queries_total', 'queries', 'SQL-запросы'),
+    ('yatube_db_query_seconds_total', 'query_time', 'Время SQL-запросов'),
+    ('yatube_cache_hits_total', 'cache_hits', 'Попадания в кеш'),
+    ('yatube_cache_misses_total', 'cache_misses', 'Промахи кеша'),
+    (
+        'yatube_local_cache_hits_total',
+        'local_cache_hits',
+        'Попадания в кеш процесса (входят в попадания в кеш)',
+    ),
+)
+HISTOGRAMS = (
+    ('yatube_request_seconds', 'latency', 'Время обработки запроса'),
+    (
+        'yatube_template_render_seconds',
+        'template_time',
+        'Время рендеринга шаблонов',
+    ),
+)
+TEMPLATE_COUNTERS = (
+    ('yatube_template_renders_total', 'renders', 'Рендеры шаблона'),
+    ('yatube_template_seconds_total', 'time', 'Время шаблона с вложенными'),
+    (
+        'yatube_template_self_seconds_total',
+        'self_time',
+        'Время шаблона без вложенных',
+    ),
+)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self._templates = {}
+
+    def observe(self, view_name, latency, stats):
+        with self._lock:
+            metrics = self._views.get(view_name)
+            if metrics is None:
+                metrics = self._views[view_name] = ViewMetrics()
+            metrics.latency.observe(latency)
+            metrics.template_time.observe(stats.template_time)
+            metrics.queries += stats.queries
+            metrics.query_time += stats.query_time
+            metrics.cache_hits += stats.cache_hits
+            metrics.cache_misses += stats.cache_misses
+            metrics.local_cache_hits += stats.local_cache_hits
+            for name, (renders, total, own) in stats.templates.items():
+                template = self._templates.get(name)
+                if template is None:
+                    template = self._templates[name] = TemplateMetrics()
+                template.renders += renders
+                template.time += total
+                template.self_time += own
+
+    def clear(self):
+        with self._lock:
+            self._views.clear()
+            self._templates.clear()
+
+    def render(self):
+        lines = []
+        process = f'pid="{os.getpid()}"'
+        with self._lock:
+            views = sorted(self._views.items())
+            for name, attr, help_text in HISTOGRAMS:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for view_name, metrics in views:
+                    lines.extend(getattr(metrics, attr).samples(
+                        name, f'view="{view_name}",{process}'
+                    ))
+            for name, attr, help_text in COUNTERS:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for view_name, metrics in views:
+                    value = getattr(metrics, attr)
+                    lines.append(
+                        f'{name}{{view="{view_name}",{process}}} {value}'
+                    )
+            templates = sorted(self._templates.items())
+            for name, attr, help_text in TEMPLATE_COUNTERS:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for template_name, metrics in templates:
+                    value = getattr(metrics, attr)
+                    lines.append(
+                        f'{name}{{template="{template_name}",{process}}} '
+                        f'{value}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class measure_request:
+    """Собирает счётчики запроса на время выполнения блока"""
+
+    def __enter__(self):
+        self.stats = _local.stats = RequestStats()
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(
+                connection.execute_wrapper(self.stats.db_wrapper)
+            )
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self.start
+        self._stack.close()
+        _local.stats = None
+
+
+def _timed(render, template_name):
+    def timed_render(self, context):
+        stats = current_stats()
+        if stats is None:
+            return render(self, context)
+        stack = stats.template_stack
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            else:
+                stats.template_time += elapsed
+            stats.add_template(template_name(self, context), elapsed, nested)
+    timed_render.metrics_instrumented = True
+    return timed_render
+
+
+def _template_name(template, context):
+    return template.origin.template_name or template.name or UNNAMED_TEMPLATE
+
+
+def _parent_name(node, context):
+    # имя родителя из {% extends "base.html" %}: для строковой константы
+    # это просто значение, шаблон повторно не ищется
+    parent = node.parent_name.resolve(context)
+    if isinstance(parent, str):
+        return parent
+    return _template_name(getattr(parent, 'template', parent), context)
+
+
+def instrument_templates():
+    """Подключает учёт времени рендеринга к шаблонам Django"""
+    if not getattr(base.Template.render, 'metrics_instrumented', False):
+        base.Template.render = _timed(base.Template.render, _template_name)
+    extends = loader_tags.ExtendsNode
+    if not getattr(extends.render, 'metrics_instrumented', False):
+        extends.render = _timed(extends.render, _parent_name)
+
+
+def server_timing(stats):
+    """Заголовок Server-Timing с собственным временем каждого шаблона"""
+    entries = sorted(
+        stats.templates.items(), key=lambda item: item[1][2], reverse=True
+    )
+    return ', '.join(
+        f'tpl{number};desc="{name} x{renders}";dur={own * 1000:.3f}'
+        for number, (name, (renders, total, own)) in enumerate(entries)
+    )
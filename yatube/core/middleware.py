@@ -0,0 +1,108 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics, profiling, slow_queries, staticfiles, surrogate
+
+
+class MetricsMiddleware:
+    """Записывает метрики каждого запроса под именем его URL"""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with metrics.measure_request() as measured:
+            response = self.get_response(request)
+        match = request.resolver_match
+        view_name = match.view_name if match else metrics.UNRESOLVED_VIEW
+        metrics.registry.observe(view_name, measured.elapsed, measured.stats)
+        if settings.TEMPLATE_TIMINGS_HEADER and measured.stats.templates:
+            response['Server-Timing'] = metrics.server_timing(measured.stats)
+        return response
+
+
+class ProfilerMiddleware:
+    """Профилирует запрос под cProfile, если об этом попросили.
+
+    Ставится после AuthenticationMiddleware: сотрудникам достаточно
+    заголовка X-Profile или параметра _profile. Без этих признаков
+    стоимость — проверка трёх ключей в словарях.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if profiling.is_requested(request) and profiling.is_allowed(request):
+            return profiling.run_profiled(request, self.get_response)
+        return self.get_response(request)
+
+
+class SlowQueryMiddleware:
+    """Пишет в журнал медленные запросы к базе вместе с представлением"""
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_LOG_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        slow_queries.start_request()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(slow_queries.slow_query_wrapper)
+                )
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        slow_queries.set_view(request.resolver_match.view_name)
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную collectstatic статику без обращения к URLconf.
+
+    Индекс файлов строится при запуске: после collectstatic процесс
+    нужно перезапустить.
+    """
+
+    def __init__(self, get_response):
+        if not settings.STATIC_SERVE_ENABLED or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.files = staticfiles.build_index(
+            settings.STATIC_ROOT,
+            settings.STATIC_URL,
+            settings.STATIC_MEMORY_MAX_SIZE,
+        )
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD'):
+            static_file = self.files.get(request.path_info)
+            if static_file is not None:
+                return staticfiles.serve(request, static_file)
+        return self.get_response(request)
+
+
+class SurrogateCacheMiddleware:
+    """Разрешает прокси кешировать помеченные ключами страницы анонимов.
+
+    Стоит до SessionMiddleware и CsrfViewMiddleware, чтобы видеть
+    выставленные ими cookie: такие ответы в общий кеш не попадают.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SURROGATE_CACHE_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return surrogate.patch_response(request, response)
@@ -0,0 +1,94 @@
+"""Кеш страниц с отдачей устаревшей копии (stale-while-revalidate).
+
+В отличие от cache_page, у записи два срока. До мягкого страница
+считается свежей. После него и до жёсткого копия ещё отдаётся, но
+первый запрос, взявший блокировку в кеше, пересобирает страницу сам,
+а все параллельные запросы получают устаревшую копию и не ждут. Так
+истечение записи стоит одной пересборки, а не одновременной
+пересборки во всех процессах. После жёсткого срока запись удаляется,
+и страница собирается, как при первом запросе.
+
+Ключи строятся так же, как у cache_page: с учётом хоста, языка и
+заголовков Vary ответа (Cookie для страниц, читающих сессию).
+"""
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils.cache import (
+    get_cache_key, has_vary_header, learn_cache_key, patch_response_headers,
+)
+
+from .cache import shared_cache
+
+KEY_PREFIX = 'swr'
+REFRESH_LOCK_KEY = '{key}:refresh'
+CACHEABLE_METHODS = ('GET', 'HEAD')
+
+
+def should_cache(request, response):
+    if response.streaming or response.status_code != 200:
+        return False
+    if 'private' in response.get('Cache-Control', ()):
+        return False
+    # ответ ставит cookie посетителю без cookie: копию с ней отдали бы
+    # всем следующим
+    return not (
+        not request.COOKIES
+        and response.cookies
+        and has_vary_header(response, 'Cookie')
+    )
+
+
+def store(request, response, soft_timeout, hard_timeout):
+    if not should_cache(request, response):
+        return
+    patch_response_headers(response, soft_timeout)
+    key = learn_cache_key(
+        request, response, hard_timeout, KEY_PREFIX, cache=cache
+    )
+    entry = (response, time.time() + soft_timeout)
+    if hasattr(response, 'render') and callable(response.render):
+        response.add_post_render_callback(
+            lambda rendered: cache.set(key, entry, hard_timeout)
+        )
+    else:
+        cache.set(key, entry, hard_timeout)
+
+
+def swr_cache_page(soft_timeout, hard_timeout, lock_timeout=10):
+    """Кеширует ответ представления: soft_timeout секунд он свежий,
+    до hard_timeout отдаётся устаревшим, пока его пересобирает один
+    запрос. Блокировка пересборки живёт не дольше lock_timeout, если
+    пересобиравший запрос упал"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in CACHEABLE_METHODS:
+                return view(request, *args, **kwargs)
+            key = get_cache_key(request, KEY_PREFIX, 'GET', cache=cache)
+            entry = cache.get(key) if key is not None else None
+            if entry is not None:
+                response, fresh_until = entry
+                if time.time() < fresh_until:
+                    return response
+                lock_key = REFRESH_LOCK_KEY.format(key=key)
+                shared = shared_cache()
+                if not shared.add(lock_key, 1, lock_timeout):
+                    return response
+                try:
+                    # страницу могли пересобрать, пока этот запрос читал
+                    # старую копию, в том числе другой процесс
+                    entry = shared.get(key)
+                    if entry is not None and time.time() < entry[1]:
+                        return entry[0]
+                    response = view(request, *args, **kwargs)
+                    store(request, response, soft_timeout, hard_timeout)
+                finally:
+                    shared.delete(lock_key)
+                return response
+            response = view(request, *args, **kwargs)
+            store(request, response, soft_timeout, hard_timeout)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,125 @@
+"""Профилирование отдельных запросов по требованию.
+
+Запрос профилируется, если у него есть заголовок X-Profile (или параметр
+_profile) и пользователь — сотрудник, либо если передан подписанный
+заголовок X-Profile-Token. Результат cProfile сохраняется в
+PROFILER_ROOT под идентификатором запроса и открывается в админке или
+в snakeviz/flameprof.
+"""
+import cProfile
+import json
+import os
+import re
+import time
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+TOKEN_SALT = 'core.profiling'
+TOKEN_VALUE = 'profile'
+PROFILE_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+def make_token():
+    """Подписанный токен для заголовка X-Profile-Token"""
+    return signing.dumps(TOKEN_VALUE, salt=TOKEN_SALT)
+
+
+def has_valid_token(request):
+    token = request.META.get('HTTP_X_PROFILE_TOKEN')
+    if not token:
+        return False
+    try:
+        value = signing.loads(
+            token, salt=TOKEN_SALT, max_age=settings.PROFILER_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return value == TOKEN_VALUE
+
+
+def is_requested(request):
+    """Дешёвая проверка: просил ли запрос профилирования вообще"""
+    return (
+        'HTTP_X_PROFILE' in request.META
+        or 'HTTP_X_PROFILE_TOKEN' in request.META
+        or '_profile' in request.GET
+    )
+
+
+def is_allowed(request):
+    if has_valid_token(request):
+        return True
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_active and user.is_staff
+
+
+def profile_path(profile_id, extension):
+    if not PROFILE_ID_RE.match(profile_id):
+        raise ValueError(f'Некорректный идентификатор профиля: {profile_id}')
+    return os.path.join(settings.PROFILER_ROOT, f'{profile_id}.{extension}')
+
+
+def run_profiled(request, get_response):
+    """Выполняет запрос под cProfile и сохраняет результат"""
+    profile_id = uuid.uuid4().hex
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        response = get_response(request)
+    finally:
+        profiler.disable()
+    duration = time.perf_counter() - start
+    os.makedirs(settings.PROFILER_ROOT, exist_ok=True)
+    profiler.dump_stats(profile_path(profile_id, 'prof'))
+    match = request.resolver_match
+    meta = {
+        'id': profile_id,
+        'created': timezone.now().isoformat(timespec='seconds'),
+        # created с точностью до секунды не упорядочивает профили
+        'timestamp': time.time(),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'view': match.view_name if match else None,
+        'status': response.status_code,
+        'duration': duration,
+    }
+    with open(profile_path(profile_id, 'json'), 'w') as file:
+        json.dump(meta, file)
+    prune_profiles(keep=profile_id)
+    response['X-Profile-Id'] = profile_id
+    return response
+
+
+def recent_profiles():
+    """Описания сохранённых профилей, новые первыми"""
+    profiles = []
+    try:
+        names = os.listdir(settings.PROFILER_ROOT)
+    except FileNotFoundError:
+        return profiles
+    for name in names:
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(settings.PROFILER_ROOT, name)) as file:
+                profiles.append(json.load(file))
+        except (OSError, ValueError):
+            continue
+    profiles.sort(key=lambda meta: meta.get('timestamp', 0), reverse=True)
+    return profiles
+
+
+def prune_profiles(keep=None):
+    """Удаляет профили сверх PROFILER_KEEP, кроме профиля keep"""
+    for meta in recent_profiles()[settings.PROFILER_KEEP:]:
+        if meta['id'] == keep:
+            continue
+        for extension in ('prof', 'json'):
+            try:
+                os.remove(profile_path(meta['id'], extension))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,62 @@
+"""Плагин pytest с бюджетом запросов.
+
+Тест с меткой целиком выполняется в бюджете:
+
+    @pytest.mark.query_budget(queries=4, time=0.5)
+    def test_index(client): ...
+
+Фикстура query_budget даёт контекстный менеджер для отдельного блока,
+параметры по умолчанию берутся из метки:
+
+    def test_index(client, query_budget):
+        with query_budget(queries=4):
+            client.get('/')
+"""
+import pytest
+
+from .query_budget import QueryBudget
+
+
+def _budget_kwargs(marker):
+    kwargs = dict(marker.kwargs) if marker else {}
+    return {
+        'max_queries': kwargs.get('queries'),
+        'max_time': kwargs.get('time'),
+    }
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'query_budget(queries=None, time=None): не больше queries '
+        'SQL-запросов и time секунд на тест'
+    )
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker('query_budget')
+    if marker is None or 'query_budget' in item.fixturenames:
+        yield
+        return
+    budget = QueryBudget(label=item.nodeid, **_budget_kwargs(marker))
+    budget.start()
+    outcome = yield
+    budget.stop()
+    if outcome.excinfo is None:
+        budget.check()
+
+
+@pytest.fixture
+def query_budget(request):
+    defaults = _budget_kwargs(request.node.get_closest_marker('query_budget'))
+
+    def make_budget(queries=None, time=None, label=''):
+        kwargs = dict(defaults)
+        if queries is not None:
+            kwargs['max_queries'] = queries
+        if time is not None:
+            kwargs['max_time'] = time
+        return QueryBudget(label=label or request.node.nodeid, **kwargs)
+
+    return make_budget
@@ -0,0 +1,86 @@
+"""Бюджет SQL-запросов и времени для тестов представлений.
+
+Работает и в unittest (QueryBudgetMixin), и в pytest
+(core.pytest_plugin): при превышении тест падает со списком
+выполненных запросов.
+"""
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryBudget:
+    """Контекстный менеджер: не больше max_queries запросов к базе и
+    не дольше max_time секунд внутри блока"""
+
+    def __init__(self, max_queries=None, max_time=None, label=''):
+        self.max_queries = max_queries
+        self.max_time = max_time
+        self.label = label
+        self.queries = []
+        self.elapsed = None
+
+    def _capture(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    def start(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(
+                connection.execute_wrapper(self._capture)
+            )
+        self._start = time.perf_counter()
+
+    def stop(self):
+        self.elapsed = time.perf_counter() - self._start
+        self._stack.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        if exc_type is None:
+            self.check()
+
+    def problems(self):
+        problems = []
+        queries = len(self.queries)
+        if self.max_queries is not None and queries > self.max_queries:
+            problems.append(
+                f'{queries} запросов при бюджете {self.max_queries}'
+            )
+        if self.max_time is not None and self.elapsed > self.max_time:
+            problems.append(
+                f'{self.elapsed:.3f} с при бюджете {self.max_time:.3f} с'
+            )
+        return problems
+
+    def check(self):
+        problems = self.problems()
+        if not problems:
+            return
+        title = self.label or 'Бюджет'
+        lines = [f'{title} превышен: ' + '; '.join(problems)]
+        lines.extend(
+            f'{number}. [{duration * 1000:.2f} мс] {sql}'
+            for number, (sql, duration) in enumerate(self.queries, start=1)
+        )
+        raise QueryBudgetExceeded('\n'.join(lines))
+
+
+class QueryBudgetMixin:
+    """Для django.test.TestCase: with self.assertQueryBudget(5): ..."""
+
+    def assertQueryBudget(self, max_queries=None, max_time=None, label=''):
+        return QueryBudget(max_queries, max_time, label)
@@ -0,0 +1,87 @@
+"""Сессии: чтение из кеша, запись в базу только при изменениях.
+
+Подключается настройкой SESSION_ENGINE = 'core.sessions'. В отличие от
+django.contrib.sessions.backends.cached_db, сохранение сессии с теми же
+данными (например, только ради продления срока) обновляет запись в
+кеше, а в базу попадает не чаще раза в SESSION_DB_WRITE_INTERVAL
+секунд. Изменённые данные пишутся в базу сразу, чтобы вход и выход не
+терялись при вытеснении из кеша.
+
+Сессии читаются из общего кеша (core.cache.shared_cache): копия в кеше
+процесса оставила бы вышедшего пользователя вошедшим в других
+процессах, пока она не истечёт.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import (
+    SessionStore as CachedDBStore,
+)
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+
+from .cache import shared_cache
+
+KEY_PREFIX = 'core.sessions'
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._cache = shared_cache(settings.SESSION_CACHE_ALIAS)
+        # отпечаток данных и время последней записи в базу
+        self._synced_digest = None
+        self._synced_at = 0.0
+
+    def _digest(self, data):
+        return hashlib.md5(self.serializer().dumps(data)).hexdigest()
+
+    def _cache_entry(self, data):
+        return {
+            'data': data,
+            'digest': self._synced_digest,
+            'synced_at': self._synced_at,
+        }
+
+    def load(self):
+        try:
+            entry = self._cache.get(self.cache_key)
+        except Exception:
+            # как в cached_db: некорректный ключ сбрасывает сессию
+            entry = None
+        if entry is not None:
+            self._synced_digest = entry['digest']
+            self._synced_at = entry['synced_at']
+            return entry['data']
+        session = self._get_session_from_db()
+        if not session:
+            return {}
+        data = self.decode(session.session_data)
+        self._synced_digest = self._digest(data)
+        self._synced_at = time.time()
+        self._cache.set(
+            self.cache_key,
+            self._cache_entry(data),
+            self.get_expiry_age(expiry=session.expire_date),
+        )
+        return data
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        digest = self._digest(data)
+        now = time.time()
+        if (
+            must_create
+            or digest != self._synced_digest
+            or now - self._synced_at >= settings.SESSION_DB_WRITE_INTERVAL
+        ):
+            DBStore.save(self, must_create=must_create)
+            self._synced_digest = digest
+            self._synced_at = now
+        self._cache.set(
+            self.cache_key, self._cache_entry(data), self.get_expiry_age()
+        )
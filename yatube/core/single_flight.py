@@ -0,0 +1,143 @@
+"""Слияние одинаковых одновременных вычислений (single flight).
+
+Из одновременных запросов с одним ключом вычисляет результат только
+первый, остальные ждут его не дольше SINGLE_FLIGHT_TIMEOUT секунд.
+Внутри процесса потоки ждут ведущего на threading.Event, между
+процессами ведущий берёт блокировку в общем кеше и кладёт туда
+результат под ключом своей блокировки, а ведомые опрашивают этот ключ.
+Если ведущий упал, не уложился в срок или результат нельзя передать,
+ведомые вычисляют его сами.
+
+Результат передаётся байтами, чтобы каждый получатель работал со своей
+копией: ответ, отданный нескольким потокам, меняли бы их middleware.
+"""
+import hashlib
+import pickle
+import threading
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.utils.translation import get_language
+
+from .cache import shared_cache
+
+FLIGHT_KEY = 'single-flight:{digest}'
+LOCK_KEY = '{key}:lock'
+RESULT_KEY = '{key}:{token}'
+POLL_INTERVAL = 0.01
+# ведущий вычислил результат, но передать его нельзя
+NOT_SHARED = b''
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = False
+        self.payload = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flights = {}
+
+    def do(self, key, compute, timeout):
+        """Байты результата compute для ключа key, вычисленные этим или
+        одновременным с ним вызовом; None — результат не передаётся"""
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight()
+        if not leader:
+            if flight.done.wait(timeout) and flight.ok:
+                return flight.payload
+            return compute()
+        try:
+            flight.payload = self.lead(key, compute, timeout)
+            flight.ok = True
+            return flight.payload
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+
+    def lead(self, key, compute, timeout):
+        lock_key = LOCK_KEY.format(key=key)
+        token = uuid.uuid4().hex
+        shared = shared_cache()
+        if shared.add(lock_key, token, timeout):
+            try:
+                payload = compute()
+                shared.set(
+                    RESULT_KEY.format(key=key, token=token),
+                    NOT_SHARED if payload is None else payload,
+                    timeout,
+                )
+            finally:
+                if shared.get(lock_key) == token:
+                    shared.delete(lock_key)
+            return payload
+        payload = self.wait(key, shared.get(lock_key), timeout)
+        if payload is None or payload == NOT_SHARED:
+            return compute()
+        return payload
+
+    def wait(self, key, token, timeout):
+        """Результат вычисления другого процесса с блокировкой token"""
+        if token is None:
+            return None
+        lock_key = LOCK_KEY.format(key=key)
+        result_key = RESULT_KEY.format(key=key, token=token)
+        shared = shared_cache()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            payload = shared.get(result_key)
+            if payload is not None:
+                return payload
+            if shared.get(lock_key) != token:
+                # блокировку сняли: результат уже лежит или его не будет
+                return shared.get(result_key)
+            time.sleep(POLL_INTERVAL)
+        return None
+
+
+flights = SingleFlight()
+
+
+def page_key(request):
+    uri = f'{request.build_absolute_uri()}|{get_language()}'
+    return FLIGHT_KEY.format(digest=hashlib.md5(uri.encode()).hexdigest())
+
+
+def single_flight_page(view):
+    """Одновременные одинаковые GET-запросы анонимов получают копии
+    одного ответа представления. Потоковые ответы не передаются"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (
+            not settings.SINGLE_FLIGHT_ENABLED
+            or request.method != 'GET'
+            or request.user.is_authenticated
+        ):
+            return view(request, *args, **kwargs)
+        own = []
+
+        def compute():
+            response = view(request, *args, **kwargs)
+            own.append(response)
+            if response.streaming:
+                return None
+            return pickle.dumps(response, pickle.HIGHEST_PROTOCOL)
+
+        payload = flights.do(
+            page_key(request), compute, settings.SINGLE_FLIGHT_TIMEOUT
+        )
+        if own:
+            return own[0]
+        if payload is None:
+            return view(request, *args, **kwargs)
+        return pickle.loads(payload)
+    return wrapper
@@ -0,0 +1,161 @@
+"""Журнал медленных SQL-запросов.
+
+core.middleware.SlowQueryMiddleware на время запроса ставит обёртку
+execute_wrapper на все соединения. Запрос дольше SLOW_QUERY_THRESHOLD
+секунд пишется в лог вместе с представлением и строкой кода приложения,
+из которой он выполнен, а в журнале складывается по отпечатку — тексту SQL без
+параметров и с одинаковыми списками IN. Для каждого отпечатка один раз
+сохраняется план выполнения (EXPLAIN QUERY PLAN в SQLite).
+"""
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*%s\s*,?)+\)', re.IGNORECASE)
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+SPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Текст запроса без значений: по нему складываются похожие запросы"""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+def calling_frame():
+    """Ближайшая к запросу строка кода из SLOW_QUERY_APPS"""
+    apps = tuple(settings.SLOW_QUERY_APPS)
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module.split('.', 1)[0] in apps:
+            return f'{module}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+def explain(connection, sql, params):
+    """План выполнения запроса или None, если его не получить"""
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    prefix = connection.ops.explain_query_prefix()
+    _local.explaining = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            rows = cursor.fetchall()
+    except (DatabaseError, NotImplementedError):
+        return None
+    finally:
+        _local.explaining = False
+    return '\n'.join(' '.join(str(value) for value in row) for row in rows)
+
+
+class SlowQuery:
+    __slots__ = (
+        'fingerprint', 'sql', 'count', 'total', 'max', 'views', 'frames',
+        'plan',
+    )
+
+    def __init__(self, fingerprint, sql):
+        self.fingerprint = fingerprint
+        self.sql = sql
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.views = Counter()
+        self.frames = Counter()
+        self.plan = None
+
+    def top_views(self):
+        return self.views.most_common()
+
+    def top_frames(self):
+        return self.frames.most_common()
+
+
+class SlowQueryLog:
+    """Медленные запросы процесса, сложенные по отпечатку"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queries = {}
+
+    def record(self, sql, duration, view, frame):
+        """Добавляет запрос; True, если отпечаток встретился впервые"""
+        key = fingerprint(sql)
+        with self._lock:
+            entry = self._queries.get(key)
+            is_new = entry is None
+            if is_new:
+                entry = self._queries[key] = SlowQuery(key, sql)
+            entry.count += 1
+            entry.total += duration
+            entry.max = max(entry.max, duration)
+            entry.views[view] += 1
+            if frame:
+                entry.frames[frame] += 1
+        return entry if is_new else None
+
+    def top(self, limit=None):
+        """Записи журнала, самые затратные по суммарному времени первыми"""
+        with self._lock:
+            queries = sorted(
+                self._queries.values(),
+                key=lambda entry: entry.total,
+                reverse=True,
+            )
+        return queries[:limit]
+
+    def clear(self):
+        with self._lock:
+            self._queries.clear()
+
+
+log = SlowQueryLog()
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        if (
+            duration >= settings.SLOW_QUERY_THRESHOLD
+            and not getattr(_local, 'explaining', False)
+        ):
+            record_slow_query(sql, params, many, context, duration)
+
+
+def record_slow_query(sql, params, many, context, duration):
+    view = getattr(_local, 'view', None)
+    frame = calling_frame()
+    logger.warning(
+        'Медленный запрос %.1f мс в %s (%s): %s',
+        duration * 1000, view, frame, sql,
+    )
+    entry = log.record(sql, duration, view, frame)
+    if entry is not None and not many:
+        entry.plan = explain(context['connection'], sql, params)
+
+
+def start_request():
+    _local.view = None
+
+
+def set_view(view_name):
+    _local.view = view_name
@@ -0,0 +1,178 @@
+"""Статика с отпечатками в именах и заранее сжатыми копиями.
+
+CompressedManifestStaticFilesStorage при collectstatic, кроме имён с
+хешем содержимого, пишет рядом с текстовыми файлами .gz и, если
+установлен пакет brotli, .br. StaticFilesMiddleware при запуске
+индексирует STATIC_ROOT и отдаёт файлы сам: выбирает сжатую копию по
+Accept-Encoding, отвечает 304 на If-None-Match, а файлам с хешем в имени
+ставит Cache-Control на год с immutable. Небольшие файлы держатся в
+памяти, остальные отдаются через FileResponse (sendfile у сервера).
+"""
+import gzip
+import json
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+
+try:
+    import brotli
+except ImportError:
+    # brotli необязателен: без него пишутся и отдаются только .gz
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.ico', '.txt', '.html', '.json', '.xml', '.map',
+)
+MIN_COMPRESS_SIZE = 256
+# сжатые копии в порядке предпочтения
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def compress(content):
+    """Сжатые копии содержимого, которые действительно меньше его"""
+    variants = {'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(content)
+    return {
+        encoding: data for encoding, data in variants.items()
+        if len(data) < len(content)
+    }
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            yield name, hashed_name, processed
+            if not isinstance(processed, Exception):
+                names.update((name, hashed_name))
+        if dry_run:
+            return
+        for name in names:
+            if name:
+                self.write_compressed(name)
+
+    def write_compressed(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        path = self.path(name)
+        with open(path, 'rb') as file:
+            content = file.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        suffixes = dict(ENCODINGS)
+        for encoding, data in compress(content).items():
+            with open(path + suffixes[encoding], 'wb') as file:
+                file.write(data)
+
+
+class Variant:
+    """Одна из копий файла: исходная или сжатая"""
+    __slots__ = ('path', 'size', 'etag', 'content')
+
+    def __init__(self, path, etag, memory_limit):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.etag = etag
+        self.content = None
+        if self.size <= memory_limit:
+            with open(path, 'rb') as file:
+                self.content = file.read()
+
+
+class StaticFile:
+    __slots__ = ('content_type', 'cache_control', 'variants')
+
+    def __init__(self, path, immutable, memory_limit):
+        content_type, _ = mimetypes.guess_type(path)
+        self.content_type = content_type or 'application/octet-stream'
+        if immutable:
+            max_age = f'max-age={IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            max_age = f'max-age={settings.STATIC_MAX_AGE}'
+        self.cache_control = f'public, {max_age}'
+        stat = os.stat(path)
+        tag = f'{stat.st_size:x}-{int(stat.st_mtime):x}'
+        self.variants = {'identity': Variant(path, f'"{tag}"', memory_limit)}
+        for encoding, suffix in ENCODINGS:
+            if os.path.exists(path + suffix):
+                self.variants[encoding] = Variant(
+                    path + suffix, f'"{tag}-{encoding}"', memory_limit
+                )
+
+
+def hashed_names(root):
+    """Имена с хешем из манифеста ManifestStaticFilesStorage"""
+    try:
+        with open(os.path.join(root, 'staticfiles.json')) as file:
+            return set(json.load(file)['paths'].values())
+    except (OSError, ValueError, KeyError):
+        return set()
+
+
+def build_index(root, url_prefix, memory_limit):
+    """URL -> StaticFile для всех файлов STATIC_ROOT"""
+    immutable = hashed_names(root)
+    suffixes = tuple(suffix for _, suffix in ENCODINGS)
+    index = {}
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            if filename.endswith(suffixes):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            index[url_prefix + name] = StaticFile(
+                path, name in immutable, memory_limit
+            )
+    return index
+
+
+def accepted_encodings(header):
+    accepted = set()
+    for item in header.split(','):
+        encoding, _, params = item.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00'):
+            continue
+        accepted.add(encoding.strip().lower())
+    return accepted
+
+
+def choose_variant(static_file, accept_encoding):
+    accepted = accepted_encodings(accept_encoding)
+    for encoding, _ in ENCODINGS:
+        variant = static_file.variants.get(encoding)
+        if variant is not None and (encoding in accepted or '*' in accepted):
+            return encoding, variant
+    return 'identity', static_file.variants['identity']
+
+
+def serve(request, static_file):
+    encoding, variant = choose_variant(
+        static_file, request.META.get('HTTP_ACCEPT_ENCODING', '')
+    )
+    if request.META.get('HTTP_IF_NONE_MATCH') == variant.etag:
+        response = HttpResponseNotModified()
+    elif request.method == 'HEAD':
+        response = HttpResponse(content_type=static_file.content_type)
+        response['Content-Length'] = variant.size
+    elif variant.content is not None:
+        response = HttpResponse(
+            variant.content, content_type=static_file.content_type
+        )
+    else:
+        response = FileResponse(
+            open(variant.path, 'rb'), content_type=static_file.content_type
+        )
+    response['ETag'] = variant.etag
+    response['Cache-Control'] = static_file.cache_control
+    if len(static_file.variants) > 1:
+        response['Vary'] = 'Accept-Encoding'
+    if encoding != 'identity' and response.status_code == 200:
+        response['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,89 @@
+"""Хранилище, в котором имя файла — хеш его содержимого.
+
+Одинаковые загрузки попадают в один файл: posts/3f/3f2a….gif. Поэтому
+удалять файл можно, только когда на него не ссылается ни одна запись —
+это делают обработчики сигналов posts.signals. Миниатюры sorl строятся
+по имени исходного файла, так что у дубликатов они общие.
+
+Повторная загрузка уже лежащего файла ничего не пишет, а запись со
+ссылкой на него появится в базе только после коммита. Чтобы файл не
+удалили в этом промежутке, save помечает его в общем кеше как
+переиспользованный, а освобождение (posts.signals.release_image) такие
+файлы не трогает. Пометку снимает сохранение записи; если запись так и
+не сохранилась, файл без ссылок удалит storage_report --delete-orphans.
+Пометка и проверка перед удалением идут под блокировкой имени файла.
+"""
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+from .cache import shared_cache
+
+LOCK_KEY = 'storage:lock:{name}'
+REUSED_KEY = 'storage:reused:{name}'
+LOCK_TIMEOUT = 10
+# пометка должна пережить запрос, который сохраняет запись
+REUSED_TIMEOUT = 60 * 5
+POLL_INTERVAL = 0.01
+
+
+@contextmanager
+def content_lock(name):
+    """Блокировка имени файла в общем кеше. Не дождавшись её за
+    LOCK_TIMEOUT секунд, код выполняется без блокировки"""
+    shared = shared_cache()
+    key = LOCK_KEY.format(name=name)
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    locked = shared.add(key, 1, LOCK_TIMEOUT)
+    while not locked and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        locked = shared.add(key, 1, LOCK_TIMEOUT)
+    try:
+        yield
+    finally:
+        if locked:
+            shared.delete(key)
+
+
+def is_reused(name):
+    """Файл недавно загружен повторно, и ссылка на него ещё может
+    появиться в базе"""
+    return shared_cache().get(REUSED_KEY.format(name=name)) is not None
+
+
+def forget_reused(name):
+    shared_cache().delete(REUSED_KEY.format(name=name))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def content_name(self, name, content):
+        """Имя для содержимого: каталог из upload_to, подкаталог из
+        первых символов хеша, хеш и расширение исходного имени"""
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, digest[:2], digest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        with content_lock(name):
+            if self.exists(name):
+                shared_cache().set(
+                    REUSED_KEY.format(name=name), 1, REUSED_TIMEOUT
+                )
+                return name
+        return self._save(name, content)
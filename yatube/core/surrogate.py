@@ -0,0 +1,78 @@
+"""Кеширование страниц общим кешем перед сайтом (Varnish, CDN).
+
+Представление помечает ответ ключами в заголовке Surrogate-Key —
+какие записи, авторы и группы на странице. Анонимам такие страницы
+отдаются с Cache-Control: public, s-maxage и stale-while-revalidate,
+и прокси держит их сам; всем остальным — с private. После изменения
+данных purge() просит прокси сбросить страницы с нужными ключами:
+шлёт на SURROGATE_PURGE_URL запрос SURROGATE_PURGE_METHOD с ключами
+через пробел в заголовке SURROGATE_PURGE_HEADER.
+"""
+import logging
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+
+SURROGATE_KEY_HEADER = 'Surrogate-Key'
+CACHEABLE_METHODS = ('GET', 'HEAD')
+
+logger = logging.getLogger(__name__)
+
+
+def set_keys(response, keys):
+    response[SURROGATE_KEY_HEADER] = ' '.join(sorted(set(keys)))
+    return response
+
+
+def is_shared_cacheable(request, response):
+    # страница с установкой cookie (CSRF, сессия) у каждого своя
+    return (
+        request.method in CACHEABLE_METHODS
+        and response.status_code == 200
+        and not response.cookies
+        and not request.user.is_authenticated
+    )
+
+
+def patch_response(request, response):
+    """Ставит Cache-Control страницам, помеченным ключами"""
+    if SURROGATE_KEY_HEADER not in response:
+        return response
+    if is_shared_cacheable(request, response):
+        patch_cache_control(
+            response,
+            public=True,
+            s_maxage=settings.SURROGATE_MAX_AGE,
+            stale_while_revalidate=settings.SURROGATE_STALE_WHILE_REVALIDATE,
+        )
+    else:
+        patch_cache_control(response, private=True)
+    return response
+
+
+def send_purge(keys):
+    request = urllib.request.Request(
+        settings.SURROGATE_PURGE_URL,
+        method=settings.SURROGATE_PURGE_METHOD,
+        headers={settings.SURROGATE_PURGE_HEADER: ' '.join(sorted(keys))},
+    )
+    try:
+        with urllib.request.urlopen(
+            request, timeout=settings.SURROGATE_PURGE_TIMEOUT
+        ):
+            pass
+    except (urllib.error.URLError, OSError) as error:
+        # страница доживёт в прокси до s-maxage, запись от этого не
+        # должна падать
+        logger.warning('Не удалось сбросить ключи %s: %s', keys, error)
+
+
+def purge(keys):
+    """Сбрасывает страницы с ключами keys после коммита транзакции"""
+    keys = set(keys)
+    if not settings.SURROGATE_PURGE_URL or not keys:
+        return
+    transaction.on_commit(lambda: send_purge(keys))
@@ -0,0 +1,31 @@
+import logging
+
+from django import template
+from sorl.thumbnail.conf import settings as sorl_settings
+
+from core.thumbnails import responsive_thumbnails
+
+register = template.Library()
+logger = logging.getLogger('sorl.thumbnail')
+
+
+@register.inclusion_tag('includes/picture.html')
+def picture(image, geometry, css_class='', sizes=None, **options):
+    """<picture> с миниатюрами нескольких ширин и форматов:
+
+        {% picture post.image "960x339" crop="center" css_class="card-img" %}
+    """
+    if not image:
+        return {}
+    try:
+        context = responsive_thumbnails(image, geometry, **options)
+    except Exception:
+        # как тег thumbnail из sorl: без THUMBNAIL_DEBUG картинки просто нет
+        if sorl_settings.THUMBNAIL_DEBUG:
+            raise
+        logger.exception('Не удалось построить миниатюры для %s', image)
+        return {}
+    width = context['width']
+    context['css_class'] = css_class
+    context['sizes'] = sizes or f'(max-width: {width}px) 100vw, {width}px'
+    return context
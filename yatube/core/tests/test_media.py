@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.views import serve_media
+
+CONTENT = bytes(range(256)) * 40
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MEDIA_ACCEL=None)
+class MediaServeTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        path = os.path.join(TEMP_MEDIA_ROOT, 'posts', 'small.gif')
+        with open(path, 'wb') as file:
+            file.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, name='posts/small.gif', **headers):
+        request = RequestFactory().get('/media/' + name, **headers)
+        return serve_media(request, name)
+
+    def body(self, response):
+        content = b''.join(response.streaming_content)
+        response.close()
+        return content
+
+    def test_full_file(self):
+        """Файл отдаётся целиком с ETag и длиной"""
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', response)
+        self.assertEqual(self.body(response), CONTENT)
+
+    def test_ranges(self):
+        """Запросы Range отдают нужную часть файла"""
+        size = len(CONTENT)
+        cases = {
+            'bytes=0-99': (0, 99),
+            'bytes=1000-': (1000, size - 1),
+            'bytes=-10': (size - 10, size - 1),
+            'bytes=10000-99999': (10000, size - 1),
+        }
+        for header, (start, end) in cases.items():
+            with self.subTest(range=header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(
+                    response['Content-Range'], f'bytes {start}-{end}/{size}'
+                )
+                self.assertEqual(self.body(response), CONTENT[start:end + 1])
+
+    def test_unsatisfiable_range(self):
+        """Диапазон за концом файла даёт 416"""
+        response = self.get(HTTP_RANGE=f'bytes={len(CONTENT)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_stale_if_range_ignores_range(self):
+        """Устаревший If-Range даёт весь файл"""
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), CONTENT)
+
+    def test_conditional_get(self):
+        """Совпавший ETag даёт 304"""
+        response = self.get()
+        etag = response['ETag']
+        response.close()
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_proxy_offload(self):
+        """Отдачу можно передать nginx или Apache"""
+        cases = {
+            'x-accel-redirect': (
+                'X-Accel-Redirect', '/protected-media/posts/small.gif'
+            ),
+            'x-sendfile': (
+                'X-Sendfile',
+                os.path.join(TEMP_MEDIA_ROOT, 'posts', 'small.gif'),
+            ),
+        }
+        for accel, (header, value) in cases.items():
+            with self.subTest(accel=accel), override_settings(
+                MEDIA_ACCEL=accel
+            ):
+                response = self.get()
+                self.assertEqual(response[header], value)
+                self.assertEqual(response.content, b'')
+
+    def test_missing_and_outside_files(self):
+        """Несуществующие файлы и пути вне MEDIA_ROOT дают 404"""
+        for name in ('posts/missing.gif', '../etc/passwd', 'posts'):
+            with self.subTest(name=name):
+                with self.assertRaises(Http404):
+                    self.get(name)
@@ -0,0 +1,173 @@
+import os
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import Histogram, registry
+from core.tests.test_two_tier_cache import TWO_TIER_CACHES
+from posts.models import Post
+
+# общий кеш без MetricsCacheMixin, как memcached в продакшене
+UNINSTRUMENTED_TWO_TIER_CACHES = {
+    'default': {
+        **TWO_TIER_CACHES['default'], 'LOCATION': 'two-tier-uninstrumented',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'two-tier-shared',
+    },
+}
+
+User = get_user_model()
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        registry.clear()
+        cache.clear()
+
+    def get_metrics(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response.content.decode()
+
+    def metric_value(self, content, sample):
+        # у серий есть метка процесса, отдавшего метрики
+        sample = sample[:-1] + f',pid="{os.getpid()}"}}'
+        for line in content.splitlines():
+            if line.startswith(sample + ' '):
+                return float(line.split()[-1])
+        self.fail(f'Метрика {sample} не найдена')
+
+    def test_metrics_by_url_name(self):
+        """Метрики записываются под именем URL"""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        content = self.get_metrics()
+        samples = {
+            'yatube_request_seconds_count{view="posts:index"}': 2,
+            'yatube_template_render_seconds_count{view="posts:index"}': 2,
+        }
+        for sample, expected in samples.items():
+            with self.subTest(sample=sample):
+                self.assertEqual(self.metric_value(content, sample), expected)
+        # первый запрос главной страницы не находит её в кеше,
+        # второй отдаётся из кеша
+        for sample in (
+            'yatube_cache_hits_total{view="posts:index"}',
+            'yatube_cache_misses_total{view="posts:index"}',
+        ):
+            with self.subTest(sample=sample):
+                self.assertGreater(self.metric_value(content, sample), 0)
+
+    def test_db_queries_are_counted(self):
+        """Запросы к базе считаются для каждого представления"""
+        self.client.get(reverse('posts:index'))
+        content = self.get_metrics()
+        self.assertGreater(self.metric_value(
+            content, 'yatube_db_queries_total{view="posts:index"}'
+        ), 0)
+
+    def test_template_timings(self):
+        """Время и число рендеров считаются по каждому шаблону,
+        включая include и родительский base.html"""
+        author = User.objects.create_user(username='testauthor')
+        for i in range(3):
+            Post.objects.create(author=author, text=f'Запись {i}')
+        self.client.get(reverse('posts:index'))
+        content = self.get_metrics()
+        renders = {
+            'posts/index.html': 1,
+            'base.html': 1,
+            'includes/header.html': 1,
+            'posts/includes/one_post.html': 3,
+            'posts/includes/paginator.html': 1,
+        }
+        for template, expected in renders.items():
+            with self.subTest(template=template):
+                label = f'{{template="{template}"}}'
+                self.assertEqual(self.metric_value(
+                    content, 'yatube_template_renders_total' + label
+                ), expected)
+                self.assertLessEqual(
+                    self.metric_value(
+                        content, 'yatube_template_self_seconds_total' + label
+                    ),
+                    self.metric_value(
+                        content, 'yatube_template_seconds_total' + label
+                    ),
+                )
+
+    @override_settings(TEMPLATE_TIMINGS_HEADER=True)
+    def test_server_timing_header(self):
+        """Время шаблонов отдаётся в заголовке Server-Timing"""
+        response = self.client.get(reverse('about:author'))
+        self.assertIn('desc="about/author.html x1"', response['Server-Timing'])
+
+    @override_settings(TEMPLATE_TIMINGS_HEADER=False)
+    def test_server_timing_header_disabled(self):
+        """Без настройки заголовок не добавляется"""
+        response = self.client.get(reverse('about:author'))
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(METRICS_ALLOWED_IPS=[])
+    def test_metrics_hidden_from_other_addresses(self):
+        """Метрики не видны с адресов не из списка разрешённых"""
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_cache_get_many_counted_once(self):
+        """get_many считает каждый ключ один раз"""
+        cache.set('key', 1)
+        with mock.patch('core.cache.record_cache') as record_cache:
+            cache.get_many(['key', 'other'])
+        record_cache.assert_called_once_with(1, 1)
+
+    def test_local_cache_hits(self):
+        """Попадания в кеш процесса считаются отдельно, а попадания и
+        промахи общего кеша — даже если он сам их не считает"""
+        with override_settings(CACHES=UNINSTRUMENTED_TWO_TIER_CACHES):
+            cache.clear()
+            self.client.get(reverse('posts:index'))
+            self.client.get(reverse('posts:index'))
+        content = self.get_metrics()
+        sample = '{view="posts:index"}'
+        local_hits = self.metric_value(
+            content, 'yatube_local_cache_hits_total' + sample
+        )
+        self.assertGreater(local_hits, 0)
+        self.assertLessEqual(local_hits, self.metric_value(
+            content, 'yatube_cache_hits_total' + sample
+        ))
+        self.assertGreater(self.metric_value(
+            content, 'yatube_cache_misses_total' + sample
+        ), 0)
+
+    def test_series_labelled_with_process(self):
+        """Каждая серия помечена процессом, чтобы серии разных процессов
+        сервера не смешивались"""
+        self.client.get(reverse('posts:index'))
+        samples = [
+            line for line in self.get_metrics().splitlines()
+            if not line.startswith('#')
+        ]
+        self.assertTrue(samples)
+        for line in samples:
+            with self.subTest(line=line):
+                self.assertIn(f'pid="{os.getpid()}"', line)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Корзины гистограммы накопительные"""
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value)
+        samples = list(histogram.samples('latency', 'view="v"'))
+        self.assertEqual(samples[:3], [
+            'latency_bucket{view="v",le="0.1"} 1',
+            'latency_bucket{view="v",le="1.0"} 2',
+            'latency_bucket{view="v",le="+Inf"} 3',
+        ])
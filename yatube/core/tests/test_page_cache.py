@@ -0,0 +1,76 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from django.utils.cache import get_cache_key
+
+from core.page_cache import KEY_PREFIX, REFRESH_LOCK_KEY, swr_cache_page
+
+SOFT_TIMEOUT = 20
+HARD_TIMEOUT = 300
+
+
+class StaleWhileRevalidateTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.builds = 0
+
+        @swr_cache_page(SOFT_TIMEOUT, HARD_TIMEOUT)
+        def view(request):
+            self.builds += 1
+            return HttpResponse(f'сборка {self.builds}')
+
+        self.view = view
+        self.factory = RequestFactory()
+
+    def get(self, after=0):
+        request = self.factory.get('/')
+        with mock.patch('core.page_cache.time') as clock:
+            clock.time.return_value = time.time() + after
+            return self.view(request).content.decode()
+
+    def test_fresh_entry_served(self):
+        """До мягкого срока страница не пересобирается"""
+        self.assertEqual(self.get(), 'сборка 1')
+        self.assertEqual(self.get(after=SOFT_TIMEOUT - 1), 'сборка 1')
+        self.assertEqual(self.builds, 1)
+
+    def test_stale_entry_rebuilt_once(self):
+        """После мягкого срока страницу пересобирает один запрос"""
+        self.get()
+        self.assertEqual(self.get(after=SOFT_TIMEOUT + 1), 'сборка 2')
+        self.assertEqual(self.get(after=SOFT_TIMEOUT + 2), 'сборка 2')
+        self.assertEqual(self.builds, 2)
+
+    def test_stale_entry_served_while_rebuilding(self):
+        """Пока страницу пересобирает другой запрос, отдаётся устаревшая
+        копия"""
+        self.get()
+        key = get_cache_key(
+            self.factory.get('/'), KEY_PREFIX, 'GET', cache=cache
+        )
+        cache.add(REFRESH_LOCK_KEY.format(key=key), 1)
+        self.assertEqual(self.get(after=SOFT_TIMEOUT + 1), 'сборка 1')
+        self.assertEqual(self.builds, 1)
+
+    def test_failed_rebuild_releases_lock(self):
+        """Упавшая пересборка не оставляет блокировку"""
+        self.get()
+
+        @swr_cache_page(SOFT_TIMEOUT, HARD_TIMEOUT)
+        def broken(request):
+            raise ValueError
+
+        with mock.patch('core.page_cache.time') as clock:
+            clock.time.return_value = time.time() + SOFT_TIMEOUT + 1
+            with self.assertRaises(ValueError):
+                broken(self.factory.get('/'))
+        self.assertEqual(self.get(after=SOFT_TIMEOUT + 1), 'сборка 2')
+
+    def test_post_not_cached(self):
+        """POST-запросы не кешируются"""
+        for _ in range(2):
+            self.view(self.factory.post('/'))
+        self.assertEqual(self.builds, 2)
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import profiling
+
+User = get_user_model()
+TEMP_PROFILER_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(PROFILER_ROOT=TEMP_PROFILER_ROOT, PROFILER_KEEP=2)
+class ProfilerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.staff = User.objects.create_user(
+            username='teststaff', is_staff=True
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_PROFILER_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        shutil.rmtree(TEMP_PROFILER_ROOT, ignore_errors=True)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_not_profiled_without_request(self):
+        """Без заголовка запрос сотрудника не профилируется"""
+        response = self.staff_client.get(reverse('posts:index'))
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(profiling.recent_profiles(), [])
+
+    def test_staff_header_profiles_request(self):
+        """Сотрудник получает профиль по заголовку X-Profile"""
+        response = self.staff_client.get(
+            reverse('posts:index'), HTTP_X_PROFILE='1'
+        )
+        profile_id = response['X-Profile-Id']
+        [meta] = profiling.recent_profiles()
+        self.assertEqual(meta['id'], profile_id)
+        self.assertEqual(meta['view'], 'posts:index')
+        self.assertEqual(meta['status'], HTTPStatus.OK)
+
+    def test_regular_user_needs_token(self):
+        """Обычному пользователю нужен подписанный токен"""
+        url = reverse('posts:index')
+        cases = {
+            'X-Profile': {'HTTP_X_PROFILE': '1'},
+            'поддельный токен': {'HTTP_X_PROFILE_TOKEN': 'profile:bad'},
+        }
+        for name, headers in cases.items():
+            with self.subTest(case=name):
+                response = self.authorized_client.get(url, **headers)
+                self.assertNotIn('X-Profile-Id', response)
+        response = self.client.get(
+            url, HTTP_X_PROFILE_TOKEN=profiling.make_token()
+        )
+        self.assertIn('X-Profile-Id', response)
+
+    def test_old_profiles_pruned(self):
+        """Хранится не больше PROFILER_KEEP профилей"""
+        for _ in range(5):
+            response = self.staff_client.get(
+                reverse('posts:index'), {'_profile': 1}
+            )
+            profile_id = response['X-Profile-Id']
+            # только что записанный профиль не удаляется, даже если
+            # соседние записаны в ту же секунду
+            self.assertTrue(os.path.exists(
+                profiling.profile_path(profile_id, 'prof')
+            ))
+        self.assertEqual(len(profiling.recent_profiles()), 2)
+
+    def test_admin_pages(self):
+        """Страницы профилей доступны только сотрудникам"""
+        response = self.staff_client.get(
+            reverse('posts:index'), HTTP_X_PROFILE='1'
+        )
+        profile_id = response['X-Profile-Id']
+        urls = (
+            reverse('core:profile_list'),
+            reverse('core:profile_detail', args=[profile_id]),
+            reverse('core:profile_download', args=[profile_id]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.staff_client.get(url).status_code, HTTPStatus.OK
+                )
+                self.assertEqual(
+                    self.authorized_client.get(url).status_code,
+                    HTTPStatus.FOUND
+                )
+        response = self.staff_client.get(reverse('core:profile_list'))
+        self.assertContains(response, profile_id)
+
+    def test_bad_profile_id(self):
+        """Неверный идентификатор профиля даёт 404"""
+        response = self.staff_client.get(
+            reverse('core:profile_detail', args=['..secret'])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core.query_budget import QueryBudgetExceeded, QueryBudgetMixin
+
+User = get_user_model()
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    def test_budget_exceeded_lists_queries(self):
+        """Превышение бюджета показывает выполненные запросы"""
+        with self.assertRaises(QueryBudgetExceeded) as error:
+            with self.assertQueryBudget(1, label='Профили'):
+                User.objects.count()
+                User.objects.filter(username='testuser').exists()
+        message = str(error.exception)
+        self.assertIn('Профили превышен: 2 запросов при бюджете 1', message)
+        self.assertIn('auth_user', message)
+
+    def test_budget_kept(self):
+        """Запросы в пределах бюджета не роняют тест"""
+        with self.assertQueryBudget(1, max_time=10) as budget:
+            User.objects.count()
+        self.assertEqual(len(budget.queries), 1)
+
+    def test_time_budget(self):
+        """Превышение бюджета времени роняет тест"""
+        with self.assertRaises(QueryBudgetExceeded):
+            with self.assertQueryBudget(max_time=0):
+                User.objects.count()
@@ -0,0 +1,105 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.sessions import SessionStore
+from core.tests.test_two_tier_cache import TWO_TIER_CACHES
+
+
+class SessionStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.session = SessionStore()
+        self.session['user'] = 'testuser'
+        self.session.create()
+
+    def test_load_from_cache(self):
+        """Сессия из кеша читается без запросов к базе"""
+        with self.assertNumQueries(0):
+            session = SessionStore(self.session.session_key)
+            self.assertEqual(session['user'], 'testuser')
+
+    def test_load_from_database_after_cache_miss(self):
+        """Без записи в кеше сессия читается из базы"""
+        cache.clear()
+        with self.assertNumQueries(1):
+            session = SessionStore(self.session.session_key)
+            self.assertEqual(session['user'], 'testuser')
+
+    def test_unchanged_session_not_written(self):
+        """Сохранение без изменений данных не трогает базу"""
+        session = SessionStore(self.session.session_key)
+        session['user'] = 'testuser'
+        with self.assertNumQueries(0):
+            session.save()
+
+    def test_changed_session_written(self):
+        """Изменённые данные сразу попадают в базу"""
+        session = SessionStore(self.session.session_key)
+        session['user'] = 'otheruser'
+        session.save()
+        cache.clear()
+        self.assertEqual(
+            SessionStore(self.session.session_key)['user'], 'otheruser'
+        )
+
+    @override_settings(SESSION_DB_WRITE_INTERVAL=0)
+    def test_unchanged_session_written_after_interval(self):
+        """После интервала неизменённая сессия продлевается в базе"""
+        session = SessionStore(self.session.session_key)
+        session['user'] = 'testuser'
+        with CaptureQueriesContext(connection) as queries:
+            session.save()
+        self.assertTrue(any(
+            query['sql'].startswith('UPDATE "django_session"')
+            for query in queries
+        ))
+
+
+@override_settings(CACHES=TWO_TIER_CACHES)
+class TwoTierSessionTests(TestCase):
+    def test_logout_in_other_process(self):
+        """Сессия, удалённая другим процессом, не читается из копии
+        в кеше этого процесса"""
+        cache.clear()
+        session = SessionStore()
+        session['_auth_user_id'] = '1'
+        session.create()
+        self.assertEqual(
+            SessionStore(session.session_key)['_auth_user_id'], '1'
+        )
+        # выход в другом процессе: его кеш процесса здесь не виден
+        Session.objects.filter(session_key=session.session_key).delete()
+        caches['shared'].delete(session.cache_key)
+        self.assertNotIn(
+            '_auth_user_id', SessionStore(session.session_key)
+        )
+
+
+class PurgeSessionsTests(TestCase):
+    def test_purge_expired_sessions(self):
+        """Удаляются только истёкшие сессии, порциями"""
+        now = timezone.now()
+        for number in range(5):
+            Session.objects.create(
+                session_key=f'expired{number}',
+                session_data='',
+                expire_date=now - timedelta(days=1),
+            )
+        Session.objects.create(
+            session_key='active',
+            session_data='',
+            expire_date=now + timedelta(days=1),
+        )
+        call_command('purge_sessions', batch_size=2, stdout=StringIO())
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            ['active'],
+        )
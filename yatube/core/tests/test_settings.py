@@ -0,0 +1,16 @@
+from importlib import import_module
+
+from django.test import SimpleTestCase
+
+
+class ProductionSettingsTests(SimpleTestCase):
+    def test_production_settings(self):
+        """В продакшене нет отладки и шаблоны кешируются"""
+        production = import_module('yatube.settings_production')
+        self.assertFalse(production.DEBUG)
+        self.assertNotIn('debug_toolbar', production.INSTALLED_APPS)
+        self.assertFalse(any(
+            'debug_toolbar' in name for name in production.MIDDLEWARE
+        ))
+        [(loader, _)] = production.TEMPLATES[0]['OPTIONS']['loaders']
+        self.assertEqual(loader, 'django.template.loaders.cached.Loader')
@@ -0,0 +1,191 @@
+import threading
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.single_flight import (
+    LOCK_KEY, RESULT_KEY, SingleFlight, single_flight_page,
+)
+from core.tests.test_two_tier_cache import TWO_TIER_CACHES
+
+KEY = 'single-flight:test'
+THREADS = 5
+# за это время запущенные потоки доходят до ожидания ведущего
+SETTLE_TIME = 0.1
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.flights = SingleFlight()
+        self.calls = 0
+        self.release = threading.Event()
+
+    def compute(self):
+        self.calls += 1
+        return b'result'
+
+    def test_threads_share_one_computation(self):
+        """Одновременные вызовы в процессе вычисляют результат один раз"""
+        started = threading.Event()
+
+        def compute():
+            self.calls += 1
+            started.set()
+            self.release.wait(5)
+            return b'result'
+
+        results = []
+        leader = threading.Thread(
+            target=lambda: results.append(self.flights.do(KEY, compute, 5))
+        )
+        leader.start()
+        started.wait(5)
+        followers = [
+            threading.Thread(
+                target=lambda: results.append(
+                    self.flights.do(KEY, compute, 5)
+                )
+            )
+            for _ in range(THREADS - 1)
+        ]
+        for thread in followers:
+            thread.start()
+        time.sleep(SETTLE_TIME)
+        self.release.set()
+        for thread in [leader, *followers]:
+            thread.join()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [b'result'] * THREADS)
+
+    def test_waits_for_other_process(self):
+        """Ключ с чужой блокировкой ждёт результата другого процесса"""
+        cache.add(LOCK_KEY.format(key=KEY), 'token')
+        timer = threading.Timer(0.05, cache.set, (
+            RESULT_KEY.format(key=KEY, token='token'), b'other',
+        ))
+        timer.start()
+        self.assertEqual(self.flights.do(KEY, self.compute, 5), b'other')
+        timer.join()
+        self.assertEqual(self.calls, 0)
+
+    def test_computes_after_timeout(self):
+        """Не дождавшись другого процесса, вызов вычисляет сам"""
+        cache.add(LOCK_KEY.format(key=KEY), 'token')
+        self.assertEqual(self.flights.do(KEY, self.compute, 0.05), b'result')
+        self.assertEqual(self.calls, 1)
+
+    def test_leader_failure_not_shared(self):
+        """Ошибка ведущего не передаётся: ведомые вычисляют сами"""
+        started = threading.Event()
+
+        def failing():
+            started.set()
+            self.release.wait(5)
+            raise ValueError
+
+        errors = []
+
+        def lead():
+            try:
+                self.flights.do(KEY, failing, 5)
+            except ValueError as error:
+                errors.append(error)
+
+        leader = threading.Thread(target=lead)
+        leader.start()
+        started.wait(5)
+        results = []
+        follower = threading.Thread(
+            target=lambda: results.append(
+                self.flights.do(KEY, lambda: b'own', 5)
+            )
+        )
+        follower.start()
+        time.sleep(SETTLE_TIME)
+        self.release.set()
+        leader.join()
+        follower.join()
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(results, [b'own'])
+        self.assertIsNone(cache.get(LOCK_KEY.format(key=KEY)))
+
+
+@override_settings(CACHES=TWO_TIER_CACHES)
+class TwoTierSingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_release_in_other_process(self):
+        """Блокировку, снятую другим процессом, видно сразу, даже если
+        её копия попала в кеш этого процесса"""
+        lock_key = LOCK_KEY.format(key=KEY)
+        other = caches['shared']
+        other.add(lock_key, 'token')
+        cache.get(lock_key)
+        timer = threading.Timer(0.05, other.delete, (lock_key,))
+        timer.start()
+        started = time.monotonic()
+        self.assertEqual(SingleFlight().do(KEY, lambda: b'own', 5), b'own')
+        timer.join()
+        self.assertLess(time.monotonic() - started, 1)
+
+
+@override_settings(SINGLE_FLIGHT_ENABLED=True)
+class SingleFlightPageTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.responses = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+        @single_flight_page
+        def view(request):
+            self.started.set()
+            self.release.wait(5)
+            response = HttpResponse('страница')
+            response['Surrogate-Key'] = 'post-1'
+            self.responses.append(response)
+            return response
+
+        self.view = view
+
+    def get(self, results, user=AnonymousUser()):
+        request = self.factory.get('/posts/1/')
+        request.user = user
+        results.append(self.view(request))
+
+    def test_followers_get_copies(self):
+        """Одновременные запросы анонимов получают копии одного ответа"""
+        results = []
+        leader = threading.Thread(target=self.get, args=(results,))
+        leader.start()
+        self.started.wait(5)
+        followers = [
+            threading.Thread(target=self.get, args=(results,))
+            for _ in range(THREADS - 1)
+        ]
+        for thread in followers:
+            thread.start()
+        time.sleep(SETTLE_TIME)
+        self.release.set()
+        for thread in [leader, *followers]:
+            thread.join()
+        self.assertEqual(len(self.responses), 1)
+        self.assertEqual(len({id(response) for response in results}), THREADS)
+        for response in results:
+            self.assertEqual(response.content.decode(), 'страница')
+            self.assertEqual(response['Surrogate-Key'], 'post-1')
+
+    def test_authenticated_not_coalesced(self):
+        """Запросы вошедших пользователей не сливаются"""
+        user = type('User', (), {'is_authenticated': True})()
+        self.release.set()
+        results = []
+        for _ in range(2):
+            self.get(results, user)
+        self.assertEqual(len(self.responses), 2)
@@ -0,0 +1,95 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import slow_queries
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+class FingerprintTests(TestCase):
+    def test_fingerprint_drops_values(self):
+        """Отпечаток не зависит от значений и длины списка IN"""
+        cases = (
+            (
+                'SELECT * FROM t WHERE id IN (%s, %s, %s)',
+                'SELECT * FROM t WHERE id IN (%s)',
+            ),
+            (
+                "SELECT * FROM t WHERE name = 'a'  LIMIT 10",
+                "SELECT * FROM t WHERE name = 'it''s' LIMIT 20",
+            ),
+        )
+        for first, second in cases:
+            with self.subTest(sql=first):
+                self.assertEqual(
+                    slow_queries.fingerprint(first),
+                    slow_queries.fingerprint(second),
+                )
+
+
+@override_settings(SLOW_QUERY_THRESHOLD=0)
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.author = User.objects.create_user(username='testauthor')
+        cls.staff = User.objects.create_user(
+            username='teststaff', is_staff=True
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        Post.objects.create(author=cls.author, text='Тестовая запись')
+
+    def setUp(self):
+        cache.clear()
+        slow_queries.log.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_query_recorded_with_view_frame_and_plan(self):
+        """Запрос ленты подписок попадает в журнал с представлением,
+        строкой из posts и планом выполнения"""
+        with self.assertLogs('core.slow_queries', 'WARNING'):
+            self.authorized_client.get(reverse('posts:follow_index'))
+        [entry] = [
+            entry for entry in slow_queries.log.top()
+            if entry.fingerprint.startswith('SELECT "posts_post"."id" FROM')
+        ]
+        self.assertEqual(set(entry.views), {'posts:follow_index'})
+        [frame] = entry.frames
+        # id записей страницы выбирает кеш записей
+        self.assertTrue(frame.startswith('posts.post_cache:'))
+        self.assertTrue(entry.plan)
+
+    def test_repeated_queries_aggregated(self):
+        """Повторы одного запроса складываются в одну запись"""
+        url = reverse('posts:follow_index')
+        self.authorized_client.get(url)
+        counts = {
+            entry.fingerprint: entry.count
+            for entry in slow_queries.log.top()
+        }
+        # второй запрос тоже с холодным кешем, как и первый
+        cache.clear()
+        self.authorized_client.force_login(self.user)
+        self.authorized_client.get(url)
+        for entry in slow_queries.log.top():
+            with self.subTest(sql=entry.fingerprint):
+                self.assertEqual(entry.count, counts[entry.fingerprint] * 2)
+
+    def test_staff_page(self):
+        """Журнал доступен сотрудникам"""
+        self.authorized_client.get(reverse('posts:follow_index'))
+        url = reverse('core:slow_query_list')
+        staff_client = Client()
+        staff_client.force_login(self.staff)
+        response = staff_client.get(url)
+        self.assertContains(response, 'posts:follow_index')
+        self.assertEqual(
+            self.authorized_client.get(url).status_code, HTTPStatus.FOUND
+        )
@@ -0,0 +1,95 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.middleware import StaticFilesMiddleware
+
+CSS = b'.post { margin: 0; padding: 0; }\n' * 100
+
+
+class StaticFilesTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.source, 'css'))
+        with open(os.path.join(cls.source, 'css', 'site.css'), 'wb') as file:
+            file.write(CSS)
+        cls.settings = override_settings(
+            STATICFILES_DIRS=[cls.source],
+            STATIC_ROOT=cls.root,
+            STATICFILES_STORAGE=(
+                'core.staticfiles.CompressedManifestStaticFilesStorage'
+            ),
+            STATIC_SERVE_ENABLED=True,
+        )
+        cls.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.middleware = StaticFilesMiddleware(
+            lambda request: HttpResponse('приложение')
+        )
+        [cls.hashed_url] = [
+            url for url in cls.middleware.files
+            if url.startswith('/static/css/site.') and url != (
+                '/static/css/site.css'
+            )
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, path, **headers):
+        return self.middleware(RequestFactory().get(path, **headers))
+
+    def test_gzip_variant_written(self):
+        """collectstatic пишет рядом сжатую копию файла с хешем"""
+        path = os.path.join(self.root, self.hashed_url[len('/static/'):])
+        with open(path + '.gz', 'rb') as file:
+            self.assertEqual(gzip.decompress(file.read()), CSS)
+
+    def test_content_encoding_negotiation(self):
+        """Сжатая копия отдаётся только тем, кто её принимает"""
+        response = self.get(self.hashed_url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), CSS)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        for header in ('identity', 'gzip;q=0'):
+            with self.subTest(accept_encoding=header):
+                response = self.get(
+                    self.hashed_url, HTTP_ACCEPT_ENCODING=header
+                )
+                self.assertNotIn('Content-Encoding', response)
+                self.assertEqual(response.content, CSS)
+                self.assertEqual(response['Content-Type'], 'text/css')
+
+    def test_cache_control(self):
+        """Файлы с хешем кешируются навсегда, без хеша — ненадолго"""
+        response = self.get(self.hashed_url)
+        self.assertIn('immutable', response['Cache-Control'])
+        response = self.get('/static/css/site.css')
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_etag_not_modified(self):
+        """Совпавший ETag даёт 304 без тела"""
+        etag = self.get(self.hashed_url)['ETag']
+        response = self.get(self.hashed_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_other_paths_passed_through(self):
+        """Прочие адреса обрабатывает приложение"""
+        for path in ('/', '/static/missing.css'):
+            with self.subTest(path=path):
+                self.assertEqual(
+                    self.get(path).content.decode(), 'приложение'
+                )
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.template import Context, Template
+from django.test import SimpleTestCase
+
+TEMPLATE = Template(
+    '{% load responsive %}'
+    '{% picture image "960x339" crop="center" css_class="card-img" %}'
+)
+
+
+def fake_thumbnail(image, geometry, format='JPEG', **options):
+    return SimpleNamespace(url=f'/media/cache/{geometry}.{format.lower()}')
+
+
+@mock.patch('core.thumbnails.modern_formats', lambda: ['AVIF', 'WEBP'])
+class PictureTagTests(SimpleTestCase):
+    def render(self, image='posts/image.jpg'):
+        return TEMPLATE.render(Context({'image': image}))
+
+    @mock.patch('core.thumbnails.get_thumbnail', fake_thumbnail)
+    def test_sources_for_each_format_and_width(self):
+        """Для каждого формата есть srcset из всех ширин"""
+        html = self.render()
+        expected = (
+            '<source type="image/avif" srcset="/media/cache/480x170.avif '
+            '480w, /media/cache/960x339.avif 960w"',
+            '<source type="image/webp" srcset="/media/cache/480x170.webp '
+            '480w, /media/cache/960x339.webp 960w"',
+            'src="/media/cache/960x339.jpeg"',
+            'srcset="/media/cache/480x170.jpeg 480w, '
+            '/media/cache/960x339.jpeg 960w"',
+            'class="card-img"',
+            'sizes="(max-width: 960px) 100vw, 960px"',
+        )
+        for fragment in expected:
+            with self.subTest(fragment=fragment):
+                self.assertIn(fragment, html)
+
+    def test_no_image(self):
+        """Без картинки тег ничего не выводит"""
+        html = self.render(image='')
+        self.assertNotIn('<picture>', html)
+
+    @mock.patch(
+        'core.thumbnails.get_thumbnail', side_effect=OSError('битый файл')
+    )
+    def test_thumbnail_error_logged(self, get_thumbnail):
+        """Ошибка миниатюры не ломает страницу"""
+        with self.assertLogs('sorl.thumbnail', 'ERROR'):
+            html = self.render()
+        self.assertNotIn('<picture>', html)
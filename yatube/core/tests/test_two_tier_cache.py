@@ -0,0 +1,194 @@
+import threading
+import uuid
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.cache import TwoTierCache
+from posts.models import Comment, Follow, Post
+
+User = get_user_model()
+VALUE = 'x' * 50
+
+
+def two_tier(**options):
+    # новый LOCATION — новый кеш процесса, как в другом процессе
+    return TwoTierCache(
+        uuid.uuid4().hex, {'OPTIONS': {'SHARED': 'default', **options}}
+    )
+
+
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.first = two_tier(STAMP_INTERVAL=0)
+        # второй процесс с тем же общим кешем
+        self.second = two_tier(STAMP_INTERVAL=0)
+
+    def test_tiers_counted(self):
+        """Записанное и прочитанное значение берётся из кеша процесса,
+        а в другом процессе — из общего кеша"""
+        self.assertIsNone(self.first.get('key'))
+        self.first.set('key', [1, 2])
+        self.assertEqual(self.first.get('key'), [1, 2])
+        self.assertEqual(self.first.get_many(['key', 'other']), {
+            'key': [1, 2],
+        })
+        self.assertEqual(self.second.get('key'), [1, 2])
+        self.assertEqual(self.second.get('key'), [1, 2])
+        tiers = [
+            (stats['local_hits'], stats['shared_hits'], stats['misses'])
+            for stats in (self.first.stats(), self.second.stats())
+        ]
+        self.assertEqual(tiers, [(2, 0, 2), (1, 1, 0)])
+
+    def test_shared_reads_counted_once(self):
+        """Попадания и промахи общего кеша попадают в метрики один раз,
+        хотя общий кеш тестов считает их и сам"""
+        self.second.set('key', [1, 2])
+        first = two_tier(STAMP_INTERVAL=60)
+        # метку версии читает первое обращение, дальше она не мешает
+        first.check_stamp()
+        with mock.patch('core.cache.record_cache') as record_cache:
+            first.get('key')
+            first.get('other')
+            first.get_many(['key', 'more'])
+        recorded = [call.args for call in record_cache.call_args_list]
+        self.assertEqual(
+            [sum(column) for column in zip(*recorded)], [2, 2]
+        )
+
+    def test_local_copies_are_independent(self):
+        """Изменение полученного значения не меняет копию процесса"""
+        self.first.set('key', [1])
+        self.first.get('key').append(2)
+        self.first.get('key').append(3)
+        self.assertEqual(self.first.get('key'), [1])
+
+    def test_size_bound_evicts_least_recent(self):
+        """Кеш процесса не больше LOCAL_MAX_BYTES, вытесняется самое
+        давно прочитанное"""
+        probe = two_tier()
+        cache.set('a', VALUE)
+        probe.get('a')
+        entry_size = probe.stats()['local_bytes']
+        small = two_tier(LOCAL_MAX_BYTES=3 * entry_size)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, VALUE)
+            small.get(key)
+        small.get('a')
+        cache.set('d', VALUE)
+        small.get('d')
+        self.assertEqual(small.stats()['local_keys'], 3)
+        hits = small.stats()['local_hits']
+        small.get('a')
+        self.assertEqual(small.stats()['local_hits'], hits + 1)
+        small.get('b')
+        self.assertEqual(small.stats()['local_hits'], hits + 1)
+
+    def test_local_copy_expires(self):
+        """Копия процесса живёт не дольше LOCAL_TIMEOUT"""
+        self.first.set('key', 'old')
+        self.first.get('key')
+        cache.set('key', 'new')
+        self.assertEqual(self.first.get('key'), 'old')
+        with mock.patch('core.cache.time.monotonic') as monotonic:
+            monotonic.return_value = 10 ** 9
+            self.assertEqual(self.first.get('key'), 'new')
+
+    def test_write_in_one_process_visible_in_other(self):
+        """Запись в одном процессе сбрасывает копии в другом"""
+        self.first.set('key', 'old')
+        self.assertEqual(self.second.get('key'), 'old')
+        self.first.set('key', 'new')
+        self.first.bump_stamp()
+        self.assertEqual(self.second.get('key'), 'new')
+
+    def test_locks_taken_in_shared_cache(self):
+        """add решает общий кеш, а не копия процесса"""
+        self.assertTrue(self.first.add('lock', 1))
+        self.assertFalse(self.second.add('lock', 1))
+        self.first.delete('lock')
+        self.assertTrue(self.second.add('lock', 1))
+
+
+TWO_TIER_CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'two-tier',
+        'OPTIONS': {'SHARED': 'shared'},
+    },
+    'shared': {
+        'BACKEND': 'core.cache.InstrumentedLocMemCache',
+        'LOCATION': 'two-tier-shared',
+    },
+}
+
+
+@override_settings(CACHES={
+    **TWO_TIER_CACHES,
+    'default': {**TWO_TIER_CACHES['default'], 'LOCATION': 'two-tier-threads'},
+})
+class ThreadTests(SimpleTestCase):
+    def test_threads_share_local_tier(self):
+        """Бэкенд у каждого потока свой, а кеш процесса — общий"""
+        cache.clear()
+        caches['shared'].set('key', 'value')
+        backends = []
+
+        def read():
+            backend = caches['default']
+            backend.get('key')
+            backends.append(backend)
+
+        for _ in range(2):
+            thread = threading.Thread(target=read)
+            thread.start()
+            thread.join()
+        first, second = backends
+        self.assertIsNot(first, second)
+        stats = first.stats()
+        self.assertEqual(stats, second.stats())
+        self.assertEqual((stats['local_hits'], stats['shared_hits']), (1, 1))
+
+
+@override_settings(CACHES=TWO_TIER_CACHES)
+class BroadcastTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.author = User.objects.create_user(username='testauthor')
+
+    def setUp(self):
+        cache.clear()
+        # кеш процесса, о записях которого знает только общий кеш
+        self.other = two_tier(SHARED='shared', STAMP_INTERVAL=0)
+        self.other.set('key', 'value')
+        self.other.get('key')
+
+    def assert_other_dropped(self):
+        caches['shared'].set('key', 'new')
+        self.assertEqual(self.other.get('key'), 'new')
+
+    def test_writes_broadcast(self):
+        """Записи, комментарии и подписки сбрасывают копии процессов"""
+        writes = {
+            'запись': lambda: Post.objects.create(
+                author=self.author, text='Текст'
+            ),
+            'комментарий': lambda: Comment.objects.create(
+                post=Post.objects.first(), author=self.user, text='Текст'
+            ),
+            'подписка': lambda: Follow.objects.create(
+                user=self.user, author=self.author
+            ),
+        }
+        for name, write in writes.items():
+            with self.subTest(write=name):
+                self.other.set('key', 'value')
+                self.other.get('key')
+                write()
+                self.assert_other_dropped()
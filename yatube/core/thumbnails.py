@@ -0,0 +1,62 @@
+"""Адаптивные миниатюры: несколько ширин в WebP и AVIF поверх sorl.
+
+Для геометрии вида "960x339" строятся миниатюры ширин из
+THUMBNAIL_WIDTHS (не шире исходной геометрии, с теми же пропорциями) в
+каждом современном формате, который умеет сохранять Pillow, и в
+формате по умолчанию для старых браузеров. AVIF доступен в Pillow 11.2+
+или с пакетом pillow-avif-plugin.
+"""
+from django.conf import settings
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail import base as sorl_base
+
+try:
+    import pillow_avif  # noqa: F401 регистрирует AVIF в старых Pillow
+except ImportError:
+    pass
+
+MODERN_FORMATS = ('AVIF', 'WEBP')
+# sorl 12.7 не знает расширения для AVIF
+sorl_base.EXTENSIONS.setdefault('AVIF', 'avif')
+
+
+def modern_formats():
+    """Современные форматы, которые Pillow умеет сохранять"""
+    Image.init()
+    return [fmt for fmt in MODERN_FORMATS if fmt in Image.SAVE]
+
+
+def widths_for(width):
+    return [w for w in settings.THUMBNAIL_WIDTHS if w < width] + [width]
+
+
+def srcset(image, width, height, **options):
+    thumbnails = []
+    for variant_width in widths_for(width):
+        variant_height = round(height * variant_width / width)
+        thumbnail = get_thumbnail(
+            image, f'{variant_width}x{variant_height}', **options
+        )
+        thumbnails.append(f'{thumbnail.url} {variant_width}w')
+    return ', '.join(thumbnails), thumbnail.url
+
+
+def responsive_thumbnails(image, geometry, **options):
+    """Источники для <picture>: современные форматы и запасной srcset"""
+    width, height = (int(size) for size in geometry.split('x'))
+    sources = []
+    for fmt in modern_formats():
+        fmt_srcset, _ = srcset(
+            image, width, height, format=fmt,
+            quality=settings.THUMBNAIL_FORMAT_QUALITY[fmt], **options
+        )
+        sources.append({'type': f'image/{fmt.lower()}', 'srcset': fmt_srcset})
+    fallback_srcset, src = srcset(image, width, height, **options)
+    return {
+        'sources': sources,
+        'srcset': fallback_srcset,
+        'src': src,
+        'width': width,
+        'height': height,
+    }
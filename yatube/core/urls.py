@@ -0,0 +1,21 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+# Служебные страницы для сотрудников, подключаются перед админкой
+urlpatterns = [
+    path('profiles/', views.profile_list, name='profile_list'),
+    path(
+        'profiles/<str:profile_id>/',
+        views.profile_detail,
+        name='profile_detail'
+    ),
+    path(
+        'profiles/<str:profile_id>.prof',
+        views.profile_download,
+        name='profile_download'
+    ),
+    path('slow-queries/', views.slow_query_list, name='slow_query_list'),
+]
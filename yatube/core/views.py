@@ -1,5 +1,17 @@
+import io
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import render
 
+from . import media, profiling, slow_queries
+from .metrics import registry
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+PROFILE_TOP_FUNCTIONS = 60
+SLOW_QUERIES_SHOWN = 50
+
 
 def page_not_found(request, exception):
     # Переменная exception содержит отладочную информацию;
@@ -17,3 +29,79 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    """Метрики запросов в текстовом формате Prometheus"""
+    if (
+        not settings.METRICS_ENABLED
+        or request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS
+    ):
+        raise Http404
+    return HttpResponse(
+        registry.render(), content_type=PROMETHEUS_CONTENT_TYPE
+    )
+
+
+def _profile_path(profile_id, extension):
+    try:
+        return profiling.profile_path(profile_id, extension)
+    except ValueError:
+        raise Http404
+
+
+@staff_member_required
+def profile_list(request):
+    """Последние сохранённые профили запросов"""
+    return render(request, 'core/profile_list.html', {
+        'title': 'Профили запросов',
+        'profiles': profiling.recent_profiles(),
+    })
+
+
+@staff_member_required
+def profile_detail(request, profile_id):
+    """Самые дорогие функции профиля по накопленному времени"""
+    # pstats нужен только на этой странице: не грузим его при старте
+    import pstats
+
+    path = _profile_path(profile_id, 'prof')
+    output = io.StringIO()
+    try:
+        stats = pstats.Stats(path, stream=output)
+    except FileNotFoundError:
+        raise Http404
+    stats.sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+    return render(request, 'core/profile_detail.html', {
+        'title': f'Профиль {profile_id}',
+        'profile_id': profile_id,
+        'stats': output.getvalue(),
+    })
+
+
+@staff_member_required
+def profile_download(request, profile_id):
+    """Файл pstats для snakeviz, flameprof и подобных"""
+    try:
+        return FileResponse(
+            open(_profile_path(profile_id, 'prof'), 'rb'),
+            as_attachment=True,
+            filename=f'{profile_id}.prof',
+        )
+    except FileNotFoundError:
+        raise Http404
+
+
+@staff_member_required
+def slow_query_list(request):
+    """Медленные запросы процесса, самые затратные первыми"""
+    return render(request, 'core/slow_query_list.html', {
+        'title': 'Медленные запросы',
+        'queries': slow_queries.log.top(SLOW_QUERIES_SHOWN),
+        'threshold_ms': settings.SLOW_QUERY_THRESHOLD * 1000,
+    })
+
+
+def serve_media(request, path):
+    """Загруженные файлы: диапазоны, условные запросы, отдача прокси"""
+    return media.serve(request, path)
@@ -1,9 +1,21 @@
 from django.contrib import admin
 
+from .follow_graph import graph as follow_graph
 from .models import Comment, Follow, Group, Post
+from .paginator import KeysetPaginator
 
 
-class PostAdmin(admin.ModelAdmin):
+class LargeTableAdmin(admin.ModelAdmin):
+    """Список объектов большой таблицы за фиксированное число запросов:
+    без точного COUNT(*), без OFFSET по строкам и без выпадающих
+    списков со всеми связанными объектами."""
+    paginator = KeysetPaginator
+    show_full_result_count = False
+    ordering = ('-pk',)
+    sortable_by = ('pk',)
+
+
+class PostAdmin(LargeTableAdmin):
     list_display = (
         'pk',
         'text',
@@ -11,7 +23,8 @@ class PostAdmin(admin.ModelAdmin):
         'author',
         'group',
     )
-    list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
@@ -28,7 +41,7 @@ class GroupAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = (
         'pk',
         'post',
@@ -36,21 +49,34 @@ class CommentAdmin(admin.ModelAdmin):
         'text',
         'created',
     )
+    list_select_related = ('post', 'author')
+    autocomplete_fields = ('post', 'author')
     search_fields = ('text',)
     list_filter = ('created',)
     empty_value_display = '-пусто-'
 
 
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     list_display = (
         'pk',
         'user',
         'author',
     )
-    search_fields = ('user',)
-    list_filter = ('user',)
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
     empty_value_display = '-пусто-'
 
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        follow_graph.changed_on_commit(obj.user_id)
+
+    def delete_queryset(self, request, queryset):
+        user_ids = set(queryset.values_list('user_id', flat=True))
+        super().delete_queryset(request, queryset)
+        for user_id in user_ids:
+            follow_graph.changed_on_commit(user_id)
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
@@ -0,0 +1,151 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date
+
+from .models import Group, Post
+
+User = get_user_model()
+
+FEED_CACHE_KEY = 'posts:feed:{scope}'
+
+
+def feed_cache_key(scope):
+    return FEED_CACHE_KEY.format(scope=scope)
+
+
+def invalidate_feeds(author_id=None, group_ids=(), index=True):
+    """Сбрасывает закешированные ленты, в которые попадает запись:
+    общую, если index, автора и групп"""
+    scopes = ['index'] if index else []
+    if author_id is not None:
+        scopes.append(f'profile:{author_id}')
+    scopes.extend(
+        f'group:{group_id}' for group_id in group_ids if group_id is not None
+    )
+    cache.delete_many([feed_cache_key(scope) for scope in scopes])
+
+
+class CachedPostsFeed(Feed):
+    """Лента записей, тело которой хранится в кеше до изменения записей.
+
+    Под одним ключом кеша лежат все форматы ленты (RSS и Atom) для
+    каждого хоста, поэтому сброс ленты — это удаление одного ключа.
+    """
+    feed_format = 'rss'
+
+    def scope(self, obj):
+        raise NotImplementedError
+
+    def __call__(self, request, *args, **kwargs):
+        obj = self.get_object(request, *args, **kwargs)
+        key = feed_cache_key(self.scope(obj))
+        variant = (self.feed_format, request.get_host())
+        bodies = cache.get(key) or {}
+        if variant not in bodies:
+            feedgen = self.get_feed(obj, request)
+            last_modified = http_date(feedgen.latest_post_date().timestamp())
+            bodies[variant] = (
+                feedgen.content_type,
+                last_modified,
+                feedgen.writeString('utf-8'),
+            )
+            cache.set(key, bodies, settings.FEED_CACHE_TIMEOUT)
+        content_type, last_modified, content = bodies[variant]
+        response = HttpResponse(content, content_type=content_type)
+        response['Last-Modified'] = last_modified
+        return response
+
+    def item_title(self, post):
+        return str(post)
+
+    def item_description(self, post):
+        return post.text
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', args=(post.pk,))
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+
+class LatestPostsFeed(CachedPostsFeed):
+    title = 'Последние обновления на сайте'
+    description = 'Новые записи всех авторов Yatube'
+
+    def scope(self, obj):
+        return 'index'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def items(self):
+        return Post.objects.for_index()[:settings.FEED_ITEMS]
+
+
+class GroupPostsFeed(CachedPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def scope(self, group):
+        return f'group:{group.pk}'
+
+    def title(self, group):
+        return f'Записи сообщества {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', args=(group.slug,))
+
+    def items(self, group):
+        return Post.objects.for_group(group)[:settings.FEED_ITEMS]
+
+
+class ProfilePostsFeed(CachedPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def scope(self, author):
+        return f'profile:{author.pk}'
+
+    def title(self, author):
+        return f'Записи пользователя {author.get_full_name() or author}'
+
+    def description(self, author):
+        return self.title(author)
+
+    def link(self, author):
+        return reverse('posts:profile', args=(author.username,))
+
+    def items(self, author):
+        return Post.objects.for_author(author)[:settings.FEED_ITEMS]
+
+
+class AtomFeedMixin:
+    feed_format = 'atom'
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+
+class LatestPostsAtomFeed(AtomFeedMixin, LatestPostsFeed):
+    pass
+
+
+class GroupPostsAtomFeed(AtomFeedMixin, GroupPostsFeed):
+    pass
+
+
+class ProfilePostsAtomFeed(AtomFeedMixin, ProfilePostsFeed):
+    pass
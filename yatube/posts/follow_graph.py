@@ -0,0 +1,138 @@
+"""Граф подписок в памяти.
+
+Для каждого пользователя хранится отсортированный массив id авторов, на
+которых он подписан: array('I'), 4 байта на подписку. Массив лежит в
+словаре процесса и в общем кеше, а его актуальность проверяется по
+версии пользователя в общем кеше. Подписка и отписка меняют версию
+(обработчики posts.signals), и массив перечитывается из базы одним
+запросом по индексу. Проверка «A подписан на B» — бинарный поиск.
+"""
+import bisect
+import threading
+import uuid
+from array import array
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.cache import broadcast_invalidation
+
+from .models import Follow
+
+VERSION_KEY = 'posts:follows:{user_id}:version'
+ENTRY_KEY = 'posts:follows:{user_id}'
+
+
+def version_key(user_id):
+    return VERSION_KEY.format(user_id=user_id)
+
+
+def entry_key(user_id):
+    return ENTRY_KEY.format(user_id=user_id)
+
+
+class FollowGraph:
+    """Подписки пользователей процесса, не больше FOLLOW_GRAPH_LOCAL_USERS
+    последних запрошенных пользователей"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = OrderedDict()
+
+    def _remember(self, user_id, version, authors):
+        with self._lock:
+            self._local[user_id] = (version, authors)
+            self._local.move_to_end(user_id)
+            while len(self._local) > settings.FOLLOW_GRAPH_LOCAL_USERS:
+                self._local.popitem(last=False)
+
+    def _local_authors(self, user_id, version):
+        with self._lock:
+            entry = self._local.get(user_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._local.move_to_end(user_id)
+            return entry[1]
+
+    def cached_following(self, user_id):
+        """Авторы, на которых подписан пользователь, или None, если их
+        нет в кеше и нужно читать базу"""
+        version = cache.get(version_key(user_id))
+        if version is None:
+            return None
+        authors = self._local_authors(user_id, version)
+        if authors is not None:
+            return authors
+        entry = cache.get(entry_key(user_id))
+        if entry is None or entry[0] != version:
+            return None
+        authors = array('I')
+        authors.frombytes(entry[1])
+        self._remember(user_id, version, authors)
+        return authors
+
+    def load(self, user_id):
+        """Читает подписки из базы и кладёт их в оба кеша"""
+        # версия берётся до чтения базы: если подписки изменятся во
+        # время чтения, сохранённый массив сразу окажется устаревшим
+        version = self.version(user_id)
+        authors = array('I', (
+            Follow.objects.filter(user_id=user_id)
+            .order_by('author_id')
+            .values_list('author_id', flat=True)
+        ))
+        cache.set(
+            entry_key(user_id),
+            (version, authors.tobytes()),
+            settings.FOLLOW_GRAPH_TIMEOUT,
+        )
+        self._remember(user_id, version, authors)
+        return authors
+
+    def version(self, user_id):
+        """Версия подписок пользователя; меняется при каждом изменении"""
+        version = cache.get(version_key(user_id))
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(
+                version_key(user_id), version, settings.FOLLOW_GRAPH_TIMEOUT
+            ):
+                version = cache.get(version_key(user_id), version)
+        return version
+
+    def following(self, user_id):
+        authors = self.cached_following(user_id)
+        if authors is None:
+            authors = self.load(user_id)
+        return authors
+
+    def follows(self, user_id, author_id):
+        """Подписан ли пользователь на автора"""
+        authors = self.following(user_id)
+        index = bisect.bisect_left(authors, author_id)
+        return index < len(authors) and authors[index] == author_id
+
+    def changed(self, user_id):
+        """Помечает подписки пользователя устаревшими во всех процессах"""
+        cache.set(
+            version_key(user_id),
+            uuid.uuid4().hex,
+            settings.FOLLOW_GRAPH_TIMEOUT,
+        )
+        broadcast_invalidation()
+
+    def changed_on_commit(self, user_id):
+        """То же, что changed, и ещё раз после коммита транзакции:
+        процесс, прочитавший подписки до коммита, иначе сохранил бы
+        старый массив под новой версией"""
+        self.changed(user_id)
+        transaction.on_commit(lambda: self.changed(user_id))
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+
+graph = FollowGraph()
@@ -0,0 +1,90 @@
+"""Поиск автора по имени и группы по адресу через кеш.
+
+Найденный объект хранится в кеше кортежем полей, которые нужны
+страницам, а отсутствие — коротким отрицательным значением: запросы к
+несуществующим профилям и группам тоже не доходят до базы. Записи
+сбрасываются при переименовании и удалении (обработчики posts.signals).
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+
+from .models import Group
+from .post_cache import as_loaded
+
+User = get_user_model()
+
+AUTHOR_KEY = 'posts:author:{digest}'
+GROUP_KEY = 'posts:group:{digest}'
+# в кеше нельзя хранить None: его не отличить от промаха
+NOT_FOUND = ()
+
+
+def _digest(value):
+    # в адресе может оказаться что угодно, а ключ memcached — только ASCII
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def author_key(username):
+    return AUTHOR_KEY.format(digest=_digest(username))
+
+
+def group_key(slug):
+    return GROUP_KEY.format(digest=_digest(slug))
+
+
+def _resolve(key, load):
+    entry = cache.get(key)
+    if entry is None:
+        entry = load()
+        if entry is NOT_FOUND:
+            timeout = settings.LOOKUP_NOT_FOUND_TIMEOUT
+        else:
+            timeout = settings.LOOKUP_CACHE_TIMEOUT
+        cache.set(key, entry, timeout)
+    if entry == NOT_FOUND:
+        raise Http404
+    return entry
+
+
+def get_author_or_404(username):
+    """Автор с полями id, username, first_name и last_name"""
+    def load():
+        row = User.objects.filter(username=username).values_list(
+            'pk', 'username', 'first_name', 'last_name'
+        ).first()
+        return row or NOT_FOUND
+
+    pk, username, first_name, last_name = _resolve(
+        author_key(username), load
+    )
+    return as_loaded(User(
+        pk=pk,
+        username=username,
+        first_name=first_name,
+        last_name=last_name,
+    ))
+
+
+def get_group_or_404(slug):
+    def load():
+        row = Group.objects.filter(slug=slug).values_list(
+            'pk', 'slug', 'title', 'description'
+        ).first()
+        return row or NOT_FOUND
+
+    pk, slug, title, description = _resolve(group_key(slug), load)
+    return as_loaded(
+        Group(pk=pk, slug=slug, title=title, description=description)
+    )
+
+
+def invalidate_author(*usernames):
+    cache.delete_many([author_key(name) for name in usernames if name])
+
+
+def invalidate_group(*slugs):
+    cache.delete_many([group_key(slug) for slug in slugs if slug])
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.sitemaps import build_sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает статические куски карты сайта, '
+        'в которых изменились записи'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--domain', default=settings.SITEMAP_DOMAIN,
+            help='Домен для адресов в карте сайта',
+        )
+        parser.add_argument(
+            '--protocol', default=settings.SITEMAP_PROTOCOL,
+            help='Протокол для адресов в карте сайта',
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Перестроить все куски, не сверяясь с манифестом',
+        )
+
+    def handle(self, *args, **options):
+        rebuilt, removed = build_sitemaps(
+            options['domain'], options['protocol'], full=options['full']
+        )
+        self.stdout.write(
+            f'Перестроено кусков: {len(rebuilt)}, удалено: {len(removed)}'
+        )
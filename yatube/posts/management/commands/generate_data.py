@@ -0,0 +1,206 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# показатель распределения Парето: чем меньше, тем сильнее перекос
+# в сторону «горячих» авторов
+PARETO_ALPHA = 1.2
+NULL_GROUP_SHARE = 0.3
+TEXT_POOL_SIZE = 500
+
+
+@contextmanager
+def explicit_pub_dates():
+    """Позволяет задать pub_date при bulk_create вместо текущего времени"""
+    field = Post._meta.get_field('pub_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def bulk_insert(model, objects, batch_size):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, записями, '
+        'комментариями и подписками с перекосом в сторону популярных авторов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней разбросать даты записей')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--prefix', default='bench',
+                            help='Префикс имён пользователей и слагов групп')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.faker = Faker('ru_RU')
+        if options['seed'] is not None:
+            self.faker.seed_instance(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+        self.texts = [
+            self.faker.paragraph(nb_sentences=5)
+            for _ in range(TEXT_POOL_SIZE)
+        ]
+        self.sentences = [
+            self.faker.sentence() for _ in range(TEXT_POOL_SIZE)
+        ]
+
+        with transaction.atomic():
+            user_ids = self.create_users(options['users'])
+            group_ids = self.create_groups(options['groups'])
+            weights = self.popularity(len(user_ids))
+            post_ids = self.create_posts(
+                options['posts'], user_ids, weights, group_ids,
+                options['days']
+            )
+            self.create_comments(options['comments'], user_ids, post_ids)
+            self.create_follows(options['follows'], user_ids, weights)
+        if options['verbosity']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Создано: пользователей {len(user_ids)}, групп '
+                f'{len(group_ids)}, записей {len(post_ids)}'
+            ))
+
+    def popularity(self, size):
+        """Вес каждого пользователя по закону Парето"""
+        return [
+            self.random.paretovariate(PARETO_ALPHA) for _ in range(size)
+        ]
+
+    def create_users(self, number):
+        users = (
+            User(
+                username=f'{self.prefix}{i}',
+                first_name=self.faker.first_name(),
+                last_name=self.faker.last_name(),
+                password='!',
+            )
+            for i in range(number)
+        )
+        bulk_insert(User, users, self.batch_size)
+        return list(
+            User.objects
+            .filter(username__startswith=self.prefix)
+            .values_list('pk', flat=True)
+        )
+
+    def create_groups(self, number):
+        groups = (
+            Group(
+                title=self.faker.catch_phrase(),
+                slug=f'{self.prefix}-group-{i}',
+                description=self.random.choice(self.texts),
+            )
+            for i in range(number)
+        )
+        bulk_insert(Group, groups, self.batch_size)
+        return list(
+            Group.objects
+            .filter(slug__startswith=f'{self.prefix}-group-')
+            .values_list('pk', flat=True)
+        )
+
+    def create_posts(self, number, user_ids, weights, group_ids, days):
+        now = timezone.now()
+        first_id = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        authors = self.random.choices(user_ids, weights, k=number)
+        # даты по возрастанию, чтобы порядок pk совпадал с порядком дат
+        offsets = sorted(
+            (self.random.uniform(0, days) for _ in range(number)),
+            reverse=True
+        )
+        posts = (
+            Post(
+                author_id=author_id,
+                group_id=(
+                    None if not group_ids
+                    or self.random.random() < NULL_GROUP_SHARE
+                    else self.random.choice(group_ids)
+                ),
+                text=self.random.choice(self.texts),
+                pub_date=now - timedelta(days=offset),
+            )
+            for author_id, offset in zip(authors, offsets)
+        )
+        with explicit_pub_dates():
+            bulk_insert(Post, posts, self.batch_size)
+        return list(
+            Post.objects
+            .filter(pk__gt=first_id)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+
+    def create_comments(self, number, user_ids, post_ids):
+        if not post_ids:
+            return
+        last = len(post_ids) - 1
+
+        def hot_post():
+            # свежие записи комментируют чаще старых
+            age = int(self.random.paretovariate(PARETO_ALPHA)) - 1
+            return post_ids[max(0, last - age % len(post_ids))]
+
+        comments = (
+            Comment(
+                post_id=hot_post(),
+                author_id=self.random.choice(user_ids),
+                text=self.random.choice(self.sentences),
+            )
+            for _ in range(number)
+        )
+        bulk_insert(Comment, comments, self.batch_size)
+
+    def create_follows(self, number, user_ids, weights):
+        if len(user_ids) < 2:
+            return
+        number = min(number, len(user_ids) * (len(user_ids) - 1))
+        cum_weights = list(accumulate(weights))
+        edges = set()
+        attempts = 0
+        while len(edges) < number and attempts < number * 10:
+            attempts += 1
+            user_id = self.random.choice(user_ids)
+            author_id = self.random.choices(
+                user_ids, cum_weights=cum_weights
+            )[0]
+            if user_id != author_id:
+                edges.add((user_id, author_id))
+        follows = (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in edges
+        )
+        bulk_insert(Follow, follows, self.batch_size)
@@ -0,0 +1,68 @@
+import os
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from posts.models import Post
+
+
+def stored_files(storage, directory):
+    """Все файлы каталога хранилища, рекурсивно"""
+    directories, files = storage.listdir(directory)
+    for name in files:
+        yield os.path.join(directory, name)
+    for subdirectory in directories:
+        yield from stored_files(storage, os.path.join(directory, subdirectory))
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает, сколько места экономит хранение одинаковых картинок '
+        'записей в одном файле, и находит файлы без ссылок'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delete-orphans', action='store_true',
+            help='Удалить файлы, на которые не ссылается ни одна запись',
+        )
+
+    def handle(self, *args, **options):
+        field = Post._meta.get_field('image')
+        storage = field.storage
+        references = dict(
+            Post.objects.exclude(image='')
+            .values_list('image')
+            .annotate(number=Count('pk'))
+            .order_by()
+        )
+        stored = logical = 0
+        missing = []
+        for name, number in references.items():
+            if not storage.exists(name):
+                missing.append(name)
+                continue
+            size = storage.size(name)
+            stored += size
+            logical += size * number
+        orphans = []
+        if storage.exists(field.upload_to):
+            orphans = [
+                name for name in stored_files(storage, field.upload_to)
+                if name not in references
+            ]
+        orphan_size = sum(storage.size(name) for name in orphans)
+        if options['delete_orphans']:
+            for name in orphans:
+                storage.delete(name)
+        lines = (
+            f'Записей с картинками: {sum(references.values())}',
+            f'Уникальных файлов: {len(references) - len(missing)}',
+            f'Без дедупликации: {logical} Б',
+            f'Занято: {stored} Б',
+            f'Сэкономлено: {logical - stored} Б',
+            f'Файлов без ссылок: {len(orphans)} ({orphan_size} Б)'
+            + (', удалены' if options['delete_orphans'] else ''),
+            f'Ссылок на отсутствующие файлы: {len(missing)}',
+        )
+        self.stdout.write('\n'.join(lines))
@@ -0,0 +1,152 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from math import ceil
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from core.cache import is_process_local
+from posts.models import Group, Post
+from posts.paginator import NUMBER_OF_POSTS_PER_PAGE
+
+
+class RateLimiter:
+    """Пропускает не больше rate вызовов wait() в секунду на все потоки"""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+        time.sleep(start - now)
+
+
+def warm_urls(pages, authors, posts):
+    """Адреса первых страниц главной, всех групп, профилей самых
+    пишущих авторов и свежих записей"""
+    index_pages = min(
+        pages, ceil(Post.objects.count() / NUMBER_OF_POSTS_PER_PAGE)
+    )
+    # первую страницу открывают без номера, а он входит в ключ кеша страницы
+    if index_pages:
+        yield reverse('posts:index')
+    for page in range(2, index_pages + 1):
+        yield reverse('posts:index') + f'?page={page}'
+    for slug in Group.objects.values_list('slug', flat=True).order_by('pk'):
+        yield reverse('posts:group_list', args=(slug,))
+    top_authors = (
+        Post.objects.values_list('author__username')
+        .annotate(number=Count('pk'))
+        .order_by('-number')[:authors]
+    )
+    for username, number in top_authors:
+        yield reverse('posts:profile', args=(username,))
+    for pk in Post.objects.values_list('pk', flat=True)[:posts]:
+        yield reverse('posts:post_detail', args=(pk,))
+
+
+def warm_pages(urls, limiter, host, secure, failed):
+    """Запрашивает адреса из очереди, пока она не опустеет; неудачные
+    дописывает в failed"""
+    client = Client(HTTP_HOST=host)
+    try:
+        while True:
+            try:
+                url = urls.get_nowait()
+            except queue.Empty:
+                return
+            limiter.wait()
+            try:
+                response = client.get(url, secure=secure)
+            except Exception as error:
+                failed.append(f'{url}: {error}')
+                continue
+            if response.status_code != 200:
+                failed.append(f'{url}: {response.status_code}')
+    finally:
+        # у каждого потока своё соединение с базой
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет кеш после выкладки: запрашивает главную, ленты групп, '
+        'профили и свежие записи так же, как их запросил бы аноним. '
+        'Нужен общий для процессов кеш (memcached, Redis): страницы '
+        'попадают в кеш самой команды, а не процессов сервера'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=5,
+            help='Сколько первых страниц главной прогреть',
+        )
+        parser.add_argument(
+            '--authors', type=int, default=50,
+            help='Профили скольких самых пишущих авторов прогреть',
+        )
+        parser.add_argument(
+            '--posts', type=int, default=100,
+            help='Сколько свежих записей прогреть',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Число потоков',
+        )
+        parser.add_argument(
+            '--rate', type=float, default=20,
+            help='Не больше стольких запросов в секунду, 0 — без ограничения',
+        )
+        parser.add_argument(
+            '--host', default=settings.SITEMAP_DOMAIN,
+            help='Хост, под которым страницы попадут в кеш',
+        )
+        parser.add_argument(
+            '--allow-local-cache', action='store_true',
+            help='Прогреть кеш, который живёт только в этом процессе',
+        )
+
+    def handle(self, *args, **options):
+        if is_process_local() and not options['allow_local_cache']:
+            raise CommandError(
+                'Кеш по умолчанию живёт в памяти процесса: прогретые '
+                'страницы исчезнут вместе с командой. Настройте общий кеш '
+                '(memcached, Redis) в CACHES или передайте '
+                '--allow-local-cache'
+            )
+        urls = queue.SimpleQueue()
+        total = 0
+        for url in warm_urls(
+            options['pages'], options['authors'], options['posts']
+        ):
+            urls.put(url)
+            total += 1
+        limiter = RateLimiter(options['rate'])
+        # ключ кеша страницы включает хост и схему адреса
+        secure = settings.SITEMAP_PROTOCOL == 'https'
+        failed = []
+        started = time.monotonic()
+        with ThreadPoolExecutor(options['workers']) as executor:
+            for _ in range(options['workers']):
+                executor.submit(
+                    warm_pages, urls, limiter, options['host'], secure, failed
+                )
+        elapsed = time.monotonic() - started
+        for line in failed:
+            self.stderr.write(line)
+        if options['verbosity'] > 0:
+            self.stdout.write(
+                f'Прогрето страниц: {total - len(failed)} из {total} '
+                f'за {elapsed:.1f} с'
+            )
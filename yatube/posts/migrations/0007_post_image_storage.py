@@ -0,0 +1,19 @@
+# Generated by Django 2.2.28 on 2026-10-19 11:06
+
+import core.storages
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_auto_20220526_1827'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=core.storages.ContentAddressedStorage(), upload_to='posts/', verbose_name='Картинка'),
+        ),
+    ]
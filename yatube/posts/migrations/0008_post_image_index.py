@@ -0,0 +1,19 @@
+# Generated by Django 2.2.28 on 2026-10-19 12:10
+
+import core.storages
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_image_storage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, db_index=True, storage=core.storages.ContentAddressedStorage(), upload_to='posts/', verbose_name='Картинка'),
+        ),
+    ]
@@ -1,10 +1,34 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from core.storages import ContentAddressedStorage
+
 User = get_user_model()
 CHARECTERS_IN_POSTS_STR = 15
 
 
+class PostQuerySet(models.QuerySet):
+    """Выборки записей для лент: страниц сайта, RSS/Atom и карты сайта"""
+
+    def with_related(self):
+        return self.select_related('author', 'group')
+
+    def for_index(self):
+        return self.with_related()
+
+    def for_group(self, group):
+        return self.with_related().filter(group=group)
+
+    def for_author(self, author):
+        return self.with_related().filter(author=author)
+
+    def for_follower(self, user):
+        return self.with_related().filter(author__following__user=user)
+
+    def for_authors(self, author_ids):
+        return self.with_related().filter(author_id__in=author_ids)
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст поста',
@@ -33,9 +57,24 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        storage=ContentAddressedStorage(),
+        blank=True,
+        # по имени файла считаются ссылки на него перед удалением
+        db_index=True
     )
 
+    objects = PostQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # запоминаем группу, с которой запись была загружена из базы,
+        # чтобы при её смене сбросить кеши и старой группы
+        instance._loaded_group_id = instance.__dict__.get('group_id')
+        # и картинку: файл, на который больше никто не ссылается, удаляется
+        instance._loaded_image = instance.__dict__.get('image')
+        return instance
+
     def __str__(self):
         return self.text[:CHARECTERS_IN_POSTS_STR]
 
@@ -1,11 +1,238 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, transaction
+from django.db.models.query import QuerySet
+from django.utils.functional import cached_property
+
+from core.cache import shared_cache
 
 NUMBER_OF_POSTS_PER_PAGE = 10
+KEYSET_BOUNDARY_TIMEOUT = 60
+COUNT_KEY = 'posts:count:{scope}'
+COUNT_GENERATION_KEY = 'posts:count:generation'
+
+ROW_ESTIMATE_SQL = {
+    'postgresql': (
+        'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass'
+    ),
+    'mysql': (
+        'SELECT table_rows FROM information_schema.tables '
+        'WHERE table_schema = DATABASE() AND table_name = %s'
+    ),
+    # статистика появляется только после ANALYZE
+    'sqlite': 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+}
 
 
-def make_paginator(request, posts):
-    """Функция делит список записей для отображения на странице"""
-    paginator = Paginator(posts, NUMBER_OF_POSTS_PER_PAGE)
+def make_paginator(request, posts, count_key=None, counter=None):
+    """Функция делит список записей для отображения на странице.
+
+    С count_key число записей берётся из кеша, а counter() считает его
+    сам (CachedCountPaginator).
+    """
+    paginator = CachedCountPaginator(
+        posts, NUMBER_OF_POSTS_PER_PAGE, count_key=count_key, counter=counter
+    )
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def count_key(scope):
+    return COUNT_KEY.format(scope=scope)
+
+
+def index_count_key():
+    return count_key('index')
+
+
+def group_count_key(group_id):
+    return count_key(f'group:{group_id}')
+
+
+def author_count_key(author_id):
+    return count_key(f'author:{author_id}')
+
+
+def adjust_counts(keys, delta):
+    """Меняет закешированные количества на delta; отсутствующие в кеше
+    посчитаются заново при следующем показе.
+
+    Вызывается после коммита: до него поправку увидели бы читатели, а
+    откат оставил бы её в кеше.
+    """
+    # сначала поколение: подсчёт, который шёл одновременно с коммитом и
+    # не нашёл здесь ключа, увидит новое поколение и не сохранится
+    shared_cache().set(
+        COUNT_GENERATION_KEY, uuid.uuid4().hex, settings.COUNT_CACHE_TIMEOUT
+    )
+    for key in keys:
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            pass
+
+
+def adjust_counts_on_commit(keys, delta):
+    transaction.on_commit(lambda: adjust_counts(keys, delta))
+
+
+def store_counts(values, generation):
+    """Кеширует посчитанные количества, если за время подсчёта ни одна
+    поправка не прошла мимо них"""
+    for key, value in values.items():
+        cache.add(key, value, settings.COUNT_CACHE_TIMEOUT)
+    if shared_cache().get(COUNT_GENERATION_KEY) != generation:
+        cache.delete_many(list(values))
+
+
+def cached_count(key, count):
+    """Количество из кеша; при промахе вызывает count() и кеширует"""
+    value = cache.get(key)
+    if value is None:
+        generation = shared_cache().get(COUNT_GENERATION_KEY)
+        value = count()
+        store_counts({key: value}, generation)
+    return value
+
+
+def cached_counts(keys, count_missing):
+    """Количества из кеша по словарю {ключ: id}; для отсутствующих
+    вызывает count_missing(ids), который возвращает {id: количество}"""
+    values = cache.get_many(list(keys))
+    missing = {key: keys[key] for key in keys if key not in values}
+    if missing:
+        generation = shared_cache().get(COUNT_GENERATION_KEY)
+        counted = count_missing(list(missing.values()))
+        fresh = {
+            key: counted.get(object_id, 0)
+            for key, object_id in missing.items()
+        }
+        store_counts(fresh, generation)
+        values.update(fresh)
+    return values
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор, который берёт число записей из кеша по count_key или
+    у функции counter.
+
+    Количества поддерживаются обработчиками posts.signals при создании,
+    удалении и переносе записей между группами; COUNT(*) выполняется
+    только при промахе кеша.
+    """
+
+    def __init__(self, *args, count_key=None, counter=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_key = count_key
+        self.counter = counter
+
+    @cached_property
+    def count(self):
+        if self.counter is not None:
+            return self.counter()
+        if self.count_key is None:
+            return super().count
+        return cached_count(self.count_key, self._count_rows)
+
+    def _count_rows(self):
+        return super().count
+
+
+def estimate_table_rows(queryset):
+    """Оценка числа строк таблицы по статистике СУБД, без COUNT(*)"""
+    connection = connections[queryset.db]
+    sql = ROW_ESTIMATE_SQL.get(connection.vendor)
+    if sql is None:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    # в sqlite_stat1 первое число строки stat — количество записей
+    return int(str(row[0]).split()[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, который не считает строки большой таблицы целиком.
+
+    Для выборки без фильтров берёт оценку из статистики СУБД, если она
+    больше ESTIMATED_COUNT_THRESHOLD; иначе делает обычный COUNT(*).
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimate_table_rows(queryset)
+            if (
+                estimate is not None
+                and estimate >= settings.ESTIMATED_COUNT_THRESHOLD
+            ):
+                return estimate
+        return super().count
+
+
+class KeysetPaginator(EstimatedCountPaginator):
+    """Пагинатор для выборок, упорядоченных только по первичному ключу.
+
+    Последний pk каждой отданной страницы запоминается в кеше, и следующая
+    страница выбирается условием pk < границы вместо OFFSET. Если границы
+    нет, она ищется смещением по одному столбцу pk — по индексу, без
+    чтения самих строк. Прочие выборки листаются как обычно.
+    """
+
+    @cached_property
+    def _descending(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return None
+        ordering = list(queryset.query.order_by)
+        pk_name = queryset.model._meta.pk.name
+        if ordering in (['-pk'], [f'-{pk_name}']):
+            return True
+        if ordering in (['pk'], [pk_name]):
+            return False
+        return None
+
+    def _boundary_key(self, number):
+        query = str(self.object_list.query).encode()
+        digest = hashlib.md5(query).hexdigest()
+        return f'keyset:{digest}:{self.per_page}:{number}'
+
+    def _find_boundary(self, number):
+        """pk последней записи на странице number"""
+        boundary = cache.get(self._boundary_key(number))
+        if boundary is None:
+            offset = number * self.per_page - 1
+            pks = self.object_list.values_list('pk', flat=True)
+            boundary = next(iter(pks[offset:offset + 1]), None)
+        return boundary
+
+    def page(self, number):
+        if self._descending is None:
+            return super().page(number)
+        number = self.validate_number(number)
+        queryset = self.object_list
+        if number > 1:
+            boundary = self._find_boundary(number - 1)
+            if boundary is None:
+                return self._get_page([], number, self)
+            lookup = 'pk__lt' if self._descending else 'pk__gt'
+            queryset = queryset.filter(**{lookup: boundary})
+        object_list = list(queryset[:self.per_page])
+        if object_list:
+            cache.set(
+                self._boundary_key(number),
+                object_list[-1].pk,
+                KEYSET_BOUNDARY_TIMEOUT
+            )
+        return self._get_page(object_list, number, self)
@@ -0,0 +1,122 @@
+"""Кеш записей для лент.
+
+Ленты читают из базы только id записей страницы, а сами записи берут
+из кеша одним get_many. В кеше запись хранится кортежем полей, которые
+нужны шаблонам лент: текст, дата, картинка, имя автора, адрес и
+название группы. Из кортежа собираются обычные объекты Post, User и
+Group — они годятся для показа, но не для сохранения.
+
+Запись сбрасывается при её сохранении и удалении, а также при
+изменении её группы или автора (обработчики posts.signals).
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import Group, Post
+
+User = get_user_model()
+
+POST_KEY = 'posts:post:{pk}'
+# поля автора, от которых зависит закешированная запись
+AUTHOR_FIELDS = frozenset(('username', 'first_name', 'last_name'))
+INVALIDATE_BATCH_SIZE = 1000
+
+
+def post_key(pk):
+    return POST_KEY.format(pk=pk)
+
+
+def serialize(post):
+    group = post.group
+    return (
+        post.text,
+        post.pub_date,
+        post.image.name,
+        post.author_id,
+        post.author.username,
+        post.author.first_name,
+        post.author.last_name,
+        post.group_id,
+        group.slug if group else None,
+        group.title if group else None,
+    )
+
+
+def as_loaded(instance):
+    """Помечает собранный из кеша объект как прочитанный из базы"""
+    instance._state.adding = False
+    instance._state.db = DEFAULT_DB_ALIAS
+    return instance
+
+
+def hydrate(pk, entry):
+    (
+        text, pub_date, image, author_id, username, first_name, last_name,
+        group_id, slug, title,
+    ) = entry
+    post = Post(pk=pk, text=text, pub_date=pub_date, image=image)
+    post.author = as_loaded(User(
+        pk=author_id,
+        username=username,
+        first_name=first_name,
+        last_name=last_name,
+    ))
+    if group_id is not None:
+        post.group = as_loaded(Group(pk=group_id, slug=slug, title=title))
+    return as_loaded(post)
+
+
+def get_many(ids):
+    """Записи с id из списка в том же порядке; отсутствующие в кеше
+    читаются из базы одним запросом и кешируются"""
+    found = cache.get_many([post_key(pk) for pk in ids])
+    posts = {}
+    missing = []
+    for pk in ids:
+        entry = found.get(post_key(pk))
+        if entry is None:
+            missing.append(pk)
+        else:
+            posts[pk] = hydrate(pk, entry)
+    if missing:
+        loaded = Post.objects.with_related().in_bulk(missing)
+        cache.set_many(
+            {post_key(pk): serialize(post) for pk, post in loaded.items()},
+            settings.POST_CACHE_TIMEOUT,
+        )
+        posts.update(loaded)
+    return [posts[pk] for pk in ids if pk in posts]
+
+
+def invalidate_posts(ids):
+    ids = iter(ids)
+    while True:
+        batch = list(islice(ids, INVALIDATE_BATCH_SIZE))
+        if not batch:
+            return
+        cache.delete_many([post_key(pk) for pk in batch])
+
+
+class CachedPostList:
+    """Выборка записей для Paginator: из базы читаются только id
+    записей страницы, сами записи — из кеша"""
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    def count(self):
+        return self.queryset.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        return get_many(list(
+            self.queryset.values_list('pk', flat=True)[index]
+        ))
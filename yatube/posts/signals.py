@@ -0,0 +1,214 @@
+import logging
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from core.cache import broadcast_invalidation
+from core.storages import content_lock, forget_reused, is_reused
+from core.surrogate import purge
+
+from .feeds import invalidate_feeds
+from .follow_graph import graph as follow_graph
+from .lookups import invalidate_author, invalidate_group
+from .models import Comment, Follow, Group, Post
+from .paginator import (
+    adjust_counts_on_commit, author_count_key, group_count_key,
+    index_count_key,
+)
+from .post_cache import AUTHOR_FIELDS, invalidate_posts
+from .surrogate_keys import (
+    author_key, group_key, post_changed_keys, post_key,
+)
+from .timelines import invalidate_timeline
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+# поля группы, которые выводятся в её ленте RSS/Atom
+GROUP_FEED_FIELDS = ('slug', 'title', 'description')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    """Сбрасывает кеши, которые зависят от изменившейся записи"""
+    group_ids = {
+        instance.group_id,
+        getattr(instance, '_loaded_group_id', None),
+    }
+    invalidate_feeds(instance.author_id, group_ids)
+    invalidate_posts([instance.pk])
+    broadcast_invalidation()
+    purge(post_changed_keys(instance, group_ids))
+
+
+# удаление комментариев бывает только в админке: им хватит s-maxage
+@receiver(post_save, sender=Comment)
+def comment_added(sender, instance, **kwargs):
+    broadcast_invalidation()
+    purge([post_key(instance.post_id)])
+
+
+def count_keys(post):
+    """Ключи закешированных количеств всех лент, в которые попадает
+    запись: общей, группы и автора. Количество ленты подписок
+    складывается из количеств авторов при показе"""
+    keys = [index_count_key(), author_count_key(post.author_id)]
+    if post.group_id is not None:
+        keys.append(group_count_key(post.group_id))
+    return keys
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_added_or_removed(sender, instance, created=None, **kwargs):
+    if created is False:
+        # правка не меняет времени публикации и места записи в ленте
+        # автора, но может перенести запись в другую группу
+        old_group_id = getattr(instance, '_loaded_group_id', None)
+        if old_group_id != instance.group_id:
+            if old_group_id is not None:
+                adjust_counts_on_commit([group_count_key(old_group_id)], -1)
+            if instance.group_id is not None:
+                adjust_counts_on_commit(
+                    [group_count_key(instance.group_id)], 1
+                )
+            instance._loaded_group_id = instance.group_id
+        return
+    invalidate_timeline(instance.author_id)
+    adjust_counts_on_commit(count_keys(instance), 1 if created else -1)
+    # дальнейшие правки этого объекта сравниваются с группой при создании
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_fields(sender, instance, **kwargs):
+    # старый адрес нужен, чтобы при смене сбросить и его, а заголовок и
+    # описание — чтобы сбросить ленту группы, где они выводятся
+    if instance.pk is not None:
+        instance._old_group_fields = Group.objects.filter(
+            pk=instance.pk
+        ).values(*GROUP_FEED_FIELDS).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, created=False, **kwargs):
+    old = getattr(instance, '_old_group_fields', None) or {}
+    # до удаления: после него у записей группы уже пустое поле group
+    invalidate_group(instance.slug, old.get('slug'))
+    invalidate_posts(
+        Post.objects.filter(group=instance).values_list('pk', flat=True)
+    )
+    if not created:
+        if any(
+            old.get(field) != getattr(instance, field)
+            for field in GROUP_FEED_FIELDS
+        ):
+            invalidate_feeds(group_ids=[instance.pk], index=False)
+        broadcast_invalidation()
+        purge([group_key(instance.pk)])
+
+
+@receiver(pre_save, sender=User)
+def remember_author_fields(sender, instance, update_fields, **kwargs):
+    # прежние имя и адрес профиля: по ним видно, изменилось ли то, что
+    # показывается в записях автора, а старый адрес нужно сбросить
+    if instance.pk is None or (
+        update_fields and not AUTHOR_FIELDS & update_fields
+    ):
+        return
+    instance._old_author_fields = User.objects.filter(
+        pk=instance.pk
+    ).values(*AUTHOR_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, created, update_fields, **kwargs):
+    # вход пользователя сохраняет только last_login
+    if update_fields and not AUTHOR_FIELDS & update_fields:
+        return
+    old = None if created else getattr(instance, '_old_author_fields', None)
+    # смена пароля и сохранение в админке пишут все поля, но имени не
+    # меняют: записи автора сбрасывать незачем
+    if old is not None and all(
+        old[field] == getattr(instance, field) for field in AUTHOR_FIELDS
+    ):
+        return
+    # новое имя могло попасть в кеш как отсутствующее
+    invalidate_author(
+        instance.username, old['username'] if old is not None else None
+    )
+    if not created:
+        invalidate_posts(
+            Post.objects.filter(author=instance).values_list('pk', flat=True)
+        )
+        # имя автора выводится в каждой записи лент, куда они попадают
+        invalidate_feeds(instance.pk, (
+            Post.objects.filter(author=instance)
+            .order_by()
+            .values_list('group_id', flat=True)
+            .distinct()
+        ))
+        broadcast_invalidation()
+        purge([author_key(instance.pk)])
+
+
+@receiver(post_delete, sender=User)
+def author_deleted(sender, instance, **kwargs):
+    invalidate_author(instance.username)
+    broadcast_invalidation()
+
+
+# на удаление подписок обработчика нет: он превратил бы быстрое удаление
+# в отписке в SELECT и DELETE. Отписка и админка сбрасывают граф сами,
+# а подписки на удалённых пользователей графу не мешают
+@receiver(post_save, sender=Follow)
+def follow_changed(sender, instance, created, **kwargs):
+    if created:
+        follow_graph.changed_on_commit(instance.user_id)
+
+
+def release_image(name):
+    """Удаляет файл картинки и его миниатюры, если на него больше не
+    ссылается ни одна запись: одинаковые загрузки делят один файл"""
+    if not name:
+        return
+    # под блокировкой имени повторная загрузка того же файла не пройдёт
+    # между проверкой и удалением
+    with content_lock(name):
+        if Post.objects.filter(image=name).exists() or is_reused(name):
+            return
+        storage = Post._meta.get_field('image').storage
+        try:
+            delete_thumbnails(ImageFile(name, storage=storage))
+        except SuspiciousFileOperation:
+            logger.warning(
+                'Картинка %s лежит вне хранилища, не удаляю', name
+            )
+
+
+@receiver(post_save, sender=Post)
+def post_image_saved(sender, instance, created, **kwargs):
+    old_name = getattr(instance, '_loaded_image', None)
+    name = instance.image.name
+    if not created and old_name == name:
+        return
+    instance._loaded_image = name
+    if name:
+        # ссылка на файл теперь в базе, пометка повторной загрузки не нужна
+        transaction.on_commit(lambda: forget_reused(name))
+    if old_name and not created:
+        transaction.on_commit(lambda: release_image(old_name))
+
+
+@receiver(post_delete, sender=Post)
+def post_image_deleted(sender, instance, **kwargs):
+    name = instance.image.name
+    transaction.on_commit(lambda: release_image(name))
@@ -0,0 +1,130 @@
+import json
+import os
+
+from django.conf import settings
+from django.contrib.sitemaps import Sitemap
+from django.db.models import Count, F, Max
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from .models import Post
+
+SITEMAP_INDEX = 'sitemap.xml'
+SITEMAP_CHUNK = 'sitemap-{chunk}.xml'
+MANIFEST = 'manifest.json'
+
+
+class SitemapSite:
+    """Заменяет Site: приложение sites в проекте не подключено"""
+
+    def __init__(self, domain):
+        self.domain = domain
+
+
+class PostChunkSitemap(Sitemap):
+    """Записи с pk из диапазона одного куска карты сайта"""
+    changefreq = 'never'
+
+    def __init__(self, chunk, chunk_size):
+        self.chunk = chunk
+        self.chunk_size = chunk_size
+
+    def items(self):
+        first = self.chunk * self.chunk_size
+        return (
+            Post.objects
+            .filter(pk__gte=first, pk__lt=first + self.chunk_size)
+            .order_by('pk')
+            .only('pk', 'pub_date')
+        )
+
+    def location(self, post):
+        return reverse('posts:post_detail', args=(post.pk,))
+
+    def lastmod(self, post):
+        return post.pub_date
+
+
+def chunk_signatures(chunk_size):
+    """Количество записей и максимальный pk в каждом куске.
+
+    Один агрегирующий запрос по первичному ключу: записи только
+    добавляются в конец, поэтому изменившийся кусок всегда меняет
+    либо количество, либо максимальный pk.
+    """
+    rows = (
+        Post.objects
+        .order_by()
+        .annotate(chunk=F('pk') / chunk_size)
+        .values('chunk')
+        .annotate(count=Count('pk'), last=Max('pk'))
+        .values_list('chunk', 'count', 'last')
+    )
+    return {str(chunk): [count, last] for chunk, count, last in rows}
+
+
+def _write(root, name, content):
+    path = os.path.join(root, name)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as tmp:
+        tmp.write(content)
+    os.replace(tmp_path, path)
+
+
+def _read_manifest(root, chunk_size):
+    try:
+        with open(os.path.join(root, MANIFEST), encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('chunk_size') != chunk_size:
+        return {}
+    return manifest.get('chunks', {})
+
+
+def build_sitemaps(domain, protocol='http', full=False):
+    """Перестраивает изменившиеся куски карты сайта и её индекс.
+
+    Возвращает номера перестроенных и удалённых кусков.
+    """
+    root = settings.SITEMAP_ROOT
+    chunk_size = settings.SITEMAP_CHUNK_SIZE
+    os.makedirs(root, exist_ok=True)
+    previous = {} if full else _read_manifest(root, chunk_size)
+    current = chunk_signatures(chunk_size)
+    site = SitemapSite(domain)
+
+    rebuilt = []
+    for chunk, signature in current.items():
+        name = SITEMAP_CHUNK.format(chunk=chunk)
+        if (
+            previous.get(chunk) == signature
+            and os.path.exists(os.path.join(root, name))
+        ):
+            continue
+        sitemap = PostChunkSitemap(int(chunk), chunk_size)
+        urlset = sitemap.get_urls(site=site, protocol=protocol)
+        _write(root, name, render_to_string(
+            'sitemap.xml', {'urlset': urlset}
+        ))
+        rebuilt.append(int(chunk))
+
+    removed = sorted(int(chunk) for chunk in set(previous) - set(current))
+    for chunk in removed:
+        path = os.path.join(root, SITEMAP_CHUNK.format(chunk=chunk))
+        if os.path.exists(path):
+            os.remove(path)
+
+    chunk_urls = [
+        '%s://%s%s' % (protocol, domain, reverse(
+            'posts:sitemap_chunk', args=(chunk,)
+        ))
+        for chunk in sorted(int(chunk) for chunk in current)
+    ]
+    _write(root, SITEMAP_INDEX, render_to_string(
+        'sitemap_index.xml', {'sitemaps': chunk_urls}
+    ))
+    _write(root, MANIFEST, json.dumps(
+        {'chunk_size': chunk_size, 'chunks': current}
+    ))
+    return sorted(rebuilt), removed
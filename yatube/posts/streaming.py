@@ -0,0 +1,89 @@
+"""Потоковая отдача страниц со списком записей.
+
+При STREAM_LIST_PAGES шаблон рендерится в два прохода с stream_part:
+вместо цикла по page_obj выводится метка stream_marker. Проход 'head'
+пропускает паджинатор и подвал и отдаёт клиенту всё до метки сразу.
+Затем по одной уходят записи, и только после них проход 'tail' строит
+остаток страницы после метки. Число записей для проверки номера
+страницы считает ещё view (make_paginator), поэтому промах кеша
+количеств по-прежнему задерживает первый байт: COUNT(*) при этом
+выполняется один раз и попадает в кеш (CachedCountPaginator).
+
+Если клиент принимает gzip, поток сжимается zlib со сбросом буфера
+(Z_SYNC_FLUSH) после каждого куска, чтобы сжатие не задерживало первые
+байты.
+"""
+import re
+import zlib
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.template.context import make_context
+from django.template.loader import get_template, render_to_string
+from django.utils.cache import patch_vary_headers
+
+STREAM_MARKER = '<!-- post-list -->'
+POST_TEMPLATE = 'posts/includes/one_post.html'
+ACCEPTS_GZIP_RE = re.compile(r'\bgzip\b')
+# 16 + MAX_WBITS: zlib пишет заголовок и хвост формата gzip
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def gzip_stream(chunks, level=6):
+    """Сжимает последовательность байтов в поток gzip, сбрасывая
+    буфер после каждого куска"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def render_part(request, template_name, context, part):
+    """Часть страницы до метки ('head') или после неё ('tail')"""
+    page = render_to_string(template_name, {
+        **context, 'stream_part': part, 'stream_marker': STREAM_MARKER,
+    }, request)
+    head, tail = page.split(STREAM_MARKER, 1)
+    return head if part == 'head' else tail
+
+
+def page_chunks(request, template_name, context):
+    yield render_part(request, template_name, context, 'head')
+    posts = list(context['page_obj'])
+    template = get_template(POST_TEMPLATE).template
+    post_context = make_context(context, request)
+    # контекст-процессоры выполняются один раз, а не для каждой записи
+    with post_context.bind_template(template):
+        for number, post in enumerate(posts, start=1):
+            forloop = {
+                'counter': number,
+                'first': number == 1,
+                'last': number == len(posts),
+            }
+            with post_context.push(post=post, forloop=forloop):
+                yield template.render(post_context)
+    # остаток страницы строится, когда записи уже отправлены
+    yield render_part(request, template_name, context, 'tail')
+
+
+def render_post_list(request, template_name, context):
+    """render() для страниц со списком записей page_obj"""
+    if not settings.STREAM_LIST_PAGES:
+        return render(request, template_name, context)
+    chunks = (
+        chunk.encode()
+        for chunk in page_chunks(request, template_name, context)
+    )
+    response = StreamingHttpResponse(content_type='text/html; charset=utf-8')
+    if ACCEPTS_GZIP_RE.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+        response.streaming_content = gzip_stream(chunks)
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response.streaming_content = chunks
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
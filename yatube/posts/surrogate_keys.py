@@ -0,0 +1,40 @@
+"""Ключи Surrogate-Key страниц с записями (core.surrogate).
+
+Страница помечается ключами всех показанных записей, их авторов и
+групп, а лента — ещё и своим ключом: новая запись появляется в ленте,
+хотя её ключа на закешированной странице ещё нет.
+"""
+INDEX_KEY = 'index'
+
+
+def post_key(pk):
+    return f'post-{pk}'
+
+
+def author_key(pk):
+    return f'author-{pk}'
+
+
+def group_key(pk):
+    return f'group-{pk}'
+
+
+def page_keys(posts):
+    """Ключи записей страницы, их авторов и групп"""
+    keys = set()
+    for post in posts:
+        keys.add(post_key(post.pk))
+        keys.add(author_key(post.author_id))
+        if post.group_id is not None:
+            keys.add(group_key(post.group_id))
+    return keys
+
+
+def post_changed_keys(post, group_ids=()):
+    """Ключи страниц, которые меняются вместе с записью: её самой,
+    главной, профиля автора и лент групп"""
+    keys = {INDEX_KEY, post_key(post.pk), author_key(post.author_id)}
+    keys.update(
+        group_key(group_id) for group_id in group_ids if group_id is not None
+    )
+    return keys
@@ -0,0 +1,119 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from posts.paginator import EstimatedCountPaginator, KeysetPaginator
+
+User = get_user_model()
+# запросы списка в админке: сессия, пользователь, счётчик, страница
+CHANGELIST_QUERY_BUDGET = 6
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        cls.author = User.objects.create_user(username='testauthor')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            description='Тестовый текст',
+            slug='test-group-slug',
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        cache.clear()
+
+    def create_rows(self, number):
+        first = User.objects.count()
+        for i in range(first, first + number):
+            follower = User.objects.create_user(username=f'follower{i}')
+            Follow.objects.create(user=follower, author=self.author)
+            post = Post.objects.create(
+                author=self.author, group=self.group, text=f'Запись {i}'
+            )
+            Comment.objects.create(
+                post=post, author=follower, text='Комментарий'
+            )
+
+    def changelist_queries(self, model):
+        url = reverse(f'admin:posts_{model}_changelist')
+        # сессия и границы страниц кешируются: сравниваем холодные запросы
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Число запросов списка не зависит от числа строк"""
+        models = ('post', 'comment', 'follow')
+        self.create_rows(3)
+        few = {model: self.changelist_queries(model) for model in models}
+        self.create_rows(30)
+        for model in models:
+            with self.subTest(model=model):
+                many = self.changelist_queries(model)
+                self.assertEqual(few[model], many)
+                self.assertLessEqual(many, CHANGELIST_QUERY_BUDGET)
+
+    def test_post_changelist_has_no_group_select(self):
+        """В списке записей нет выпадающего списка групп в каждой строке"""
+        self.create_rows(3)
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertNotContains(response, 'name="form-0-group"')
+
+
+class AdminPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='testauthor')
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Запись {i}') for i in range(25)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_keyset_pages_match_offset_pages(self):
+        """Страницы по границе pk совпадают со страницами по OFFSET"""
+        queryset = Post.objects.order_by('-pk')
+        expected = list(queryset)
+        paginator = KeysetPaginator(queryset, 10)
+        pages = [list(paginator.page(number)) for number in (1, 2, 3)]
+        self.assertEqual(
+            pages, [expected[:10], expected[10:20], expected[20:]]
+        )
+
+    def test_next_page_uses_remembered_boundary(self):
+        """Следующая страница выбирается без поиска границы смещением"""
+        queryset = Post.objects.order_by('-pk')
+        list(KeysetPaginator(queryset, 10).page(1))
+        paginator = KeysetPaginator(queryset, 10)
+        paginator.count
+        with CaptureQueriesContext(connection) as queries:
+            list(paginator.page(2))
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('OFFSET', queries[0]['sql'])
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=1)
+    def test_count_is_estimated_from_statistics(self):
+        """Без фильтров число записей берётся из статистики СУБД"""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        Post.objects.create(author=self.author, text='Запись после ANALYZE')
+        paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+        self.assertEqual(paginator.count, 25)
+        filtered = Post.objects.filter(author=self.author)
+        paginator = EstimatedCountPaginator(filtered, 10)
+        self.assertEqual(paginator.count, 26)
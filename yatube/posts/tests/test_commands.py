@@ -0,0 +1,51 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class GenerateDataTests(TestCase):
+    def test_generate_data_volumes(self):
+        """Команда создаёт заданное количество объектов"""
+        call_command(
+            'generate_data', users=30, groups=3, posts=200, comments=100,
+            follows=50, seed=1, stdout=StringIO()
+        )
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertEqual(Follow.objects.count(), 50)
+
+    def test_posts_are_skewed_to_hot_authors(self):
+        """Записи распределены неравномерно: есть «горячие» авторы"""
+        call_command(
+            'generate_data', users=50, groups=2, posts=1000, comments=0,
+            follows=0, seed=2, stdout=StringIO()
+        )
+        counts = sorted(
+            Post.objects.order_by().values('author').annotate(
+                number=Count('pk')
+            ).values_list('number', flat=True),
+            reverse=True
+        )
+        top_authors = sum(counts[:5])
+        self.assertGreater(top_authors, 1000 * 0.3)
+
+    def test_pub_dates_follow_pk_order(self):
+        """Даты записей разбросаны и возрастают вместе с pk"""
+        call_command(
+            'generate_data', users=5, groups=1, posts=50, comments=0,
+            follows=0, seed=3, stdout=StringIO()
+        )
+        dates = list(Post.objects.order_by('pk').values_list(
+            'pub_date', flat=True
+        ))
+        self.assertEqual(dates, sorted(dates))
+        self.assertGreater(dates[-1] - dates[0], dates[1] - dates[0])
@@ -0,0 +1,164 @@
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.sitemaps import build_sitemaps
+
+User = get_user_model()
+TEMP_SITEMAP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            description='Тестовый текст',
+            slug='test-group-slug',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Текст тестовой записи',
+            group=cls.group,
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_feeds_contain_post(self):
+        """Ленты RSS и Atom отдают запись"""
+        urls = {
+            reverse('posts:index_rss'): 'application/rss+xml',
+            reverse('posts:index_atom'): 'application/atom+xml',
+            reverse(
+                'posts:group_rss', kwargs={'slug': 'test-group-slug'}
+            ): 'application/rss+xml',
+            reverse(
+                'posts:profile_atom', kwargs={'username': 'testuser'}
+            ): 'application/atom+xml',
+        }
+        for url, content_type in urls.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertTrue(response['Content-Type'].startswith(
+                    content_type
+                ))
+                self.assertContains(response, 'Текст тестовой записи')
+
+    def test_unknown_group_feed(self):
+        """Лента несуществующей группы возвращает 404"""
+        response = self.guest_client.get(
+            reverse('posts:group_rss', kwargs={'slug': 'no-such-group'})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_feed_is_cached_until_post_changes(self):
+        """Тело ленты кешируется и сбрасывается при изменении записей"""
+        url = reverse('posts:group_rss', kwargs={'slug': 'test-group-slug'})
+        self.guest_client.get(url)
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(url)
+        self.assertContains(response, 'Текст тестовой записи')
+        Post.objects.create(
+            author=self.user,
+            text='Новая запись группы',
+            group=self.group,
+        )
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'Новая запись группы')
+
+    def test_feed_of_previous_group_reset_on_edit(self):
+        """При смене группы записи сбрасывается лента старой группы"""
+        url = reverse('posts:group_rss', kwargs={'slug': 'test-group-slug'})
+        self.guest_client.get(url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = None
+        post.save()
+        response = self.guest_client.get(url)
+        self.assertNotContains(response, 'Текст тестовой записи')
+
+    def test_feeds_reset_on_rename(self):
+        """Новые заголовок группы и имя автора сразу видны в лентах"""
+        urls = (
+            reverse('posts:index_rss'),
+            reverse('posts:group_rss', kwargs={'slug': 'test-group-slug'}),
+            reverse('posts:profile_atom', kwargs={'username': 'testuser'}),
+        )
+        for url in urls:
+            self.guest_client.get(url)
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новый заголовок группы'
+        group.save()
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Иван'
+        user.save()
+        self.assertContains(
+            self.guest_client.get(urls[1]), 'Новый заголовок группы'
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), 'Иван')
+
+
+@override_settings(SITEMAP_ROOT=TEMP_SITEMAP_ROOT, SITEMAP_CHUNK_SIZE=2)
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Запись {i}')
+            for i in range(3)
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+
+    def test_sitemap_is_served_from_prebuilt_chunks(self):
+        """Карта сайта отдаётся из собранных файлов без запросов к базе"""
+        build_sitemaps('testserver')
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('posts:sitemap'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        chunk = self.posts[0].pk // 2
+        chunk_url = reverse('posts:sitemap_chunk', kwargs={'chunk': chunk})
+        self.assertContains(response, chunk_url)
+        response = self.client.get(chunk_url)
+        post_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.posts[0].pk}
+        )
+        self.assertContains(response, post_url)
+
+    def test_only_changed_chunks_are_rebuilt(self):
+        """Повторная сборка перестраивает только изменившиеся куски"""
+        build_sitemaps('testserver')
+        rebuilt, removed = build_sitemaps('testserver')
+        self.assertEqual((rebuilt, removed), ([], []))
+        post = Post.objects.create(author=self.user, text='Новая запись')
+        rebuilt, removed = build_sitemaps('testserver')
+        self.assertEqual(rebuilt, [post.pk // 2])
+        self.assertTrue(os.path.exists(os.path.join(
+            TEMP_SITEMAP_ROOT, f'sitemap-{post.pk // 2}.xml'
+        )))
+
+    def test_missing_sitemap(self):
+        """Несобранная карта сайта возвращает 404"""
+        response = self.client.get(reverse('posts:sitemap'))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
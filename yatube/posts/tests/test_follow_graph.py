@@ -0,0 +1,103 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.follow_graph import graph
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(5)
+        ]
+        for author in cls.authors[:3]:
+            Follow.objects.create(user=cls.user, author=author)
+            Post.objects.create(author=author, text=f'Запись {author}')
+
+    def setUp(self):
+        cache.clear()
+        graph.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_following_sorted(self):
+        """Граф отдаёт отсортированные id авторов одним запросом"""
+        with self.assertNumQueries(1):
+            authors = graph.following(self.user.pk)
+        self.assertEqual(
+            list(authors), sorted(author.pk for author in self.authors[:3])
+        )
+
+    def test_follows_without_queries(self):
+        """Прочитанный граф отвечает на проверки без базы, в том числе
+        в другом процессе — из общего кеша"""
+        graph.following(self.user.pk)
+        graph.clear()
+        with self.assertNumQueries(0):
+            for author in self.authors:
+                with self.subTest(author=author.username):
+                    self.assertEqual(
+                        graph.follows(self.user.pk, author.pk),
+                        author in self.authors[:3],
+                    )
+
+    def test_follow_and_unfollow_update_graph(self):
+        """Подписка и отписка через сайт сразу видны в графе"""
+        author = self.authors[4]
+        self.assertFalse(graph.follows(self.user.pk, author.pk))
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args=(author.username,))
+        )
+        self.assertTrue(graph.follows(self.user.pk, author.pk))
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args=(author.username,))
+        )
+        self.assertFalse(graph.follows(self.user.pk, author.pk))
+
+    def test_follow_with_stale_graph(self):
+        """Подписка при устаревшем графе не падает на повторной вставке"""
+        author = self.authors[4]
+        graph.following(self.user.pk)
+        # подписка в обход сигналов, граф о ней не знает
+        Follow.objects.bulk_create([Follow(user=self.user, author=author)])
+        self.assertFalse(graph.follows(self.user.pk, author.pk))
+        response = self.authorized_client.get(
+            reverse('posts:profile_follow', args=(author.username,))
+        )
+        self.assertRedirects(
+            response, reverse('posts:profile', args=(author.username,))
+        )
+        self.assertEqual(
+            Follow.objects.filter(user=self.user, author=author).count(), 1
+        )
+
+    def test_follow_index_uses_graph(self):
+        """Лента подписок из графа совпадает с лентой через Follow"""
+        url = reverse('posts:follow_index')
+        cold = self.authorized_client.get(url).context['page_obj']
+        graph.following(self.user.pk)
+        warm = self.authorized_client.get(url).context['page_obj']
+        self.assertEqual(list(cold), list(warm))
+        self.assertEqual(len(warm), 3)
+
+    def test_follow_index_without_join(self):
+        """Лента подписок сама читает граф и не соединяет записи с
+        Follow, даже если граф ещё не загружен"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(
+                reverse('posts:follow_index')
+            )
+        self.assertEqual(len(response.context['page_obj']), 3)
+        self.assertFalse([
+            query for query in queries
+            if 'JOIN "posts_follow"' in query['sql']
+        ])
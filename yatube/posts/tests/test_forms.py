@@ -4,10 +4,12 @@ from http import HTTPStatus
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from core.storages import ContentAddressedStorage
 from posts.models import Comment, Group, Post
 
 User = get_user_model()
@@ -79,11 +81,15 @@ class PostsCreateFormTests(TestCase):
         self.assertRedirects(response, reverse(
             'posts:profile', kwargs={'username': 'test_forms_user'}
         ))
+        # Картинка хранится под хешем содержимого
+        image_name = ContentAddressedStorage().content_name(
+            'posts/small.gif', ContentFile(small_gif)
+        )
         # Проверяем, что создалась запись с рисунком
         self.assertTrue(
             Post.objects.filter(
                 text='Тестовый текст',
-                image='posts/small.gif',
+                image=image_name,
                 group=self.group.id,
             ).exists()
         )
@@ -125,11 +131,15 @@ class PostsCreateFormTests(TestCase):
         self.assertRedirects(response, reverse(
             'posts:post_detail', kwargs={'post_id': last_post.id}
         ))
+        # Картинка хранится под хешем содержимого
+        image_name = ContentAddressedStorage().content_name(
+            'posts/small.gif', ContentFile(small_gif)
+        )
         # Проверяем, что создалась запись с рисунком
         self.assertTrue(
             Post.objects.filter(
                 text='Отредактированный тестовый текст',
-                image='posts/small1.gif',
+                image=image_name,
                 group=self.other_group.id,
             ).exists()
         )
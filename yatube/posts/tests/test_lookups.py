@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import TestCase
+
+from posts.lookups import get_author_or_404, get_group_or_404
+from posts.models import Group
+
+User = get_user_model()
+
+
+class LookupCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='testuser', first_name='Иван', last_name='Петров'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            description='Тестовый текст',
+            slug='test-group-slug',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_found_objects_cached(self):
+        """Найденные автор и группа второй раз берутся из кеша"""
+        get_author_or_404('testuser')
+        get_group_or_404('test-group-slug')
+        with self.assertNumQueries(0):
+            author = get_author_or_404('testuser')
+            group = get_group_or_404('test-group-slug')
+        self.assertEqual(author, self.user)
+        self.assertEqual(author.get_full_name(), 'Иван Петров')
+        self.assertEqual(group, self.group)
+        self.assertEqual(group.description, 'Тестовый текст')
+
+    def test_missing_objects_cached(self):
+        """Отсутствующие имя и адрес второй раз отвечают 404 без базы"""
+        for lookup, value in (
+            (get_author_or_404, 'nobody'),
+            (get_group_or_404, 'no-such-group'),
+            (get_author_or_404, 'имя с пробелом'),
+        ):
+            with self.subTest(value=value):
+                with self.assertRaises(Http404):
+                    lookup(value)
+                with self.assertNumQueries(0), self.assertRaises(Http404):
+                    lookup(value)
+
+    def test_created_user_replaces_missing_entry(self):
+        """Новый пользователь находится, даже если его имя искали раньше"""
+        with self.assertRaises(Http404):
+            get_author_or_404('newcomer')
+        User.objects.create_user(username='newcomer')
+        self.assertEqual(get_author_or_404('newcomer').username, 'newcomer')
+
+    def test_rename_and_delete_invalidate(self):
+        """Переименование и удаление сбрасывают старое и новое имя"""
+        user = User.objects.create_user(username='oldname')
+        get_author_or_404('oldname')
+        with self.assertRaises(Http404):
+            get_author_or_404('newname')
+        user.username = 'newname'
+        user.save()
+        with self.assertRaises(Http404):
+            get_author_or_404('oldname')
+        self.assertEqual(get_author_or_404('newname'), user)
+        user.delete()
+        with self.assertRaises(Http404):
+            get_author_or_404('newname')
+
+    def test_group_slug_change_invalidates(self):
+        """Смена адреса группы сбрасывает старый адрес"""
+        group = Group.objects.get(pk=self.group.pk)
+        get_group_or_404(group.slug)
+        group.slug = 'new-slug'
+        group.save()
+        with self.assertRaises(Http404):
+            get_group_or_404('test-group-slug')
+        self.assertEqual(get_group_or_404('new-slug'), group)
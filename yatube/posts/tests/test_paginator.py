@@ -1,8 +1,19 @@
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache, caches
+from django.db import DatabaseError, connection, transaction
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from posts.models import Group, Post
+from core.tests.test_two_tier_cache import TWO_TIER_CACHES
+from posts.follow_graph import graph
+from posts.models import Follow, Group, Post
+from posts.paginator import (
+    COUNT_GENERATION_KEY, adjust_counts, author_count_key, cached_count,
+    group_count_key, index_count_key,
+)
 
 User = get_user_model()
 NUMBER_OF_POSTS_PER_PAGE = 10
@@ -32,6 +43,9 @@ class PostPaginatorTests(TestCase):
         cls.posts = Post.objects.bulk_create(test_post_list)
 
     def setUp(self):
+        # записи созданы bulk_create, без сигналов, которые поддерживают
+        # закешированные количества
+        cache.clear()
         # Создаём авторизованный клиент
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
@@ -87,3 +101,149 @@ class PostPaginatorTests(TestCase):
         )
         response_post = response.context['page_obj']
         self.assertEqual(len(response_post), NUMBER_OF_POSTS_PER_SECOND_PAGE)
+
+
+# количества меняются после коммита, поэтому нужны настоящие транзакции
+class CachedCountTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser')
+        self.author = User.objects.create_user(username='testauthor')
+        self.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            description='Тестовый текст',
+            slug='test-group-slug',
+        )
+        self.other_group = Group.objects.create(
+            title='Другая группа',
+            description='Тестовый текст',
+            slug='other-group-slug',
+        )
+        Follow.objects.create(user=self.user, author=self.author)
+        for i in range(NUMBER_OF_BULK_POSTS):
+            Post.objects.create(
+                text=f'Текст тестовой записи {i}',
+                author=self.author,
+                group=self.group,
+            )
+        cache.clear()
+        graph.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:group_list', args=(self.other_group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:follow_index'),
+        )
+
+    def cached_counts(self):
+        return {
+            index_count_key(): Post.objects.all(),
+            group_count_key(self.group.pk):
+                Post.objects.filter(group=self.group),
+            group_count_key(self.other_group.pk):
+                Post.objects.filter(group=self.other_group),
+            author_count_key(self.author.pk):
+                Post.objects.filter(author=self.author),
+        }
+
+    def assert_counts_match(self):
+        for key, posts in self.cached_counts().items():
+            with self.subTest(key=key):
+                self.assertEqual(cache.get(key), posts.count())
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            response.context['page_obj'].paginator.count,
+            Post.objects.filter(author__following__user=self.user).count(),
+        )
+
+    def test_views_count_once(self):
+        """Ленты кешируют количество записей и второй раз не считают"""
+        for url in self.urls:
+            self.authorized_client.get(url)
+        self.assert_counts_match()
+        url = reverse('posts:group_list', args=(self.group.slug,))
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(url)
+        self.assertFalse(
+            [query for query in queries if 'COUNT(' in query['sql']]
+        )
+
+    def test_counts_follow_create_delete_and_move(self):
+        """Закешированные количества следуют за созданием, переносом и
+        удалением записей"""
+        for url in self.urls:
+            self.authorized_client.get(url)
+        post = Post.objects.create(
+            text='Новая запись', author=self.author, group=self.group
+        )
+        with self.subTest(change='создание'):
+            self.assert_counts_match()
+        post.group = self.other_group
+        post.save()
+        with self.subTest(change='перенос'):
+            self.assert_counts_match()
+        post.delete()
+        with self.subTest(change='удаление'):
+            self.assert_counts_match()
+
+    def test_rollback_keeps_counts(self):
+        """Откаченная запись не меняет закешированных количеств"""
+        for url in self.urls:
+            self.authorized_client.get(url)
+        try:
+            with transaction.atomic():
+                Post.objects.create(
+                    text='Новая запись', author=self.author, group=self.group
+                )
+                raise DatabaseError
+        except DatabaseError:
+            pass
+        self.assert_counts_match()
+
+    def test_count_racing_commit_not_stored(self):
+        """Подсчёт, во время которого закоммитилась запись, не остаётся
+        в кеше: её поправка не нашла ключа"""
+        key = index_count_key()
+
+        def count():
+            adjust_counts([key], 1)
+            return 5
+
+        self.assertEqual(cached_count(key, count), 5)
+        self.assertIsNone(cache.get(key))
+
+    @override_settings(CACHES=TWO_TIER_CACHES)
+    def test_count_racing_other_process_not_stored(self):
+        """Поколение количеств читается из общего кеша: поправку другого
+        процесса не скрывает копия в кеше этого"""
+        cache.clear()
+        key = index_count_key()
+        # поколение, скопированное в кеш процесса
+        cache.set(COUNT_GENERATION_KEY, 'current')
+
+        def count():
+            caches['shared'].set(COUNT_GENERATION_KEY, 'other')
+            return 5
+
+        self.assertEqual(cached_count(key, count), 5)
+        self.assertIsNone(cache.get(key))
+
+    def test_new_post_skips_followers(self):
+        """Создание записи не читает подписчиков автора"""
+        with CaptureQueriesContext(connection) as queries:
+            Post.objects.create(text='Новая запись', author=self.author)
+        self.assertFalse(
+            [query for query in queries if 'posts_follow' in query['sql']]
+        )
+
+    def test_follow_feed_count_follows_subscriptions(self):
+        """Отписка меняет количество в ленте подписок"""
+        url = reverse('posts:follow_index')
+        self.authorized_client.get(url)
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args=(self.author.username,))
+        )
+        response = self.authorized_client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 0)
@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import post_cache
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='testuser', first_name='Иван', last_name='Петров'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            description='Тестовый текст',
+            slug='test-group-slug',
+        )
+        for i in range(3):
+            Post.objects.create(
+                author=cls.user,
+                text=f'Текст тестовой записи {i}',
+                group=cls.group if i else None,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.ids = list(Post.objects.values_list('pk', flat=True))
+
+    def cached_posts(self):
+        post_cache.get_many(self.ids)
+        with self.assertNumQueries(0):
+            posts = post_cache.get_many(self.ids)
+            rendered = [
+                (
+                    post.pk, post.text, post.pub_date, post.image.name,
+                    post.author.get_full_name(), post.author.username,
+                    post.group.slug if post.group else None,
+                    post.group.title if post.group else None,
+                )
+                for post in posts
+            ]
+        return posts, rendered
+
+    def test_hydrated_posts_match_database(self):
+        """Записи из кеша совпадают с записями из базы, включая автора и
+        группу, и собираются без запросов"""
+        posts, rendered = self.cached_posts()
+        expected = [
+            (
+                post.pk, post.text, post.pub_date, post.image.name,
+                post.author.get_full_name(), post.author.username,
+                post.group.slug if post.group else None,
+                post.group.title if post.group else None,
+            )
+            for post in Post.objects.with_related().order_by('-pub_date')
+        ]
+        self.assertEqual(rendered, expected)
+        self.assertEqual([post.pk for post in posts], self.ids)
+
+    def test_post_change_invalidates(self):
+        """Правка записи сразу видна в кеше"""
+        self.cached_posts()
+        post = Post.objects.get(pk=self.ids[0])
+        post.text = 'Новый текст'
+        post.save()
+        [cached] = post_cache.get_many([post.pk])
+        self.assertEqual(cached.text, 'Новый текст')
+
+    def test_group_change_invalidates(self):
+        """Переименование и удаление группы сбрасывают её записи"""
+        self.cached_posts()
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новый заголовок'
+        group.save()
+        titles = {
+            post.group.title for post in post_cache.get_many(self.ids)
+            if post.group
+        }
+        self.assertEqual(titles, {'Новый заголовок'})
+        group.delete()
+        self.assertTrue(all(
+            post.group is None for post in post_cache.get_many(self.ids)
+        ))
+
+    def test_author_change_invalidates(self):
+        """Смена имени автора сбрасывает его записи, а вход — нет"""
+        self.cached_posts()
+        Client().force_login(self.user)
+        with self.assertNumQueries(0):
+            post_cache.get_many(self.ids)
+        self.user.first_name = 'Пётр'
+        self.user.save()
+        names = {
+            post.author.get_full_name()
+            for post in post_cache.get_many(self.ids)
+        }
+        self.assertEqual(names, {'Пётр Петров'})
+
+    def test_save_without_name_change_keeps_posts(self):
+        """Сохранение автора без смены имени, например смена пароля, не
+        сбрасывает его записи"""
+        self.cached_posts()
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        user.save()
+        with self.assertNumQueries(0):
+            post_cache.get_many(self.ids)
+
+    def test_group_list_reads_only_ids_when_warm(self):
+        """С тёплым кешем лента группы читает из базы только id записей
+        страницы"""
+        client = Client()
+        url = reverse('posts:group_list', args=(self.group.slug,))
+        client.get(url)
+        # группа и число записей тоже из кеша
+        with self.assertNumQueries(1):
+            response = client.get(url)
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            list(Post.objects.filter(group=self.group).values_list(
+                'pk', flat=True
+            )),
+        )
@@ -0,0 +1,120 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.query_budget import QueryBudgetMixin
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+PAGE_SIZES = (10, 50)
+# время на запрос с запасом для медленных машин CI
+MAX_VIEW_TIME = 1.0
+# бюджеты представлений posts.views авторизованным пользователем:
+# в них входят запросы сессии и пользователя, а в лентах при пустом
+# кеше — отдельное чтение записей страницы по id
+VIEW_BUDGETS = {
+    'posts:index': 5,
+    'posts:group_list': 6,
+    'posts:profile': 7,
+    # при пустом кеше лента подписок читает граф подписок
+    'posts:follow_index': 6,
+    'posts:post_detail': 5,
+    'posts:post_create': 3,
+    'posts:post_edit': 4,
+    'posts:add_comment': 3,
+    # вставка подписки в точке сохранения: повтор отсекает база, и
+    # точка сохранения откатывается
+    'posts:profile_follow': 7,
+    'posts:profile_unfollow': 4,
+    'posts:sitemap': 2,
+}
+
+
+class ViewQueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.author = User.objects.create_user(username='testauthor')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            description='Тестовый текст',
+            slug='test-group-slug',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for i in range(max(PAGE_SIZES) + 1):
+            post = Post.objects.create(
+                author=cls.author,
+                text=f'Текст тестовой записи {i}',
+                group=cls.group,
+            )
+        cls.post = post
+        for i in range(20):
+            Comment.objects.create(
+                post=cls.post,
+                author=cls.user,
+                text=f'Комментарий {i}',
+            )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def view_urls(self):
+        return {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}
+            ),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': self.author.username}
+            ),
+            'posts:follow_index': reverse('posts:follow_index'),
+            'posts:post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}
+            ),
+            'posts:post_create': reverse('posts:post_create'),
+            'posts:post_edit': reverse(
+                'posts:post_edit', kwargs={'post_id': self.post.pk}
+            ),
+            'posts:add_comment': reverse(
+                'posts:add_comment', kwargs={'post_id': self.post.pk}
+            ),
+            'posts:profile_follow': reverse(
+                'posts:profile_follow',
+                kwargs={'username': self.author.username}
+            ),
+            'posts:profile_unfollow': reverse(
+                'posts:profile_unfollow',
+                kwargs={'username': self.author.username}
+            ),
+            'posts:sitemap': reverse('posts:sitemap'),
+        }
+
+    def test_every_view_has_budget(self):
+        """Для каждого маршрута posts задан бюджет"""
+        from posts.urls import urlpatterns
+        names = {
+            f'posts:{pattern.name}' for pattern in urlpatterns
+            if not pattern.name.endswith(('_rss', '_atom', '_chunk'))
+        }
+        self.assertEqual(names, set(VIEW_BUDGETS))
+
+    def test_views_fit_budget(self):
+        """Представления укладываются в бюджет запросов и времени
+        при любом размере страницы"""
+        for page_size in PAGE_SIZES:
+            for name, url in self.view_urls().items():
+                with self.subTest(view=name, page_size=page_size):
+                    cache.clear()
+                    with mock.patch(
+                        'posts.paginator.NUMBER_OF_POSTS_PER_PAGE', page_size
+                    ), self.assertQueryBudget(
+                        VIEW_BUDGETS[name], MAX_VIEW_TIME,
+                        label=f'{name} (страница {page_size})'
+                    ):
+                        self.authorized_client.get(url)
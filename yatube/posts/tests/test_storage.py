@@ -0,0 +1,97 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+OTHER_GIF = SMALL_GIF[:-1] + b'\x00\x3b'
+
+
+# обработчики удаления срабатывают после коммита, поэтому нужны
+# настоящие транзакции
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser')
+        self.storage = Post._meta.get_field('image').storage
+
+    def create_post(self, content, name='small.gif'):
+        post = Post(author=self.user, text='Тестовый текст')
+        post.image.save(name, ContentFile(content), save=False)
+        post.save()
+        return post
+
+    def test_same_content_shares_file(self):
+        """Одинаковые загрузки с разными именами хранятся в одном файле"""
+        first = self.create_post(SMALL_GIF, 'small.gif')
+        second = self.create_post(SMALL_GIF, 'copy.GIF')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.startswith('posts/'))
+        self.assertTrue(first.image.name.endswith('.gif'))
+        self.assertTrue(self.storage.exists(first.image.name))
+
+    def test_file_kept_while_referenced(self):
+        """Файл удаляется только вместе с последней ссылкой на него"""
+        first = self.create_post(SMALL_GIF)
+        second = self.create_post(SMALL_GIF)
+        name = first.image.name
+        first.delete()
+        self.assertTrue(self.storage.exists(name))
+        second.delete()
+        self.assertFalse(self.storage.exists(name))
+
+    def test_replaced_image_released(self):
+        """Заменённая картинка удаляется, если на неё нет других ссылок"""
+        post = self.create_post(SMALL_GIF)
+        post = Post.objects.get(pk=post.pk)
+        old_name = post.image.name
+        post.image.save('other.gif', ContentFile(OTHER_GIF))
+        self.assertNotEqual(post.image.name, old_name)
+        self.assertFalse(self.storage.exists(old_name))
+        self.assertTrue(self.storage.exists(post.image.name))
+
+    def test_duplicate_upload_before_commit_kept(self):
+        """Файл, повторно загруженный для ещё не сохранённой записи, не
+        удаляется вместе с последней сохранённой ссылкой"""
+        post = self.create_post(SMALL_GIF)
+        name = post.image.name
+        # форма другого запроса уже сохранила файл, запись ещё нет
+        self.storage.save('posts/copy.gif', ContentFile(SMALL_GIF))
+        post.delete()
+        self.assertTrue(self.storage.exists(name))
+        self.create_post(SMALL_GIF).delete()
+        self.assertFalse(self.storage.exists(name))
+
+    def test_storage_report(self):
+        """Отчёт считает сэкономленное место и удаляет файлы без ссылок"""
+        self.create_post(SMALL_GIF)
+        self.create_post(SMALL_GIF)
+        orphan = self.storage.save('posts/orphan.gif', ContentFile(OTHER_GIF))
+        out = StringIO()
+        call_command('storage_report', delete_orphans=True, stdout=out)
+        report = out.getvalue()
+        self.assertIn('Записей с картинками: 2', report)
+        self.assertIn('Уникальных файлов: 1', report)
+        self.assertIn(f'Сэкономлено: {len(SMALL_GIF)} Б', report)
+        self.assertIn(f'Файлов без ссылок: 1 ({len(OTHER_GIF)} Б)', report)
+        self.assertFalse(self.storage.exists(orphan))
@@ -0,0 +1,106 @@
+import gzip
+import re
+import zlib
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.test.signals import template_rendered
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+def normalize(html):
+    return re.sub(r'\s+', ' ', html).strip()
+
+
+class StreamingListTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            description='Тестовый текст',
+            slug='test-group-slug',
+        )
+        for i in range(3):
+            Post.objects.create(
+                author=cls.user,
+                text=f'Текст тестовой записи {i}',
+                group=cls.group,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+
+    def streamed(self, url, **headers):
+        with override_settings(STREAM_LIST_PAGES=True):
+            response = self.authorized_client.get(url, **headers)
+            self.assertTrue(response.streaming)
+            return response, list(response.streaming_content)
+
+    def test_streamed_page_matches_rendered(self):
+        """Потоковая страница совпадает с обычной"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                cache.clear()
+                rendered = self.authorized_client.get(url).content.decode()
+                cache.clear()
+                _, chunks = self.streamed(url)
+                streamed = b''.join(chunks).decode()
+                self.assertEqual(normalize(streamed), normalize(rendered))
+
+    def test_head_sent_before_posts(self):
+        """Первый кусок — начало страницы без записей"""
+        _, chunks = self.streamed(self.urls[1])
+        self.assertIn(self.group.title, chunks[0].decode())
+        self.assertNotIn('Текст тестовой записи', chunks[0].decode())
+        self.assertGreater(len(chunks), 2)
+
+    def test_tail_built_after_posts(self):
+        """Паджинатор и подвал рендерятся только после отправки записей"""
+        events = []
+
+        def rendered(sender, template, **kwargs):
+            events.append(template.name)
+
+        template_rendered.connect(rendered)
+        try:
+            with override_settings(STREAM_LIST_PAGES=True):
+                response = self.authorized_client.get(self.urls[1])
+                for chunk in response.streaming_content:
+                    if 'Текст тестовой записи' in chunk.decode():
+                        events.append('post')
+        finally:
+            template_rendered.disconnect(rendered)
+        last_post = len(events) - events[::-1].index('post') - 1
+        for name in ('posts/includes/paginator.html', 'includes/footer.html'):
+            with self.subTest(template=name):
+                self.assertEqual(events.count(name), 1)
+                self.assertGreater(events.index(name), last_post)
+
+    def test_gzip_stream(self):
+        """С Accept-Encoding: gzip поток сжимается"""
+        response, chunks = self.streamed(
+            self.urls[1], HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        html = gzip.decompress(b''.join(chunks)).decode()
+        self.assertIn('Текст тестовой записи 2', html)
+        # первый кусок распаковывается сам по себе: он сброшен целиком
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.assertIn(
+            self.group.title, decompressor.decompress(chunks[0]).decode()
+        )
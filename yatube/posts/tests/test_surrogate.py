@@ -0,0 +1,175 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class SurrogateHeadersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            description='Тестовый текст',
+            slug='test-group-slug',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Текст тестовой записи', group=cls.group
+        )
+        cls.post_keys = {
+            f'post-{cls.post.pk}',
+            f'author-{cls.user.pk}',
+            f'group-{cls.group.pk}',
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_pages_list_their_keys(self):
+        """Страницы перечисляют ключи записей, авторов, групп и ленты"""
+        pages = {
+            reverse('posts:index'): {'index'},
+            reverse('posts:group_list', args=(self.group.slug,)): set(),
+            reverse('posts:profile', args=(self.user.username,)): set(),
+            reverse('posts:post_detail', args=(self.post.pk,)): set(),
+        }
+        for url, extra_keys in pages.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    set(response['Surrogate-Key'].split()),
+                    self.post_keys | extra_keys,
+                )
+
+    def test_anonymous_pages_are_public(self):
+        """Анонимам страницы отдаются для общего кеша, остальным — нет"""
+        url = reverse('posts:profile', args=(self.user.username,))
+        response = self.client.get(url)
+        cache_control = response['Cache-Control']
+        self.assertIn('public', cache_control)
+        self.assertIn('s-maxage=60', cache_control)
+        self.assertIn('stale-while-revalidate=300', cache_control)
+        response = self.authorized_client.get(url)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotIn('s-maxage', response['Cache-Control'])
+
+    def test_cached_index_keeps_keys(self):
+        """Главная из кеша отдаётся с теми же ключами"""
+        url = reverse('posts:index')
+        first = self.client.get(url)
+        second = self.client.get(url)
+        self.assertEqual(first['Surrogate-Key'], second['Surrogate-Key'])
+        self.assertIn('public', second['Cache-Control'])
+
+    def test_pages_without_keys_untouched(self):
+        """Страницы без ключей кеш прокси не разрешают"""
+        response = self.client.get(reverse('about:author'))
+        self.assertNotIn('Surrogate-Key', response)
+        self.assertNotIn('public', response.get('Cache-Control', ''))
+
+
+class PurgeRecorder(BaseHTTPRequestHandler):
+    """Заглушка прокси: запоминает ключи пришедших запросов PURGE"""
+    received = []
+
+    def do_PURGE(self):
+        self.received.append(set(self.headers['Surrogate-Key'].split()))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+# ключи отправляются после коммита, поэтому нужны настоящие транзакции
+class PurgeTests(TransactionTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = HTTPServer(('127.0.0.1', 0), PurgeRecorder)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.start()
+        host, port = cls.server.server_address
+        cls.purge_url = f'http://{host}:{port}/'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join()
+        super().tearDownClass()
+
+    def setUp(self):
+        PurgeRecorder.received.clear()
+        self.user = User.objects.create_user(username='testuser')
+        self.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            description='Тестовый текст',
+            slug='test-group-slug',
+        )
+        settings_override = override_settings(
+            SURROGATE_PURGE_URL=self.purge_url
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_post_changes_purge_its_pages(self):
+        """Создание, перенос и удаление записи сбрасывают её страницы"""
+        other_group = Group.objects.create(
+            title='Другая группа', description='Текст', slug='other-group'
+        )
+        post = Post.objects.create(
+            author=self.user, text='Текст', group=self.group
+        )
+        post_keys = {'index', f'post-{post.pk}', f'author-{self.user.pk}'}
+        post.group = other_group
+        post.save()
+        post.delete()
+        self.assertEqual(PurgeRecorder.received, [
+            post_keys | {f'group-{self.group.pk}'},
+            post_keys | {
+                f'group-{self.group.pk}', f'group-{other_group.pk}'
+            },
+            post_keys | {f'group-{other_group.pk}'},
+        ])
+
+    def test_comment_group_and_author_changes_purge(self):
+        """Комментарий, правка группы и имени автора сбрасывают свои
+        ключи"""
+        post = Post.objects.create(author=self.user, text='Текст')
+        PurgeRecorder.received.clear()
+        Comment.objects.create(post=post, author=self.user, text='Текст')
+        self.group.title = 'Новый заголовок'
+        self.group.save()
+        self.user.first_name = 'Иван'
+        self.user.save()
+        self.assertEqual(PurgeRecorder.received, [
+            {f'post-{post.pk}'},
+            {f'group-{self.group.pk}'},
+            {f'author-{self.user.pk}'},
+        ])
+
+    def test_unreachable_proxy_does_not_break_writes(self):
+        """Недоступный прокси не мешает сохранению"""
+        with override_settings(SURROGATE_PURGE_URL='http://127.0.0.1:9/'):
+            with self.assertLogs('core.surrogate', 'WARNING'):
+                Post.objects.create(author=self.user, text='Текст')
+        self.assertTrue(Post.objects.exists())
+
+    def test_purge_disabled_by_default(self):
+        """Без адреса прокси ничего не отправляется"""
+        with override_settings(SURROGATE_PURGE_URL=None):
+            Post.objects.create(author=self.user, text='Текст')
+        self.assertEqual(PurgeRecorder.received, [])
@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.follow_graph import graph
+from posts.models import Follow, Post
+from posts.timelines import TimelineFeed
+
+User = get_user_model()
+
+
+class TimelineFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='testuser')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(4)
+        ]
+        for author in cls.authors[:3]:
+            Follow.objects.create(user=cls.user, author=author)
+        for i in range(25):
+            Post.objects.create(
+                author=cls.authors[i % len(cls.authors)],
+                text=f'Текст тестовой записи {i}',
+            )
+
+    def setUp(self):
+        cache.clear()
+        graph.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.author_ids = [author.pk for author in self.authors[:3]]
+
+    def test_merge_matches_join(self):
+        """Слияние лент авторов даёт ту же ленту, что и запрос"""
+        expected = list(
+            Post.objects.filter(author_id__in=self.author_ids)
+            .order_by('-pub_date', '-pk')
+        )
+        feed = TimelineFeed(self.author_ids)
+        self.assertEqual(feed.count(), len(expected))
+        self.assertEqual(feed[0:len(expected)], expected)
+        self.assertEqual(feed[5:12], expected[5:12])
+
+    def test_page_hydrated_with_one_query(self):
+        """Закешированная лента собирает страницу одним запросом"""
+        TimelineFeed(self.author_ids)
+        with self.assertNumQueries(1):
+            feed = TimelineFeed(self.author_ids)
+            page = feed[0:10]
+            for post in page:
+                post.author.username
+        self.assertEqual(len(page), 10)
+
+    def test_timeline_updated_on_new_post(self):
+        """Новая запись автора сразу появляется в начале ленты"""
+        TimelineFeed(self.author_ids)
+        post = Post.objects.create(author=self.authors[0], text='Новая')
+        self.assertEqual(TimelineFeed(self.author_ids)[0:1], [post])
+        post.delete()
+        self.assertNotIn(post, TimelineFeed(self.author_ids)[0:10])
+
+    @override_settings(TIMELINE_LENGTH=2)
+    def test_timeline_length(self):
+        """Лента листается не глубже TIMELINE_LENGTH записей автора"""
+        self.assertEqual(TimelineFeed(self.author_ids).count(), 6)
+
+    def test_follow_index_engines_match(self):
+        """Страницы ленты подписок одинаковы для обоих способов сборки"""
+        url = reverse('posts:follow_index')
+        for page in (1, 2):
+            with self.subTest(page=page):
+                joined = self.authorized_client.get(url, {'page': page})
+                with override_settings(FOLLOW_FEED_ENGINE='timelines'):
+                    merged = self.authorized_client.get(url, {'page': page})
+                self.assertEqual(
+                    list(merged.context['page_obj']),
+                    list(joined.context['page_obj']),
+                )
+                self.assertEqual(
+                    merged.context['page_obj'].paginator.num_pages,
+                    joined.context['page_obj'].paginator.num_pages,
+                )
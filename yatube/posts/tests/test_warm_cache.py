@@ -0,0 +1,101 @@
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import translation
+
+from core.cache import is_process_local
+from core.tests.test_two_tier_cache import TWO_TIER_CACHES
+from posts.management.commands.warm_cache import RateLimiter
+from posts.models import Group, Post
+
+User = get_user_model()
+HOST = 'yatube.test'
+
+
+# потоки команды читают базу своими соединениями и не видят данных
+# незавершённой транзакции TestCase
+@override_settings(ALLOWED_HOSTS=[HOST])
+class WarmCacheTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser')
+        self.group = Group.objects.create(
+            title='Тестовый заголовок группы',
+            description='Тестовый текст',
+            slug='test-group-slug',
+        )
+        for i in range(12):
+            Post.objects.create(
+                author=self.user, text=f'Текст {i}', group=self.group
+            )
+        cache.clear()
+        self.client = Client(HTTP_HOST=HOST)
+        # язык входит в ключ кеша страницы; потоки команды, как и потоки
+        # сервера, язык не включают и берут LANGUAGE_CODE
+        translation.deactivate()
+
+    def warm(self, **options):
+        out = StringIO()
+        # кеш тестов живёт в процессе, его и читают проверки
+        call_command(
+            'warm_cache', host=HOST, rate=0, allow_local_cache=True,
+            stdout=out, stderr=StringIO(), **options
+        )
+        return out.getvalue()
+
+    def test_warmed_pages_served_from_cache(self):
+        """После прогрева главная не читает базу, а лента группы и
+        запись читают только то, что не кешируется"""
+        output = self.warm(pages=5, authors=1, posts=1)
+        # две страницы главной, группа, профиль и запись
+        self.assertIn('Прогрето страниц: 5 из 5', output)
+        with self.assertNumQueries(0):
+            self.client.get(reverse('posts:index'))
+            self.client.get(reverse('posts:index') + '?page=2')
+        with self.assertNumQueries(1):
+            self.client.get(
+                reverse('posts:group_list', args=(self.group.slug,))
+            )
+
+    def test_failures_reported(self):
+        """Неудачные страницы перечисляются в stderr"""
+        errors = StringIO()
+        call_command(
+            'warm_cache', host='unknown.test', rate=0, pages=1, authors=0,
+            posts=0, allow_local_cache=True, stdout=StringIO(),
+            stderr=errors,
+        )
+        self.assertIn('/: 400', errors.getvalue())
+
+    def test_process_local_cache_refused(self):
+        """Кеш в памяти процесса команда не прогревает: серверу он не
+        достанется"""
+        with self.assertRaises(CommandError):
+            call_command('warm_cache', host=HOST, rate=0, stdout=StringIO())
+
+    def test_shared_cache_detected(self):
+        """Кеш процесса перед общим кешем в памяти тоже считается
+        локальным, а файловый кеш — общим"""
+        with override_settings(CACHES=TWO_TIER_CACHES):
+            self.assertTrue(is_process_local())
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': tempfile.gettempdir(),
+        }}):
+            self.assertFalse(is_process_local())
+
+
+class RateLimiterTests(TransactionTestCase):
+    def test_spreads_calls(self):
+        """Ограничитель разносит вызовы на интервал 1/rate"""
+        limiter = RateLimiter(100)
+        times = []
+        for _ in range(3):
+            limiter.wait()
+            times.append(limiter.next_time)
+        self.assertAlmostEqual(times[2] - times[0], 0.02, places=3)
@@ -0,0 +1,105 @@
+"""Лента подписок, собранная из лент отдельных авторов.
+
+Для каждого автора в кеше лежат пары (время публикации в микросекундах,
+id) его последних TIMELINE_LENGTH записей, новые первыми, упакованные в
+байты array('q'): такие ленты быстро читаются из кеша. Страница ленты
+подписок получается слиянием этих списков через кучу (heapq.merge): для
+страницы N разбираются только первые N * размер страницы элементов, а
+сами записи страницы берутся из кеша записей posts.post_cache. Глубже
+TIMELINE_LENGTH записей каждого автора лента не листается.
+
+Включается настройкой FOLLOW_FEED_ENGINE = 'timelines'.
+"""
+import heapq
+from array import array
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import post_cache
+from .models import Post
+
+TIMELINE_KEY = 'posts:timeline:{author_id}'
+# столько авторов читается из базы одним запросом
+LOAD_BATCH_SIZE = 500
+
+
+def timeline_key(author_id):
+    return TIMELINE_KEY.format(author_id=author_id)
+
+
+def invalidate_timeline(author_id):
+    cache.delete(timeline_key(author_id))
+
+
+def timeline_pairs(timeline):
+    """Пары (время, id) упакованной ленты, новые первыми"""
+    return zip(islice(timeline, 0, None, 2), islice(timeline, 1, None, 2))
+
+
+def load_timelines(author_ids):
+    """Последние записи авторов из базы: {id автора: array('q')}"""
+    length = settings.TIMELINE_LENGTH * 2
+    timelines = {author_id: array('q') for author_id in author_ids}
+    for start in range(0, len(author_ids), LOAD_BATCH_SIZE):
+        rows = (
+            Post.objects.filter(
+                author_id__in=author_ids[start:start + LOAD_BATCH_SIZE]
+            )
+            .order_by('author_id', '-pub_date', '-pk')
+            .values_list('author_id', 'pub_date', 'pk')
+        )
+        for author_id, pub_date, pk in rows.iterator():
+            timeline = timelines[author_id]
+            if len(timeline) < length:
+                timeline.append(int(pub_date.timestamp() * 1000000))
+                timeline.append(pk)
+    return timelines
+
+
+def author_timelines(author_ids):
+    """Ленты авторов из кеша; недостающие читаются из базы и кешируются"""
+    keys = {timeline_key(author_id): author_id for author_id in author_ids}
+    found = cache.get_many(keys)
+    timelines = []
+    for packed in found.values():
+        timeline = array('q')
+        timeline.frombytes(packed)
+        timelines.append(timeline)
+    missing = [
+        author_id for key, author_id in keys.items() if key not in found
+    ]
+    if missing:
+        loaded = load_timelines(missing)
+        cache.set_many(
+            {
+                timeline_key(author_id): timeline.tobytes()
+                for author_id, timeline in loaded.items()
+            },
+            settings.TIMELINE_TIMEOUT,
+        )
+        timelines.extend(loaded.values())
+    return [timeline for timeline in timelines if timeline]
+
+
+class TimelineFeed:
+    """Последовательность записей ленты подписок для Paginator"""
+
+    def __init__(self, author_ids):
+        self.timelines = author_timelines(list(author_ids))
+
+    def count(self):
+        return sum(len(timeline) for timeline in self.timelines) // 2
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        merged = heapq.merge(
+            *map(timeline_pairs, self.timelines), reverse=True
+        )
+        ids = [pk for _, pk in islice(merged, index.start, index.stop)]
+        return post_cache.get_many(ids)
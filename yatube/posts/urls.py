@@ -1,7 +1,7 @@
 # posts/urls.py
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
@@ -35,4 +35,30 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    # Ленты RSS/Atom
+    path('rss/', feeds.LatestPostsFeed(), name='index_rss'),
+    path('atom/', feeds.LatestPostsAtomFeed(), name='index_atom'),
+    path('group/<slug:slug>/rss/', feeds.GroupPostsFeed(), name='group_rss'),
+    path(
+        'group/<slug:slug>/atom/',
+        feeds.GroupPostsAtomFeed(),
+        name='group_atom'
+    ),
+    path(
+        'profile/<str:username>/rss/',
+        feeds.ProfilePostsFeed(),
+        name='profile_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.ProfilePostsAtomFeed(),
+        name='profile_atom'
+    ),
+    # Карта сайта
+    path('sitemap.xml', views.sitemap, name='sitemap'),
+    path(
+        'sitemap-<int:chunk>.xml',
+        views.sitemap,
+        name='sitemap_chunk'
+    ),
 ]
@@ -1,49 +1,75 @@
-from django.contrib.auth import get_user_model
+from functools import partial
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.db import IntegrityError, transaction
+from django.db.models import Count
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
-
-from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post
-from .paginator import make_paginator
+from django.views.static import serve
 
-User = get_user_model()
+from core.page_cache import swr_cache_page
+from core.single_flight import single_flight_page
+from core.surrogate import set_keys
 
-
-@cache_page(20)
+from .follow_graph import graph as follow_graph
+from .forms import CommentForm, PostForm
+from .lookups import get_author_or_404, get_group_or_404
+from .models import Comment, Follow, Post
+from .paginator import (
+    author_count_key, cached_count, cached_counts, group_count_key,
+    index_count_key, make_paginator,
+)
+from .post_cache import CachedPostList
+from .sitemaps import SITEMAP_CHUNK, SITEMAP_INDEX
+from .streaming import render_post_list
+from .surrogate_keys import INDEX_KEY, author_key, group_key, page_keys
+from .timelines import TimelineFeed
+
+
+# 20 секунд страница свежая, затем ещё 5 минут отдаётся устаревшей,
+# пока её пересобирает один запрос
+@swr_cache_page(20, 60 * 5)
 def index(request):
-    post_list = Post.objects.all()
-    page_obj = make_paginator(request, post_list)
+    post_list = Post.objects.for_index()
+    page_obj = make_paginator(
+        request, CachedPostList(post_list), index_count_key()
+    )
     context = {
         'page_obj': page_obj,
     }
-    return render(request, 'posts/index.html', context)
+    response = render_post_list(request, 'posts/index.html', context)
+    return set_keys(response, {INDEX_KEY, *page_keys(page_obj)})
 
 
 def group_posts(request, slug):
     """View-функция для отображения всех записей группы"""
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj_group = make_paginator(request, posts)
+    group = get_group_or_404(slug)
+    posts = Post.objects.for_group(group)
+    page_obj_group = make_paginator(
+        request, CachedPostList(posts), group_count_key(group.pk)
+    )
     context = {
         'group': group,
         'page_obj': page_obj_group,
     }
-    return render(request, 'posts/group_list.html', context)
+    response = render_post_list(request, 'posts/group_list.html', context)
+    return set_keys(
+        response, {group_key(group.pk), *page_keys(page_obj_group)}
+    )
 
 
+@single_flight_page
 def profile(request, username):
     """View-функция для отображения всех записей пользователя"""
-    author = get_object_or_404(User, username=username)
-    user_posts = author.posts.all()
-    count_posts = user_posts.count()
-    page_obj = make_paginator(request, user_posts)
+    author = get_author_or_404(username)
+    user_posts = Post.objects.for_author(author)
+    page_obj = make_paginator(
+        request, CachedPostList(user_posts), author_count_key(author.pk)
+    )
+    count_posts = page_obj.paginator.count
     # подписки
     if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user,
-            author=author
-        ).exists()
+        following = follow_graph.follows(request.user.pk, author.pk)
     else:
         following = False
     if author == request.user:
@@ -57,14 +83,18 @@ def profile(request, username):
         'following': following,
         'its_not_me': its_not_me
     }
-    return render(request, 'posts/profile.html', context)
+    response = render_post_list(request, 'posts/profile.html', context)
+    return set_keys(response, {author_key(author.pk), *page_keys(page_obj)})
 
 
+@single_flight_page
 def post_detail(request, post_id):
     """View-функция для отображения одной записи"""
-    post = get_object_or_404(Post, pk=post_id)
-    count_posts = post.author.posts.count()
-    comments = Comment.objects.filter(post=post)
+    post = get_object_or_404(Post.objects.with_related(), pk=post_id)
+    count_posts = cached_count(
+        author_count_key(post.author_id), post.author.posts.count
+    )
+    comments = Comment.objects.filter(post=post).select_related('author')
     form = CommentForm(request.POST or None)
     context = {
         'post': post,
@@ -72,7 +102,8 @@ def post_detail(request, post_id):
         'form': form,
         'comments': comments,
     }
-    return render(request, 'posts/post_detail.html', context)
+    response = render(request, 'posts/post_detail.html', context)
+    return set_keys(response, page_keys([post]))
 
 
 @login_required
@@ -127,12 +158,52 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def followed_authors(user):
+    """Авторы из графа подписок или None, если их слишком много для
+    IN и ленту нужно строить соединением с Follow"""
+    # граф читается из базы раз в FOLLOW_GRAPH_TIMEOUT, это дешевле
+    # соединения и COUNT(*) по нему на каждый показ ленты
+    author_ids = follow_graph.following(user.pk)
+    if len(author_ids) > settings.FOLLOW_GRAPH_MAX_IN_AUTHORS:
+        return None
+    return list(author_ids)
+
+
+def count_author_posts(author_ids):
+    return dict(
+        Post.objects.filter(author_id__in=author_ids)
+        .order_by()
+        .values_list('author_id')
+        .annotate(Count('pk'))
+    )
+
+
+def followed_posts_count(author_ids):
+    """Число записей ленты подписок — сумма закешированных количеств
+    авторов, поэтому новая запись не трогает ключи подписчиков"""
+    counts = cached_counts(
+        {author_count_key(author_id): author_id for author_id in author_ids},
+        count_author_posts,
+    )
+    return sum(counts.values())
+
+
 @login_required
 def follow_index(request):
     """Вывод избранных записей"""
     user = request.user
-    post_list = Post.objects.filter(author__following__user=user)
-    page_obj = make_paginator(request, post_list)
+    if settings.FOLLOW_FEED_ENGINE == 'timelines':
+        post_list = TimelineFeed(follow_graph.following(user.pk))
+        counter = None
+    else:
+        author_ids = followed_authors(user)
+        if author_ids is None:
+            post_list = CachedPostList(Post.objects.for_follower(user))
+            counter = None
+        else:
+            post_list = CachedPostList(Post.objects.for_authors(author_ids))
+            counter = partial(followed_posts_count, author_ids)
+    page_obj = make_paginator(request, post_list, counter=counter)
     context = {
         'page_obj': page_obj,
     }
@@ -142,18 +213,36 @@ def follow_index(request):
 @login_required
 def profile_follow(request, username):
     """Подписка на автора username"""
-    author = get_object_or_404(User, username=username)
-    user_fol = Follow.objects.filter(user=request.user, author=author)
-    # на себя подписываться нельзя
-    if request.user != author and not user_fol.exists():
-        Follow.objects.create(user=request.user, author=author)
+    author = get_author_or_404(username)
+    # на себя подписываться нельзя. Есть ли подписка, решает
+    # ограничение уникальности в базе, а не граф: устаревший граф привёл
+    # бы к повторной вставке
+    if request.user != author:
+        try:
+            with transaction.atomic():
+                Follow.objects.create(user=request.user, author=author)
+        except IntegrityError:
+            pass
     return redirect('posts:profile', username)
 
 
 @login_required
 def profile_unfollow(request, username):
     """Отписка от автора username"""
-    author = get_object_or_404(User, username=username)
+    author = get_author_or_404(username)
     if request.user != author:
-        Follow.objects.filter(user=request.user, author=author).delete()
+        deleted, _ = Follow.objects.filter(
+            user=request.user, author=author
+        ).delete()
+        if deleted:
+            follow_graph.changed_on_commit(request.user.pk)
     return redirect('posts:profile', author)
+
+
+def sitemap(request, chunk=None):
+    """Отдаёт заранее собранный индекс или кусок карты сайта"""
+    if chunk is None:
+        name = SITEMAP_INDEX
+    else:
+        name = SITEMAP_CHUNK.format(chunk=chunk)
+    return serve(request, name, document_root=settings.SITEMAP_ROOT)
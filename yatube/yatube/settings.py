@@ -23,8 +23,8 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = os.getenv('SECRET_KEY', default='t-hi73(a$y+-iq3ag2bny^#7ov82=h(8uuf4y0ko&exavwomz-')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-# DEBUG = False
-DEBUG = True
+# В продакшене используется yatube.settings_production
+DEBUG = os.getenv('DEBUG', default='True') == 'True'
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -48,6 +48,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.sitemaps',
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
@@ -57,13 +58,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.SurrogateCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ProfilerMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
@@ -140,6 +146,14 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+# Отдача собранной статики приложением (core.staticfiles): в разработке
+# её отдаёт runserver
+STATIC_SERVE_ENABLED = False
+# Файлы без хеша в имени кешируются браузером ненадолго
+STATIC_MAX_AGE = 60
+# Файлы не больше этого размера держатся в памяти процесса
+STATIC_MEMORY_MAX_SIZE = 256 * 1024
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -157,9 +171,133 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Отдача загруженных файлов приложением (core.media); в разработке их
+# отдаёт django.conf.urls.static
+MEDIA_SERVE_ENABLED = False
+# None — файл отдаёт само приложение; 'x-accel-redirect' (nginx) или
+# 'x-sendfile' (Apache) — передаёт отдачу прокси
+MEDIA_ACCEL = None
+# internal-location nginx, соответствующий MEDIA_ROOT
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+MEDIA_MAX_AGE = 60 * 60 * 24
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.InstrumentedLocMemCache',
     }
 }
+# Этот кеш живёт в памяти процесса: команде warm_cache и кешу страниц в
+# нескольких процессах сервера нужен общий кеш (memcached, Redis).
+# С общим кешем между процессами перед ним ставится кеш процесса
+# (core.cache.TwoTierCache), например:
+# CACHES = {
+#     'default': {
+#         'BACKEND': 'core.cache.TwoTierCache',
+#         'OPTIONS': {
+#             'SHARED': 'shared',
+#             'LOCAL_MAX_BYTES': 16 * 1024 * 1024,
+#             'LOCAL_TIMEOUT': 5,
+#             'STAMP_INTERVAL': 1,
+#         },
+#     },
+#     'shared': {
+#         'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+#         'LOCATION': '127.0.0.1:11211',
+#     },
+# }
+# Сессии при этом лучше держать прямо в общем кеше: удалённая при выходе
+# сессия не должна оставаться в кешах других процессов
+# SESSION_CACHE_ALIAS = 'shared'
+
+# Ленты RSS/Atom: число записей и время жизни закешированного тела ленты
+FEED_ITEMS = 20
+FEED_CACHE_TIMEOUT = 60 * 60
+
+# Карта сайта собирается командой build_sitemaps в статические куски
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+SITEMAP_CHUNK_SIZE = 10000
+SITEMAP_DOMAIN = os.getenv('SITEMAP_DOMAIN', default='localhost:8000')
+SITEMAP_PROTOCOL = 'http'
+
+# Начиная с этого числа строк пагинаторы админки берут оценку количества
+# записей из статистики СУБД вместо COUNT(*)
+ESTIMATED_COUNT_THRESHOLD = 100000
+
+# Метрики запросов по именам URL, отдаются на /metrics
+METRICS_ENABLED = True
+METRICS_ALLOWED_IPS = INTERNAL_IPS
+# Собственное время каждого шаблона в заголовке Server-Timing
+TEMPLATE_TIMINGS_HEADER = DEBUG
+
+# Профилирование запросов по требованию: сотрудникам по заголовку
+# X-Profile, остальным по подписанному X-Profile-Token
+PROFILER_ENABLED = True
+PROFILER_ROOT = os.path.join(BASE_DIR, 'profiles')
+PROFILER_KEEP = 50
+PROFILER_TOKEN_MAX_AGE = 60 * 60
+
+# Журнал медленных запросов к базе: порог в секундах и приложения,
+# в коде которых ищется вызвавшая запрос строка
+SLOW_QUERY_LOG_ENABLED = True
+SLOW_QUERY_THRESHOLD = 0.1
+SLOW_QUERY_APPS = ('posts', 'users', 'about')
+
+# Сессии читаются из кеша; неизменённая сессия пишется в базу не чаще
+# раза в SESSION_DB_WRITE_INTERVAL секунд
+SESSION_ENGINE = 'core.sessions'
+SESSION_DB_WRITE_INTERVAL = 60 * 60
+
+# Потоковая отдача главной, страниц групп и профилей (posts.streaming).
+# Кеш страниц не сохраняет потоковые ответы: с этой настройкой главная
+# страница перестаёт кешироваться
+STREAM_LIST_PAGES = False
+
+# Адаптивные миниатюры (core.thumbnails): ширины для srcset и качество
+# для современных форматов
+THUMBNAIL_WIDTHS = (480, 960)
+THUMBNAIL_FORMAT_QUALITY = {'AVIF': 60, 'WEBP': 80}
+
+# Граф подписок в памяти (posts.follow_graph): сколько пользователей
+# держит процесс и сколько живут массивы подписок в общем кеше. Ленту
+# подписок по массиву выбирает IN с не больше чем
+# FOLLOW_GRAPH_MAX_IN_AUTHORS авторами, иначе — соединение с Follow
+FOLLOW_GRAPH_LOCAL_USERS = 10000
+FOLLOW_GRAPH_TIMEOUT = 60 * 60 * 24
+FOLLOW_GRAPH_MAX_IN_AUTHORS = 500
+
+# Как строится лента подписок: 'join' — запросом с соединением Follow,
+# 'timelines' — слиянием закешированных лент авторов (posts.timelines).
+# Лента автора хранит его последние TIMELINE_LENGTH записей
+FOLLOW_FEED_ENGINE = 'join'
+TIMELINE_LENGTH = 200
+TIMELINE_TIMEOUT = 60 * 60
+
+# Кеш записей для лент (posts.post_cache)
+POST_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Кеш поиска авторов по имени и групп по адресу (posts.lookups);
+# отсутствие имени или адреса кешируется ненадолго
+LOOKUP_CACHE_TIMEOUT = 60 * 60
+LOOKUP_NOT_FOUND_TIMEOUT = 60
+
+# Число записей в лентах для пагинатора берётся из кеша
+# (posts.paginator.CachedCountPaginator)
+COUNT_CACHE_TIMEOUT = 60 * 60
+
+# Кеширование страниц анонимов прокси перед сайтом (core.surrogate):
+# сколько страница свежа в прокси и сколько после этого её ещё можно
+# отдавать, обновляя в фоне. Без SURROGATE_PURGE_URL изменения данных
+# прокси не сбрасываются и видны через SURROGATE_MAX_AGE
+SURROGATE_CACHE_ENABLED = True
+SURROGATE_MAX_AGE = 60
+SURROGATE_STALE_WHILE_REVALIDATE = 60 * 5
+SURROGATE_PURGE_URL = os.getenv('SURROGATE_PURGE_URL') or None
+SURROGATE_PURGE_METHOD = 'PURGE'
+SURROGATE_PURGE_HEADER = 'Surrogate-Key'
+SURROGATE_PURGE_TIMEOUT = 2
+
+# Одновременные одинаковые запросы анонимов к записи и профилю ждут
+# ответа первого из них (core.single_flight) не дольше
+# SINGLE_FLIGHT_TIMEOUT секунд
+SINGLE_FLIGHT_ENABLED = True
+SINGLE_FLIGHT_TIMEOUT = 5
@@ -0,0 +1,58 @@
+"""Настройки для продакшена.
+
+Выбираются переменной окружения:
+
+    DJANGO_SETTINGS_MODULE=yatube.settings_production gunicorn yatube.wsgi
+
+Отличия от настроек разработки: DEBUG выключен, нет django-debug-toolbar,
+шаблоны читаются с диска один раз и дальше берутся из кеша загрузчика,
+статику с хешами в именах отдаёт само приложение.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE, TEMPLATES
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.getenv(
+    'ALLOWED_HOSTS', default='localhost,127.0.0.1,[::1]'
+).split(',')
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app != 'debug_toolbar']
+
+MIDDLEWARE = [
+    name for name in MIDDLEWARE
+    if name != 'debug_toolbar.middleware.DebugToolbarMiddleware'
+]
+
+# APP_DIRS несовместим с явным списком loaders: тот же порядок поиска
+# задаётся загрузчиками, обёрнутыми в cached.Loader
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'context_processors': [
+            processor
+            for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+            if processor != 'django.template.context_processors.debug'
+        ],
+        'loaders': [(
+            'django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ],
+        )],
+    },
+}]
+
+# Статика собирается manage.py collectstatic: имена с хешем содержимого,
+# рядом сжатые .gz/.br, отдаёт core.middleware.StaticFilesMiddleware
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
+STATIC_SERVE_ENABLED = True
+
+MEDIA_SERVE_ENABLED = True
+MEDIA_ACCEL = os.getenv('MEDIA_ACCEL') or None
+
+TEMPLATE_TIMINGS_HEADER = False
@@ -18,22 +18,36 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from core.views import metrics, serve_media
+
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
+    path('admin/', include('core.urls', namespace='core')),
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('metrics', metrics, name='metrics'),
 ]
 
 handler403 = 'core.views.permission_denied'
 handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'
 
-if settings.DEBUG:
+if settings.MEDIA_SERVE_ENABLED:
+    urlpatterns += [
+        path(
+            settings.MEDIA_URL.lstrip('/') + '<path:path>',
+            serve_media,
+            name='media',
+        ),
+    ]
+elif settings.DEBUG:
     urlpatterns += static(
         settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
     )
+
+if 'debug_toolbar' in settings.INSTALLED_APPS:
     import debug_toolbar
 
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)